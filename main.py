@@ -1,3 +1,4 @@
+import uuid
 import streamlit as st
 from pathlib import Path
 from src.core import MultiModelGLMSystem
@@ -12,6 +13,15 @@ from src.ui import (
 )
 
 
+@st.cache_resource(show_spinner=False)
+def get_glm_system() -> MultiModelGLMSystem:
+    """Process-wide system: embeddings, Chroma and HRM are loaded once, not per tab"""
+    system = MultiModelGLMSystem()
+    # The shell renders right away; heavy components load on a background thread
+    system.start_background_warmup()
+    return system
+
+
 def main():
     st.set_page_config(
         page_title="Multi-Model GLM Assistant with Code Editor",
@@ -21,19 +31,20 @@ def main():
 
     st.title("🤖🎵💻 Multi-Model GLM Assistant: GLM-Z1 + Specialists + Code Editor")
 
-    # Initialize system
+    # Initialize system - one instance per process, shared by every browser session
     if "multi_glm_system" not in st.session_state:
         with st.spinner("Initializing multi-model system with HRM..."):
-            st.session_state.multi_glm_system = MultiModelGLMSystem()
+            st.session_state.multi_glm_system = get_glm_system()
+            st.session_state.scheduler_session_id = uuid.uuid4().hex
             
-            # Display HRM initialization status
-            hrm_status = getattr(st.session_state.multi_glm_system, 'hrm_wrapper', None)
+            # Display HRM initialization status (without waiting for it to load)
+            hrm_status = st.session_state.multi_glm_system.loaded_component('hrm_wrapper')
             if hrm_status:
                 st.success("🧠 HRM Local Wrapper initialized successfully")
                 if hasattr(hrm_status, 'device') and hrm_status.device == 'mps':
                     st.success("⚡ M4 Max MPS acceleration enabled")
             else:
-                st.warning("⚠️ HRM initialization incomplete - using pattern-based routing")
+                st.info("⏳ Loading HRM, embeddings and knowledge base in the background")
 
     # Initialize editor components
     if "file_editor" not in st.session_state:
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for per-request prompt routing cost
+
+Compares the previous per-consumer regex loops (system domain/complexity
+detection, HRM task analysis, context enhancer query analysis and retrieval
+task type) against one shared RoutingEngine scan, on a synthetic corpus of
+FAUST/JUCE/general prompts. Also checks both produce the same results.
+
+Usage:
+    python scripts/benchmark_routing.py [--prompts 3000] [--repeat 3]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.routing_engine import (
+    RoutingEngine,
+    ROUTING_COMPLEXITY_INDICATORS,
+    TASK_COMPLEXITY_INDICATORS,
+    TASK_TYPE_PATTERNS,
+    KEYWORD_GROUPS,
+    FAUST_SYNTAX_PATTERNS,
+)
+from src.core.multi_model_system import MultiModelGLMSystem
+
+SUBJECTS = [
+    "a FAUST lowpass filter", "a stereo reverb in faust", "a JUCE audio plugin",
+    "a VST plugin with parameter automation", "a wavetable oscillator with polyblep",
+    "an ADSR envelope with LFO modulation", "a thread-safe audio buffer",
+    "a multi-model routing system", "a biquad filter with butterworth response",
+    "the audio processor editor GUI component", "a lock-free FIFO for real-time audio",
+    "process = os.osc(440) : fi.lowpass(2, 1000);", "a python script that parses logs",
+]
+VERBS = [
+    "Create", "Implement", "Explain", "Optimize", "Debug", "Design", "Refactor",
+    "Build a complete", "Write a simple", "Review", "Compare", "Integrate",
+]
+SUFFIXES = [
+    "", " from scratch", " for production", " with SIMD and low latency",
+    " and explain the signal processing", " using several modules and classes",
+    " with unit tests and benchmark", " that integrates with the JUCE processor",
+    " as a quick example", " with frequency domain analysis and fft convolution",
+]
+
+
+def build_corpus(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        prompt = f"{rng.choice(VERBS)} {rng.choice(SUBJECTS)}{rng.choice(SUFFIXES)}"
+        if rng.random() < 0.2:
+            prompt += " " + " ".join(rng.choice(SUBJECTS).split() * 6)
+        corpus.append(prompt)
+    return corpus
+
+
+def legacy_route(prompt: str, routing_patterns):
+    """The per-consumer loops as they ran before the shared engine"""
+    prompt_lower = prompt.lower()
+
+    # MultiModelGLMSystem._detect_domain_patterns
+    best_domain, best_confidence = "general", 0.0
+    for domain, config in routing_patterns.items():
+        confidence, matches = 0.0, 0
+        for pattern in config["patterns"]:
+            if re.search(pattern, prompt_lower):
+                matches += 1
+                confidence += 0.2
+        if matches > 0:
+            confidence = min(confidence, 1.0)
+            if confidence > best_confidence:
+                best_domain, best_confidence = domain, confidence
+
+    # MultiModelGLMSystem._estimate_complexity
+    complexity = 0.3
+    for pattern, weight in ROUTING_COMPLEXITY_INDICATORS:
+        if re.search(pattern, prompt_lower):
+            complexity += weight
+    word_count = len(prompt.split())
+    if word_count > 50:
+        complexity += 0.2
+    elif word_count > 100:
+        complexity += 0.3
+    complexity = max(0.0, min(1.0, complexity))
+
+    # HRMLocalWrapper._analyze_task (task types + complexity table)
+    task_types = []
+    for task_type, patterns in TASK_TYPE_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, prompt_lower):
+                task_types.append(task_type)
+                break
+    task_complexity = 1
+    for pattern, score in TASK_COMPLEXITY_INDICATORS.items():
+        if re.search(pattern, prompt_lower):
+            task_complexity = max(task_complexity, score)
+
+    # ContextEnhancer._estimate_complexity repeats the same table
+    enhancer_complexity = 1
+    for pattern, score in TASK_COMPLEXITY_INDICATORS.items():
+        if re.search(pattern, prompt_lower):
+            enhancer_complexity = max(enhancer_complexity, score)
+
+    # ContextEnhancer keyword/term extraction and retrieval task type
+    keyword_hits = {
+        group: [term for term in terms if term in prompt_lower]
+        for group, terms in KEYWORD_GROUPS.items()
+    }
+    has_syntax = any(re.search(pattern, prompt) for pattern in FAUST_SYNTAX_PATTERNS)
+
+    return (best_domain, best_confidence, complexity, task_types,
+            min(10, task_complexity), keyword_hits, has_syntax)
+
+
+def engine_route(engine: RoutingEngine, prompt: str):
+    """All consumers reading the shared analysis"""
+    analysis = engine.analyze(prompt)  # system router
+    engine.analyze(prompt)  # HRM task analysis
+    engine.analyze(prompt)  # context enhancer query analysis
+    return (analysis.domain, analysis.domain_confidence, analysis.complexity,
+            analysis.task_types, analysis.task_complexity, analysis.keyword_hits,
+            analysis.has_faust_syntax)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt routing cost")
+    parser.add_argument("--prompts", type=int, default=3000, help="Corpus size")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    routing_patterns = MultiModelGLMSystem._initialize_routing_patterns(None)
+    domain_patterns = {domain: config["patterns"] for domain, config in routing_patterns.items()}
+    corpus = build_corpus(args.prompts)
+    engine = RoutingEngine(domain_patterns, cache_size=args.prompts * 2)
+
+    # Results must be identical before timing means anything
+    mismatches = sum(
+        1 for prompt in corpus
+        if legacy_route(prompt, routing_patterns) != engine_route(engine, prompt)
+    )
+
+    def time_it(fn):
+        best = float("inf")
+        for _ in range(args.repeat):
+            engine.clear_cache()
+            start = time.perf_counter()
+            for prompt in corpus:
+                fn(prompt)
+            best = min(best, time.perf_counter() - start)
+        return best / len(corpus) * 1e6
+
+    before_us = time_it(lambda prompt: legacy_route(prompt, routing_patterns))
+    after_us = time_it(lambda prompt: engine_route(engine, prompt))
+
+    print(f"📊 Routing benchmark over {len(corpus)} prompts")
+    print(f"   Before (per-consumer regex loops): {before_us:8.1f} µs/request")
+    print(f"   After  (shared RoutingEngine):     {after_us:8.1f} µs/request")
+    print(f"   Speedup: {before_us / after_us:.1f}x")
+    if mismatches:
+        print(f"❌ {mismatches} prompts routed differently")
+        sys.exit(1)
+    print("✅ Routing results identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the Streamlit app
+
+Measures, each in a fresh interpreter so module caches don't flatter the
+numbers:
+  - import time of src.core / src.ui and which heavy modules they pull in
+  - MultiModelGLMSystem() construction time
+  - time to the first rendered page (main.py run through Streamlit's AppTest)
+  - optionally, the build time of each lazy component (--components)
+
+Usage:
+    python scripts/benchmark_startup.py [--repeat 3] [--components] [--skip-render]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+HEAVY_MODULES = ["torch", "langchain", "langchain_community", "chromadb", "sentence_transformers", "pytesseract"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import src.core, src.ui
+from src.core import MultiModelGLMSystem
+imported = time.perf_counter()
+system = MultiModelGLMSystem()
+built = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "init_s": built - imported,
+    "heavy_modules": [name for name in HEAVY if name in sys.modules],
+}))
+"""
+
+RENDER_PROBE = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("main.py", default_timeout=120)
+app.run()
+print(json.dumps({
+    "render_s": time.perf_counter() - start,
+    "exceptions": [str(exception.value) for exception in app.exception],
+}))
+"""
+
+COMPONENT_PROBE = """
+import json, time
+from src.core import MultiModelGLMSystem
+from src.core.multi_model_system import WARMUP_COMPONENTS
+system = MultiModelGLMSystem()
+timings = {}
+for name in WARMUP_COMPONENTS:
+    start = time.perf_counter()
+    getattr(system, name)
+    timings[name] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def run_probe(code: str) -> dict:
+    """Run a probe in a fresh interpreter from the project root"""
+    result = subprocess.run(
+        [sys.executable, "-c", f"HEAVY = {HEAVY_MODULES!r}\n{code}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "probe failed")
+    # Components print progress; the JSON result is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app startup time")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh-process repetitions (best is reported)")
+    parser.add_argument("--components", action="store_true", help="Also time each lazy component build")
+    parser.add_argument("--skip-render", action="store_true", help="Skip the Streamlit AppTest render")
+    args = parser.parse_args()
+
+    imports = [run_probe(IMPORT_PROBE) for _ in range(args.repeat)]
+    best_import = min(run["import_s"] for run in imports)
+    best_init = min(run["init_s"] for run in imports)
+
+    print("📊 Startup benchmark")
+    print(f"   Import src.core + src.ui:     {best_import * 1000:8.1f} ms")
+    print(f"   MultiModelGLMSystem():        {best_init * 1000:8.1f} ms")
+    heavy = imports[0]["heavy_modules"]
+    print(f"   Heavy modules loaded:         {', '.join(heavy) if heavy else 'none'}")
+
+    if not args.skip_render:
+        try:
+            renders = [run_probe(RENDER_PROBE) for _ in range(args.repeat)]
+            print(f"   First rendered page:          {min(run['render_s'] for run in renders) * 1000:8.1f} ms")
+            for exception in renders[0]["exceptions"]:
+                print(f"   ⚠️ Page raised: {exception}")
+        except RuntimeError as e:
+            print(f"   ⚠️ Render benchmark unavailable: {e}")
+
+    if args.components:
+        try:
+            timings = run_probe(COMPONENT_PROBE)
+            print("   Lazy component build times:")
+            for name, seconds in timings.items():
+                print(f"     {name:<20} {seconds * 1000:8.1f} ms")
+        except RuntimeError as e:
+            print(f"   ⚠️ Component benchmark unavailable: {e}")
+
+    if heavy:
+        print("❌ Importing the app loads heavy modules eagerly")
+        sys.exit(1)
+    print("✅ App shell imports without torch, langchain or chromadb")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Command line entry points for GLM-Z1 Coding Assistant
+
+    python -m src.cli batch prompts.jsonl
+"""
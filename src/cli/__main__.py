@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Command line interface for GLM-Z1 Coding Assistant
+
+Usage:
+    python -m src.cli batch prompts.jsonl [--output results.jsonl] [--concurrency 4]
+        [--model-limit glm=1 --model-limit deepseek=2] [--max-in-flight 3]
+        [--routing-mode auto] [--model auto] [--project Default]
+        [--no-context] [--no-cache] [--timeout 300] [--retry-errors] [--limit N]
+
+Rerunning with the same output file resumes an interrupted batch.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .batch import BatchRunner, load_prompts, resolve_model_name
+
+
+def _parse_model_limits(system, specs: List[str]) -> Dict[str, int]:
+    limits = {}
+    for spec in specs:
+        name, _, limit = spec.rpartition("=")
+        if not name or not limit.isdigit():
+            raise ValueError(f"--model-limit expects MODEL=N, got {spec!r}")
+        limits[resolve_model_name(system.models, name)] = int(limit)
+    return limits
+
+
+def run_batch(args) -> int:
+    """Run a prompt file and print a summary; returns the process exit code"""
+    from src.core import MultiModelGLMSystem
+
+    defaults = {
+        "selected_model": args.model,
+        "routing_mode": args.routing_mode,
+        "project_name": args.project,
+        "use_context": not args.no_context,
+        "use_cache": not args.no_cache,
+    }
+    if args.timeout is not None:
+        defaults["timeout"] = args.timeout
+
+    items = load_prompts(args.prompts, defaults)
+    if args.limit:
+        items = items[:args.limit]
+    output = args.output or str(Path(args.prompts).with_suffix(".results.jsonl"))
+
+    system = MultiModelGLMSystem()
+    model_limits = _parse_model_limits(system, args.model_limit)
+    system.scheduler.set_limits(model_limits, args.max_in_flight)
+    if args.model != "auto":
+        defaults["selected_model"] = resolve_model_name(system.models, args.model)
+        for item in items:
+            item.options.setdefault("selected_model", defaults["selected_model"])
+
+    stats = system.scheduler.get_stats()
+    print(f"🚀 Batch: {args.prompts} -> {output}")
+    print(
+        f"   {args.concurrency} concurrent prompt(s), {stats['max_in_flight']} generation(s) in flight, "
+        f"limits {system.scheduler.model_limits}"
+    )
+    if args.warm_up:
+        print("⏳ Loading embeddings, knowledge base and HRM before timing prompts...")
+        system.warm_up()
+
+    runner = BatchRunner(system, output, concurrency=args.concurrency, retry_errors=args.retry_errors)
+    summary = runner.run(items)
+
+    print(f"📊 {json.dumps(summary, indent=2)}")
+    if summary["interrupted"]:
+        return 130
+    return 1 if summary["errors"] else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="GLM-Z1 Coding Assistant CLI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Run a prompt file through routing, RAG and the models")
+    batch.add_argument("prompts", help="JSONL file ({\"prompt\": ..., \"id\": ...}) or one prompt per line")
+    batch.add_argument("--output", "-o", help="Results JSONL (default: <prompts>.results.jsonl)")
+    batch.add_argument("--concurrency", "-c", type=int, default=2, help="Prompts processed at once")
+    batch.add_argument("--model-limit", action="append", default=[], metavar="MODEL=N",
+                       help="Concurrent generations for a model (name or fragment, e.g. glm=1); repeatable")
+    batch.add_argument("--max-in-flight", type=int, help="Concurrent generations across all models")
+    batch.add_argument("--routing-mode", default="auto",
+                       choices=["auto", "manual", "assisted", "draft_refine"], help="Default routing mode")
+    batch.add_argument("--model", default="auto", help="Default model (name or fragment) for manual routing")
+    batch.add_argument("--project", default="Default", help="Default project for context")
+    batch.add_argument("--no-context", action="store_true", help="Skip knowledge base and project context")
+    batch.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    batch.add_argument("--timeout", type=float, help="Per-prompt request deadline in seconds")
+    batch.add_argument("--retry-errors", action="store_true", help="Rerun prompts that failed in an earlier run")
+    batch.add_argument("--limit", type=int, help="Only run the first N prompts")
+    batch.add_argument("--warm-up", action=argparse.BooleanOptionalAction, default=True,
+                       help="Load heavy components before the first prompt")
+    batch.set_defaults(handler=run_batch)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Headless Batch Runner
+Drives MultiModelGLMSystem.generate_response over a prompt file with
+bounded concurrency, appending one JSONL record per prompt so an
+interrupted run resumes where it stopped
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+# Prompt record keys passed to generate_response, with accepted aliases
+REQUEST_FIELDS = {
+    "selected_model": "selected_model",
+    "model": "selected_model",
+    "routing_mode": "routing_mode",
+    "context": "context",
+    "use_context": "use_context",
+    "project_name": "project_name",
+    "project": "project_name",
+    "use_hrm_decomposition": "use_hrm_decomposition",
+    "use_cache": "use_cache",
+    "timeout": "timeout",
+}
+
+
+@dataclass
+class BatchItem:
+    """One prompt of a batch file"""
+    id: str
+    prompt: str
+    options: Dict = field(default_factory=dict)  # generate_response keyword arguments
+    metadata: Dict = field(default_factory=dict)  # other keys, copied to the output record
+
+
+def _default_id(line_no: int, prompt: str) -> str:
+    return f"{line_no}-{hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:10]}"
+
+
+def load_prompts(path: str, defaults: Optional[Dict] = None) -> List[BatchItem]:
+    """
+    Read a prompt file
+
+    Lines are JSON objects with a "prompt" key (other request keys such as
+    "routing_mode" or "project" override ``defaults``), or plain text with
+    one prompt per line. Blank lines and lines starting with "#" are
+    skipped. Records without an "id" get one from their line number and
+    prompt, so ids stay stable between runs of the same file.
+
+    Args:
+        path: Prompt file (.jsonl or plain text)
+        defaults: generate_response keyword arguments applied to every prompt
+
+    Returns:
+        Items in file order
+
+    Raises:
+        ValueError: On a record without a prompt or a duplicate id
+    """
+    items = []
+    seen: Set[str] = set()
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            record = json.loads(line) if line.startswith("{") else {"prompt": line}
+            prompt = record.pop("prompt", None)
+            if not prompt:
+                raise ValueError(f"{path}:{line_no}: record has no \"prompt\"")
+
+            options = dict(defaults or {})
+            metadata = {}
+            item_id = str(record.pop("id", "") or _default_id(line_no, prompt))
+            for key, value in record.items():
+                if key in REQUEST_FIELDS:
+                    options[REQUEST_FIELDS[key]] = value
+                else:
+                    metadata[key] = value
+
+            if item_id in seen:
+                raise ValueError(f"{path}:{line_no}: duplicate id {item_id!r}")
+            seen.add(item_id)
+            items.append(BatchItem(item_id, prompt, options, metadata))
+    return items
+
+
+def completed_ids(output_path: str, retry_errors: bool = False) -> Set[str]:
+    """Ids already recorded in an earlier run's output (failed ones too unless ``retry_errors``)"""
+    done: Set[str] = set()
+    path = Path(output_path)
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "ok" or not retry_errors:
+                done.add(record.get("id"))
+    return done
+
+
+def resolve_model_name(models, name: str) -> str:
+    """Full model name from an exact name or a unique case-insensitive fragment ("glm", "deepseek")"""
+    if name in models:
+        return name
+    matches = [model for model in models if name.lower() in model.lower()]
+    if len(matches) != 1:
+        raise ValueError(f"Model {name!r} matches {matches or 'nothing'}; choose from {list(models)}")
+    return matches[0]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] if ordered else 0.0
+
+
+class BatchRunner:
+    """Runs batch items through generate_response and appends their results
+
+    Every finished prompt is written and fsynced immediately, so after an
+    interruption (Ctrl-C, crash, reboot) a rerun with the same output file
+    only runs the prompts that have no record yet.
+    """
+
+    def __init__(self,
+                 system,
+                 output_path: str,
+                 concurrency: int = 2,
+                 retry_errors: bool = False,
+                 session_id: str = "batch"):
+        """
+        Args:
+            system: MultiModelGLMSystem (anything with a compatible generate_response)
+            output_path: JSONL file results are appended to
+            concurrency: Prompts in progress at once; model generations are
+                further limited by the system's request scheduler
+            retry_errors: Rerun prompts whose earlier record failed
+            session_id: Scheduler session the batch's generations run under
+        """
+        self.system = system
+        self.output_path = output_path
+        self.concurrency = max(1, concurrency)
+        self.retry_errors = retry_errors
+        self.session_id = session_id
+        self._write_lock = threading.Lock()
+
+    def run(self, items: List[BatchItem], progress: Optional[Callable[[str], None]] = print) -> Dict:
+        """
+        Run every item without a result yet
+
+        Returns:
+            Summary with counts, wall time, latency percentiles and models used
+        """
+        done = completed_ids(self.output_path, self.retry_errors)
+        pending = [item for item in items if item.id not in done]
+        summary = {
+            "total": len(items),
+            "skipped": len(items) - len(pending),
+            "ok": 0,
+            "errors": 0,
+            "interrupted": False,
+        }
+        if progress:
+            progress(f"📋 {len(pending)} prompt(s) to run, {summary['skipped']} already done")
+
+        Path(self.output_path).parent.mkdir(parents=True, exist_ok=True)
+        durations: List[float] = []
+        models: Counter = Counter()
+        start = time.perf_counter()
+
+        def collect(future):
+            record = future.result()
+            self._write(output, record)
+            summary["ok" if record["status"] == "ok" else "errors"] += 1
+            durations.append(record["timings"]["duration_ms"])
+            model = record.get("routing", {}).get("selected_model")
+            if model:
+                models[model] += 1
+            if progress:
+                icon = "✅" if record["status"] == "ok" else "❌"
+                progress(
+                    f"[{summary['ok'] + summary['errors']}/{len(pending)}] {icon} {record['id']} "
+                    f"{model or '-'} {record['timings']['duration_ms'] / 1000:.1f}s"
+                )
+
+        self._terminate_partial_line()
+        with open(self.output_path, "a", encoding="utf-8") as output:
+            executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="glm-batch")
+            futures = [executor.submit(self._run_item, item) for item in pending]
+            collected = set()
+            try:
+                for future in as_completed(futures):
+                    collect(future)
+                    collected.add(future)
+            except KeyboardInterrupt:
+                summary["interrupted"] = True
+                if progress:
+                    progress("⏸️ Interrupted - finishing the prompts already running; rerun to resume")
+                # Queued prompts are dropped; running ones still get their record
+                executor.shutdown(wait=True, cancel_futures=True)
+                for future in futures:
+                    if future not in collected and future.done() and not future.cancelled():
+                        collect(future)
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        summary["wall_s"] = round(time.perf_counter() - start, 2)
+        if durations:
+            summary["latency_ms"] = {
+                "p50": round(_percentile(durations, 0.5), 1),
+                "p95": round(_percentile(durations, 0.95), 1),
+                "max": round(max(durations), 1),
+            }
+        summary["models"] = dict(models)
+        return summary
+
+    def _run_item(self, item: BatchItem) -> Dict:
+        """Generate one prompt and build its output record (never raises)"""
+        started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        start = time.perf_counter()
+        record = {"id": item.id, "prompt": item.prompt, **item.metadata}
+        try:
+            result = self.system.generate_response(item.prompt, session_id=self.session_id, **item.options)
+            response = result.get("response", "")
+            routing = dict(result.get("routing", {}))
+            telemetry = routing.pop("telemetry", {})
+            # Model failures come back as "❌ ..." responses rather than exceptions
+            record["status"] = "error" if response.lstrip().startswith("❌") else "ok"
+            record["response"] = response
+            if "draft" in result:
+                record["draft"] = result["draft"]
+            record["routing"] = routing
+        except Exception as e:
+            telemetry = {}
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+
+        record["timings"] = {
+            "started_at": started_at,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "queue_wait_ms": record.get("routing", {}).get("queue_wait_ms", 0.0),
+            "stages": {name: stage["total_ms"] for name, stage in telemetry.get("stages", {}).items()},
+        }
+        return record
+
+    def _write(self, output, record: Dict):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._write_lock:
+            output.write(line + "\n")
+            output.flush()
+            os.fsync(output.fileno())
+
+    def _terminate_partial_line(self):
+        """Start on a fresh line if an interrupted run left half a record"""
+        path = Path(self.output_path)
+        if not path.exists() or path.stat().st_size == 0:
+            return
+        with open(path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
@@ -1,16 +1,45 @@
-from .multi_model_system import MultiModelGLMSystem
-from .project_manager import ProjectManager
-from .file_processor import FileProcessor
-from .context_enhancer import ContextEnhancer, enhance_vectorstore_retrieval
-from .prompts import SYSTEM_PROMPTS, MODEL_INFO, FAUST_QUICK_PROMPTS
+# Exports are resolved on first access (PEP 562) so importing the package
+# doesn't pull in langchain, chromadb or torch
+from .lazy_loading import lazy_exports
 
-__all__ = [
-    'MultiModelGLMSystem', 
-    'ProjectManager', 
-    'FileProcessor', 
-    'ContextEnhancer',
-    'enhance_vectorstore_retrieval',
-    'SYSTEM_PROMPTS',
-    'MODEL_INFO', 
-    'FAUST_QUICK_PROMPTS'
-]
\ No newline at end of file
+_EXPORTS = {
+    'MultiModelGLMSystem': '.multi_model_system',
+    'ProjectManager': '.project_manager',
+    'FileProcessor': '.file_processor',
+    'ContextEnhancer': '.context_enhancer',
+    'enhance_vectorstore_retrieval': '.context_enhancer',
+    'PhaseExecutor': '.phase_executor',
+    'ResponseCache': '.response_cache',
+    'ModelResidencyManager': '.model_residency',
+    'ModelHealthMonitor': '.model_health',
+    'RoutingEngine': '.routing_engine',
+    'RoutingAnalysis': '.routing_engine',
+    'EmbeddingRouter': '.embedding_router',
+    'RetrievalContext': '.retrieval_context',
+    'IndexGeneration': '.index_generation',
+    'LexicalIndex': '.lexical_index',
+    'KeywordAutomaton': '.keyword_automaton',
+    'mmr_select': '.diversity',
+    'OrchestrationContext': '.orchestration_context',
+    'PromptAssembler': '.prompt_assembler',
+    'PromptSection': '.prompt_assembler',
+    'PromptBudget': '.prompt_assembler',
+    'ConversationSession': '.conversation_session',
+    'ConversationSessionStore': '.conversation_session',
+    'OllamaChatClient': '.conversation_session',
+    'ConversationMemory': '.conversation_memory',
+    'RequestScheduler': '.request_scheduler',
+    'SchedulerTicket': '.request_scheduler',
+    'SlotWithdrawn': '.request_scheduler',
+    'TelemetryRecorder': '.telemetry',
+    'RequestTrace': '.telemetry',
+    'Deadline': '.deadlines',
+    'GenerationTimeout': '.deadlines',
+    'SYSTEM_PROMPTS': '.prompts',
+    'MODEL_INFO': '.prompts',
+    'FAUST_QUICK_PROMPTS': '.prompts',
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = list(_EXPORTS)
@@ -3,17 +3,180 @@ Context Enhancement Module for FAUST/JUCE Development
 Provides intelligent ChromaDB retrieval with domain-specific search strategies
 """
 
+import contextvars
 import re
-from typing import List, Dict, Set, Tuple, Optional
-from langchain_community.vectorstores import Chroma
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict, NamedTuple, Optional, Sequence, Set, Tuple
 from .prompts import CONTEXT_ENHANCEMENT_PATTERNS, DSP_ALGORITHM_TEMPLATES
+from .routing_engine import RoutingEngine, get_routing_engine
+from .request_context import current_request
+from .retrieval_context import RetrievalContext
+from .index_generation import IndexGeneration
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .keyword_automaton import KeywordAutomaton
+from .diversity import mmr_select
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+
+# Domain terms searched alongside the query
+FAUST_EXPANSION_TERMS = ("faust", "dsp", "signal processing", "audio effect")
+JUCE_EXPANSION_TERMS = ("juce", "audio processor", "plugin development")
+
+# Fusion weight of all expansion terms together; the query itself weighs 1.0,
+# so documents that only match the generic domain terms rank below direct hits
+EXPANSION_WEIGHT = 0.5
+
+# Candidates fetched per max_docs for the diversity reranking to choose from
+MMR_FETCH_FACTOR = 3
+
+# FAUST standard library prefixes reported as library references
+FAUST_LIBRARY_PREFIXES = ("os.", "fi.", "re.", "de.", "en.", "ef.", "co.", "ma.", "ba.", "no.", "sy.", "ve.")
+
+# Library reference pages list each function as "(fi.)lowpass"
+FAUST_DOC_FUNCTION_PATTERN = re.compile(r"^\(([a-z]{2})\.\)([A-Za-z_][A-Za-z0-9_]*)", re.MULTILINE)
+# Qualified JUCE names (juce::AudioBuffer, dsp::IIR::Filter) and CamelCase class names
+JUCE_DOC_CLASS_PATTERN = re.compile(
+    r"\b(?:juce::)?(dsp::[A-Z][A-Za-z0-9]*(?:::[A-Z][A-Za-z0-9]*)*|[A-Z][a-z0-9]+(?:[A-Z][A-Za-z0-9]*)+)"
+)
+
+
+def load_faust_registry(docs_dir: str = "./faust_documentation") -> Dict[str, List[str]]:
+    """
+    FAUST library functions listed in the downloaded library reference
+    
+    Args:
+        docs_dir: Directory of faustlibraries.grame.fr_libs_<library>.txt pages
+        
+    Returns:
+        Library name -> qualified function names (fi.lowpass, ...)
+    """
+    registry: Dict[str, List[str]] = {}
+    for path in sorted(Path(docs_dir).glob("*_libs_*.txt")):
+        library = path.stem.rsplit("_libs_", 1)[-1]
+        try:
+            text = path.read_text(encoding="utf-8", errors="ignore")
+        except OSError as e:
+            print(f"⚠️ Could not read {path}: {e}")
+            continue
+        functions = {f"{prefix}.{name}" for prefix, name in FAUST_DOC_FUNCTION_PATTERN.findall(text)}
+        if functions:
+            registry[library] = sorted(functions)
+    return registry
+
+
+def load_juce_registry(docs_dir: str = "./juce_documentation") -> Dict[str, List[str]]:
+    """
+    JUCE class names mentioned in the downloaded JUCE documentation
+    
+    Args:
+        docs_dir: Directory of juce_*.txt pages
+        
+    Returns:
+        Page name -> class names (AudioBuffer, dsp::IIR::Filter, ...)
+    """
+    registry: Dict[str, List[str]] = {}
+    for path in sorted(Path(docs_dir).glob("juce_*.txt")):
+        try:
+            text = path.read_text(encoding="utf-8", errors="ignore")
+        except OSError as e:
+            print(f"⚠️ Could not read {path}: {e}")
+            continue
+        classes = set(JUCE_DOC_CLASS_PATTERN.findall(text))
+        if classes:
+            registry[path.stem] = sorted(classes)
+    return registry
+
+
+class RetrievedChunk(NamedTuple):
+    """One Chroma hit, carried with its embedding until the final reranking"""
+    id: str
+    content: str
+    metadata: Optional[Dict]
+    distance: float
+    embedding: Optional[Sequence[float]]
+
+
+def fuse_ranked_results(ranked_lists: Sequence[Sequence[RetrievedChunk]],
+                        weights: Sequence[float]) -> List[Tuple[RetrievedChunk, float]]:
+    """
+    Merge per-query Chroma hits by weighted similarity (CombSUM)
+    
+    Args:
+        ranked_lists: Hits of each query embedding
+        weights: Weight of each query's similarity, 1/(1 + distance)
+        
+    Returns:
+        (chunk, fused score) per distinct chunk id, best first
+    """
+    fused: Dict[str, List] = {}
+    for hits, weight in zip(ranked_lists, weights):
+        for chunk in hits:
+            score = weight / (1.0 + max(float(chunk.distance), 0.0))
+            if chunk.id in fused:
+                fused[chunk.id][1] += score
+            else:
+                fused[chunk.id] = [chunk, score]
+    # Stable sort: ties keep the query's own order first
+    return [tuple(entry) for entry in sorted(fused.values(), key=lambda entry: -entry[1])]
+
+
+def _result_column(results: Dict, key: str, index: int, size: int) -> Sequence:
+    """Column ``key`` of query ``index`` in a Chroma result (Nones when not included)"""
+    column = results.get(key)
+    # Compared with None: recent Chroma versions return embeddings as NumPy arrays
+    if column is None or len(column) <= index or column[index] is None:
+        return [None] * size
+    return column[index]
+
+
+def _result_chunks(results: Dict, index: Optional[int] = None) -> List[RetrievedChunk]:
+    """Chunks of a Chroma ``query`` result (per query ``index``) or ``get`` result (index None)"""
+    if index is None:
+        results = {key: [value] if value is not None else None for key, value in results.items()}
+        index = 0
+    ids = results["ids"][index]
+    documents = _result_column(results, "documents", index, len(ids))
+    metadatas = _result_column(results, "metadatas", index, len(ids))
+    distances = _result_column(results, "distances", index, len(ids))
+    embeddings = _result_column(results, "embeddings", index, len(ids))
+    return [
+        RetrievedChunk(doc_id, documents[i] or "", metadatas[i],
+                       distances[i] if distances[i] is not None else 0.0, embeddings[i])
+        for i, doc_id in enumerate(ids)
+    ]
 
 
 class ContextEnhancer:
     """Enhanced context retrieval for FAUST/JUCE development"""
     
-    def __init__(self, vectorstore: Chroma):
+    def __init__(self,
+                 vectorstore: "Chroma",
+                 routing_engine: Optional[RoutingEngine] = None,
+                 index_generation: Optional[IndexGeneration] = None,
+                 lexical_index: Optional[LexicalIndex] = None,
+                 mmr_lambda: float = 0.5):
+        """
+        Args:
+            vectorstore: ChromaDB vectorstore to search
+            routing_engine: Shared RoutingEngine for query analysis
+            index_generation: Counter bumped on every index change; without it
+                expansion term hits are searched live on every call
+            lexical_index: BM25 index over the same chunks, fused with the
+                vector results (vector search only when None)
+            mmr_lambda: Relevance/diversity trade-off of the final reranking
+                (1.0 = relevance only)
+        """
         self.vectorstore = vectorstore
+        self.routing_engine = routing_engine or get_routing_engine()
+        self.index_generation = index_generation
+        self.lexical_index = lexical_index
+        self.mmr_lambda = mmr_lambda
+        self._lexical_executor = (
+            ThreadPoolExecutor(max_workers=2, thread_name_prefix="glm-lexical") if lexical_index is not None else None
+        )
         self.patterns = CONTEXT_ENHANCEMENT_PATTERNS
         self.templates = DSP_ALGORITHM_TEMPLATES
         
@@ -23,6 +186,17 @@ class ContextEnhancer:
         # JUCE class hierarchy mapping
         self.juce_hierarchy = self._build_juce_hierarchy()
         
+        # Every registry term is found in one pass over the query
+        self._registry = self._build_registry_automaton()
+        self._registry_scan: Tuple[Optional[str], Dict[str, List[str]]] = (None, {})
+        self._registry_lock = threading.Lock()
+        
+        # Expansion term embeddings never change, so they're embedded once;
+        # their hits only change with the index: (term, k) -> (generation, hits)
+        self._term_vectors: Dict[str, List[float]] = {}
+        self._term_hits: Dict[Tuple[str, int], Tuple[int, List[RetrievedChunk]]] = {}
+        self._term_lock = threading.Lock()
+        
     def _build_faust_function_registry(self) -> Dict[str, List[str]]:
         """Build registry of FAUST library functions"""
         return {
@@ -87,10 +261,71 @@ class ContextEnhancer:
             ]
         }
     
+    def _build_registry_automaton(self) -> KeywordAutomaton:
+        """Automaton over the FAUST functions, library prefixes and JUCE classes"""
+        automaton = KeywordAutomaton()
+        # FAUST names are matched case-sensitively, JUCE class names in any case
+        for functions in self.faust_functions.values():
+            for func in functions:
+                automaton.add("faust_functions", func, case_sensitive=True)
+        for prefix in FAUST_LIBRARY_PREFIXES:
+            automaton.add("library_prefixes", prefix, case_sensitive=True)
+        for classes in self.juce_hierarchy.values():
+            for class_name in classes:
+                automaton.add("juce_classes", class_name)
+        automaton.build()
+        return automaton
+    
+    def load_registries(self,
+                        faust_docs_dir: Optional[str] = "./faust_documentation",
+                        juce_docs_dir: Optional[str] = "./juce_documentation") -> int:
+        """
+        Extend the FAUST function and JUCE class registries from the documentation corpus
+        
+        Args:
+            faust_docs_dir: Downloaded FAUST library reference (skipped when None)
+            juce_docs_dir: Downloaded JUCE documentation (skipped when None)
+            
+        Returns:
+            Number of registry terms after loading
+        """
+        for registry, loaded in (
+            (self.faust_functions, load_faust_registry(faust_docs_dir) if faust_docs_dir else {}),
+            (self.juce_hierarchy, load_juce_registry(juce_docs_dir) if juce_docs_dir else {}),
+        ):
+            known = {term for terms in registry.values() for term in terms}
+            for category, terms in loaded.items():
+                new_terms = [term for term in terms if term not in known]
+                if new_terms:
+                    registry.setdefault(category, []).extend(new_terms)
+                    known.update(new_terms)
+        
+        # Swapped in whole so concurrent scans never see a half-built automaton
+        automaton = self._build_registry_automaton()
+        with self._registry_lock:
+            self._registry = automaton
+            self._registry_scan = (None, {})
+        print(f"📖 Keyword registries: {len(automaton)} FAUST/JUCE terms")
+        return len(automaton)
+    
+    def _scan_registries(self, query: str) -> Dict[str, List[str]]:
+        """Registry terms in ``query``; the extractors of one query share a single scan"""
+        with self._registry_lock:
+            scanned_query, hits = self._registry_scan
+            automaton = self._registry
+        if scanned_query == query:
+            return hits
+        hits = automaton.scan(query)
+        with self._registry_lock:
+            if automaton is self._registry:
+                self._registry_scan = (query, hits)
+        return hits
+    
     def enhance_context_for_query(self, 
                                  query: str, 
                                  task_type: str = "general",
-                                 max_docs: int = 8) -> Dict[str, any]:
+                                 max_docs: int = 8,
+                                 retrieval: Optional[RetrievalContext] = None) -> Dict[str, any]:
         """
         Enhance context retrieval based on query analysis and task type
         
@@ -98,6 +333,7 @@ class ContextEnhancer:
             query: User query to analyze
             task_type: Type of task (faust, juce, cpp, general)
             max_docs: Maximum number of documents to retrieve
+            retrieval: Precomputed query embedding to search with
             
         Returns:
             Enhanced context dictionary with documents and metadata
@@ -111,20 +347,23 @@ class ContextEnhancer:
             "integration_patterns": []
         }
         
+        # Exact identifier lookup runs while the vector search below does
+        lexical = self._start_lexical_search(query, max_docs * MMR_FETCH_FACTOR)
+        
         # Analyze query for domain-specific patterns
         query_analysis = self._analyze_query(query, task_type)
         context.update(query_analysis)
         
         # Retrieve relevant documents using multiple strategies
         if task_type == "faust":
-            context["documents"] = self._retrieve_faust_context(query, max_docs)
+            context["documents"] = self._retrieve_faust_context(query, max_docs, retrieval, lexical)
             context["function_references"] = self._extract_faust_functions(query)
             context["algorithm_templates"] = self._get_relevant_templates(query)
         elif task_type == "juce":
-            context["documents"] = self._retrieve_juce_context(query, max_docs)
+            context["documents"] = self._retrieve_juce_context(query, max_docs, retrieval, lexical)
             context["function_references"] = self._extract_juce_classes(query)
         else:
-            context["documents"] = self._retrieve_general_context(query, max_docs)
+            context["documents"] = self._retrieve_general_context(query, max_docs, retrieval, lexical)
         
         # Add integration patterns if multiple domains detected
         if self._is_multi_domain_query(query):
@@ -157,170 +396,266 @@ class ContextEnhancer:
     
     def _extract_faust_keywords(self, query: str) -> List[str]:
         """Extract FAUST-specific keywords from query"""
-        faust_keywords = []
-        query_lower = query.lower()
+        analysis = self.routing_engine.analyze(query)
         
         # DSP algorithm keywords
-        dsp_terms = [
-            "oscillator", "filter", "reverb", "delay", "echo", "chorus", "flanger",
-            "compressor", "limiter", "distortion", "envelope", "adsr", "lfo",
-            "synthesis", "frequency", "amplitude", "resonance", "cutoff", "feedback"
-        ]
-        
-        for term in dsp_terms:
-            if term in query_lower:
-                faust_keywords.append(term)
+        faust_keywords = list(analysis.keyword_hits.get("dsp", []))
         
         # FAUST-specific syntax
-        syntax_patterns = [
-            r"process\s*=", r"import\([\"']", r"with\s*{", r"library\(", 
-            r"~", r":", r"<:", r":>", r"\|", r",", r"\+"
-        ]
-        
-        for pattern in syntax_patterns:
-            if re.search(pattern, query):
-                faust_keywords.append("faust_syntax")
-                break
+        if analysis.has_faust_syntax:
+            faust_keywords.append("faust_syntax")
         
         return faust_keywords
     
     def _extract_juce_keywords(self, query: str) -> List[str]:
         """Extract JUCE-specific keywords from query"""
-        juce_keywords = []
-        query_lower = query.lower()
-        
         # JUCE class names
-        for category, classes in self.juce_hierarchy.items():
-            for class_name in classes:
-                if class_name.lower() in query_lower:
-                    juce_keywords.append(class_name)
+        juce_keywords = list(self._scan_registries(query)["juce_classes"])
         
         # Plugin-specific terms
-        plugin_terms = ["vst", "au", "aax", "plugin", "processor", "component"]
-        for term in plugin_terms:
-            if term in query_lower:
-                juce_keywords.append(term)
+        juce_keywords.extend(self.routing_engine.analyze(query).keyword_hits.get("plugin", []))
         
         return juce_keywords
     
     def _extract_library_references(self, query: str) -> List[str]:
         """Extract FAUST library function references"""
-        references = []
-        
-        # Look for library prefixes
-        lib_patterns = [
-            r"os\.", r"fi\.", r"re\.", r"de\.", r"en\.", r"ef\.", r"co\.",
-            r"ma\.", r"ba\.", r"no\.", r"sy\.", r"ve\."
-        ]
-        
-        for pattern in lib_patterns:
-            matches = re.findall(pattern, query)
-            references.extend(matches)
-        
-        # Look for specific function names
-        for category, functions in self.faust_functions.items():
-            for func in functions:
-                if func in query:
-                    references.append(func)
-        
-        return list(set(references))  # Remove duplicates
+        hits = self._scan_registries(query)
+        # Library prefixes, then specific function names
+        return list(set(hits["library_prefixes"] + hits["faust_functions"]))
     
     def _extract_technical_terms(self, query: str) -> List[str]:
         """Extract general technical terms"""
-        technical_terms = []
-        query_lower = query.lower()
-        
-        # Audio processing terms
-        audio_terms = [
-            "sample rate", "buffer size", "latency", "real-time", "dsp",
-            "signal processing", "frequency domain", "time domain", "fft",
-            "convolution", "filtering", "modulation", "synthesis", "analysis"
-        ]
-        
-        for term in audio_terms:
-            if term in query_lower:
-                technical_terms.append(term)
-        
-        # Programming terms
-        prog_terms = [
-            "class", "function", "method", "template", "algorithm", "optimization",
-            "performance", "memory", "threading", "concurrency", "simd"
-        ]
+        keyword_hits = self.routing_engine.analyze(query).keyword_hits
         
-        for term in prog_terms:
-            if term in query_lower:
-                technical_terms.append(term)
-        
-        return technical_terms
+        # Audio processing terms, then programming terms
+        return keyword_hits.get("audio", []) + keyword_hits.get("programming", [])
     
     def _estimate_complexity(self, query: str) -> int:
         """Estimate query complexity on 1-10 scale"""
-        complexity = 1
-        query_lower = query.lower()
-        
-        complexity_indicators = {
-            r'simple|basic|quick|easy': 2,
-            r'example|demo|tutorial': 3,
-            r'implement|create|build': 5,
-            r'complex|advanced|sophisticated': 7,
-            r'complete|full|entire|comprehensive': 8,
-            r'system|framework|architecture|engine': 9,
-            r'from scratch|ground up|production|enterprise': 10
-        }
-        
-        for pattern, score in complexity_indicators.items():
-            if re.search(pattern, query_lower):
-                complexity = max(complexity, score)
-        
-        return min(10, complexity)
+        return self.routing_engine.analyze(query).task_complexity
+    
+    def _similarity_search(self, text: str, k: int) -> List:
+        """Search by vector, embedding each text at most once per request"""
+        request = current_request()
+        embeddings = getattr(self.vectorstore, "embeddings", None)
+        if embeddings is None:
+            with request.trace.span("chroma_query", k=k):
+                return self.vectorstore.similarity_search(text, k=k)
+        embedding = request.embed_query(text, embeddings.embed_query)
+        with request.trace.span("chroma_query", k=k):
+            return self.vectorstore.similarity_search_by_vector(embedding, k=k)
+    
+    def _search_query(self, query: str, k: int, retrieval: Optional[RetrievalContext]) -> List:
+        """Search for the user query itself, reusing the request's retrieval context"""
+        if retrieval is not None:
+            return retrieval.search(self.vectorstore, k)
+        return self._similarity_search(query, k)
     
-    def _retrieve_faust_context(self, query: str, max_docs: int) -> List:
+    def _retrieve_faust_context(self,
+                                query: str,
+                                max_docs: int,
+                                retrieval: Optional[RetrievalContext] = None,
+                                lexical: Optional[Future] = None) -> List:
         """Retrieve FAUST-specific context documents"""
-        # Build enhanced search query
-        search_terms = []
-        
-        # Add original query
-        search_terms.append(query)
-        
-        # Add FAUST-specific terms
-        faust_terms = ["faust", "dsp", "signal processing", "audio effect"]
-        search_terms.extend(faust_terms)
+        return self._retrieve_expanded(query, FAUST_EXPANSION_TERMS, max_docs, retrieval, lexical)
+    
+    def _retrieve_juce_context(self,
+                               query: str,
+                               max_docs: int,
+                               retrieval: Optional[RetrievalContext] = None,
+                               lexical: Optional[Future] = None) -> List:
+        """Retrieve JUCE-specific context documents"""
+        return self._retrieve_expanded(query, JUCE_EXPANSION_TERMS, max_docs, retrieval, lexical)
+    
+    def _retrieve_general_context(self,
+                                  query: str,
+                                  max_docs: int,
+                                  retrieval: Optional[RetrievalContext] = None,
+                                  lexical: Optional[Future] = None) -> List:
+        """Retrieve general programming context"""
+        return self._retrieve_expanded(query, (), max_docs, retrieval, lexical)
+    
+    def _retrieve_expanded(self,
+                           query: str,
+                           terms: Sequence[str],
+                           max_docs: int,
+                           retrieval: Optional[RetrievalContext] = None,
+                           lexical: Optional[Future] = None) -> List:
+        """
+        Documents for the query plus domain expansion terms
         
-        # Retrieve documents using semantic similarity
-        all_docs = []
-        for term in search_terms:
+        Candidates from the vector search (and the BM25 search, when one is
+        running) are fused, then reranked for diversity down to ``max_docs``.
+        """
+        collection = getattr(self.vectorstore, "_collection", None)
+        embeddings = getattr(self.vectorstore, "embeddings", None)
+        if collection is not None and hasattr(embeddings, "embed_documents"):
             try:
-                docs = self.vectorstore.similarity_search(term, k=max_docs//len(search_terms)+1)
-                all_docs.extend(docs)
+                fetch_k = max_docs * MMR_FETCH_FACTOR
+                ranked = self._batched_search(collection, embeddings, query, terms, fetch_k, retrieval)
+                if lexical is not None:
+                    ranked = self._fuse_lexical(collection, ranked, lexical)
+                return [
+                    self._to_document(chunk.content, chunk.metadata)
+                    for chunk in self._diversify(ranked, max_docs)
+                ]
             except Exception as e:
-                print(f"Context retrieval error for '{term}': {e}")
-        
-        # Remove duplicates and limit results
-        seen_content = set()
-        unique_docs = []
-        for doc in all_docs:
-            if doc.page_content not in seen_content:
-                seen_content.add(doc.page_content)
-                unique_docs.append(doc)
-                if len(unique_docs) >= max_docs:
-                    break
+                print(f"⚠️ Batched context retrieval failed ({e}), searching term by term")
+        if lexical is not None:
+            lexical.cancel()
+        return self._sequential_search(query, terms, max_docs, retrieval)
+    
+    def _term_embeddings(self, terms: Sequence[str], embeddings) -> List[List[float]]:
+        """Embeddings of the fixed expansion terms, computed once per enhancer in one batch"""
+        with self._term_lock:
+            missing = [term for term in terms if term not in self._term_vectors]
+            if missing:
+                with current_request().trace.span("embed_terms", terms=len(missing)):
+                    vectors = embeddings.embed_documents(missing)
+                self._term_vectors.update(zip(missing, vectors))
+            return [self._term_vectors[term] for term in terms]
+    
+    def _cached_term_hits(self, terms: Sequence[str], k: int) -> Tuple[Optional[int], Dict[str, List[RetrievedChunk]]]:
+        """Hits of the expansion terms still valid for the current index generation"""
+        if self.index_generation is None:
+            return None, {}
+        generation = self.index_generation.value
+        with self._term_lock:
+            cached = {}
+            for term in terms:
+                entry = self._term_hits.get((term, k))
+                if entry is not None and entry[0] == generation:
+                    cached[term] = entry[1]
+            return generation, cached
+    
+    def _batched_search(self,
+                        collection,
+                        embeddings,
+                        query: str,
+                        terms: Sequence[str],
+                        k: int,
+                        retrieval: Optional[RetrievalContext]) -> List[Tuple[RetrievedChunk, float]]:
+        """
+        One Chroma query for the query and any uncached terms
         
-        return unique_docs
+        Returns:
+            (chunk, fused score) candidates, best first
+        """
+        request = current_request()
+        if retrieval is not None:
+            query_embedding = retrieval.embedding
+        else:
+            query_embedding = request.embed_query(query, embeddings.embed_query)
+        
+        # Read before searching: hits stored under it expire if the index changes meanwhile
+        generation, term_hits = self._cached_term_hits(terms, k)
+        live_terms = [term for term in terms if term not in term_hits]
+        query_embeddings = [query_embedding] + self._term_embeddings(live_terms, embeddings)
+        
+        with request.trace.span("chroma_query", k=k, queries=len(query_embeddings),
+                                cached_terms=len(term_hits)):
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=k,
+                include=["documents", "metadatas", "distances", "embeddings"],
+            )
+        ranked_lists = [_result_chunks(results, i) for i in range(len(query_embeddings))]
+        
+        if live_terms and generation is not None:
+            with self._term_lock:
+                for term, hits in zip(live_terms, ranked_lists[1:]):
+                    self._term_hits[(term, k)] = (generation, hits)
+        term_hits.update(zip(live_terms, ranked_lists[1:]))
+        
+        # The query's own hits seed the request's retrieval context for the basic fallback
+        if retrieval is not None:
+            retrieval.prime([self._to_document(chunk.content, chunk.metadata) for chunk in ranked_lists[0]], k)
+        
+        weights = [1.0] + [EXPANSION_WEIGHT / len(terms)] * len(terms)
+        return fuse_ranked_results([ranked_lists[0]] + [term_hits[term] for term in terms], weights)
     
-    def _retrieve_juce_context(self, query: str, max_docs: int) -> List:
-        """Retrieve JUCE-specific context documents"""
-        # Build JUCE-focused search
-        search_terms = [query, "juce", "audio processor", "plugin development"]
+    def _diversify(self, ranked: List[Tuple[RetrievedChunk, float]], max_docs: int) -> List[RetrievedChunk]:
+        """Maximal marginal relevance over the fused candidates"""
+        if len(ranked) <= 1 or any(chunk.embedding is None for chunk, _ in ranked):
+            return [chunk for chunk, _ in ranked[:max_docs]]
+        # Fused scores scaled to [0, 1] so they weigh like cosine similarities
+        top_score = max(score for _, score in ranked) or 1.0
+        with current_request().trace.span("mmr", candidates=len(ranked), k=max_docs):
+            selected = mmr_select(
+                [score / top_score for _, score in ranked],
+                [chunk.embedding for chunk, _ in ranked],
+                max_docs,
+                self.mmr_lambda,
+            )
+        return [ranked[index][0] for index in selected]
+    
+    @staticmethod
+    def _to_document(content: str, metadata: Optional[Dict]):
+        from langchain.schema import Document
+        # Copied: cached term hits share their metadata across requests
+        return Document(page_content=content or "", metadata=dict(metadata or {}))
+    
+    def _start_lexical_search(self, query: str, k: int) -> Optional[Future]:
+        """BM25 search on a worker thread (None without a lexical index)"""
+        if self._lexical_executor is None or not len(self.lexical_index):
+            return None
+        return self._lexical_executor.submit(contextvars.copy_context().run, self._lexical_search, query, k)
+    
+    def _lexical_search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        with current_request().trace.span("lexical_search", k=k):
+            return self.lexical_index.search(query, k)
+    
+    def _fuse_lexical(self,
+                      collection,
+                      ranked: List[Tuple[RetrievedChunk, float]],
+                      lexical: Future) -> List[Tuple[RetrievedChunk, float]]:
+        """Merge vector and BM25 candidates with reciprocal rank fusion"""
+        try:
+            hits = lexical.result()
+            chunks = {chunk.id: chunk for chunk, _ in ranked}
+            missing = [doc_id for doc_id, _ in hits if doc_id not in chunks]
+            if missing:
+                with current_request().trace.span("chroma_get", ids=len(missing)):
+                    found = collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+                chunks.update((chunk.id, chunk) for chunk in _result_chunks(found))
+        except Exception as e:
+            print(f"⚠️ Lexical retrieval failed: {e}")
+            return ranked
+        
+        fused = reciprocal_rank_fusion([
+            [chunk.id for chunk, _ in ranked],
+            [doc_id for doc_id, _ in hits if doc_id in chunks],
+        ])
+        return [(chunks[doc_id], score) for doc_id, score in fused]
+    
+    def _sequential_search(self,
+                           query: str,
+                           terms: Sequence[str],
+                           max_docs: int,
+                           retrieval: Optional[RetrievalContext] = None) -> List:
+        """One similarity search per term (vectorstores without a Chroma collection)"""
+        if not terms:
+            try:
+                return self._search_query(query, max_docs, retrieval)
+            except Exception as e:
+                print(f"General context retrieval error: {e}")
+                return []
+        
+        search_terms = [query] + list(terms)
         
         all_docs = []
         for term in search_terms:
             try:
-                docs = self.vectorstore.similarity_search(term, k=max_docs//len(search_terms)+1)
+                k = max_docs//len(search_terms)+1
+                if term == query:
+                    docs = self._search_query(query, k, retrieval)
+                else:
+                    docs = self._similarity_search(term, k=k)
                 all_docs.extend(docs)
             except Exception as e:
-                print(f"JUCE context retrieval error for '{term}': {e}")
+                print(f"Context retrieval error for '{term}': {e}")
         
-        # Remove duplicates
+        # Without embeddings there is nothing to rerank by; drop exact duplicates
         seen_content = set()
         unique_docs = []
         for doc in all_docs:
@@ -332,36 +667,13 @@ class ContextEnhancer:
         
         return unique_docs
     
-    def _retrieve_general_context(self, query: str, max_docs: int) -> List:
-        """Retrieve general programming context"""
-        try:
-            return self.vectorstore.similarity_search(query, k=max_docs)
-        except Exception as e:
-            print(f"General context retrieval error: {e}")
-            return []
-    
     def _extract_faust_functions(self, query: str) -> List[str]:
         """Extract FAUST function references from query"""
-        functions = []
-        
-        for category, func_list in self.faust_functions.items():
-            for func in func_list:
-                if func in query:
-                    functions.append(func)
-        
-        return functions
+        return list(self._scan_registries(query)["faust_functions"])
     
     def _extract_juce_classes(self, query: str) -> List[str]:
         """Extract JUCE class references from query"""
-        classes = []
-        query_lower = query.lower()
-        
-        for category, class_list in self.juce_hierarchy.items():
-            for class_name in class_list:
-                if class_name.lower() in query_lower:
-                    classes.append(class_name)
-        
-        return classes
+        return list(self._scan_registries(query)["juce_classes"])
     
     def _get_relevant_templates(self, query: str) -> List[str]:
         """Get relevant DSP algorithm templates"""
@@ -390,7 +702,7 @@ class ContextEnhancer:
     
     def _get_integration_patterns(self, query: str) -> List[str]:
         """Get relevant integration patterns"""
-        from prompts import JUCE_INTEGRATION_PATTERNS, INTEGRATION_EXAMPLES
+        from .prompts import JUCE_INTEGRATION_PATTERNS, INTEGRATION_EXAMPLES
         
         patterns = []
         query_lower = query.lower()
@@ -427,9 +739,12 @@ class ContextEnhancer:
 
 
 # Integration with MultiModelGLMSystem
-def enhance_vectorstore_retrieval(vectorstore: Chroma, 
+def enhance_vectorstore_retrieval(vectorstore: "Chroma", 
                                  query: str, 
-                                 task_type: str = "general") -> str:
+                                 task_type: str = "general",
+                                 routing_engine: Optional[RoutingEngine] = None,
+                                 retrieval: Optional[RetrievalContext] = None,
+                                 enhancer: Optional[ContextEnhancer] = None) -> str:
     """
     Enhanced vectorstore retrieval function for use in MultiModelGLMSystem
     
@@ -437,12 +752,16 @@ def enhance_vectorstore_retrieval(vectorstore: Chroma,
         vectorstore: ChromaDB vectorstore instance
         query: User query
         task_type: Type of task (faust, juce, general)
+        routing_engine: Shared RoutingEngine so the prompt is only scanned once
+        retrieval: Query embedding computed once for the request
+        enhancer: Long-lived enhancer to reuse (keeps its term caches and lexical index)
     
     Returns:
         Enhanced context string
     """
-    enhancer = ContextEnhancer(vectorstore)
-    context = enhancer.enhance_context_for_query(query, task_type)
+    if enhancer is None:
+        enhancer = ContextEnhancer(vectorstore, routing_engine=routing_engine)
+    context = enhancer.enhance_context_for_query(query, task_type, retrieval=retrieval)
     
     # Build enhanced context string
     context_parts = []
@@ -0,0 +1,203 @@
+"""
+Conversation Memory
+Rolling summary of each project/model chat, folded forward by the fast
+model after every exchange, so prompts carry the whole conversation as
+a summary plus the last few verbatim turns
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+SUMMARY_PROMPT_TEMPLATE = """You maintain the running summary of a long technical conversation between a developer and an AI coding assistant.
+
+=== SUMMARY SO FAR ===
+{summary}
+
+=== NEW EXCHANGES ===
+{turns}
+
+=== INSTRUCTIONS ===
+Rewrite the summary so it also covers the new exchanges. Keep decisions, requirements, constraints,
+names of files/functions/parameters and open questions; drop pleasantries and code that was superseded.
+Use short bullet points, at most {max_words} words. Reply with the updated summary only."""
+
+
+def turn_fingerprint(question: str, answer: str) -> str:
+    """Stable id of a chat exchange"""
+    return hashlib.sha1(f"{question}\0{answer}".encode("utf-8")).hexdigest()[:16]
+
+
+class ConversationMemory:
+    """Incrementally summarized chat histories, persisted next to the chat files
+
+    ``<model>_summary.json`` covers the chat file's exchanges up to its
+    ``last_turn``; after every saved exchange the turns that have left the
+    verbatim window are folded into it on a background thread. Prompts
+    find the summary by that fingerprint, so the lookup works with any
+    copy of the history (UI state, chat file) that contains it.
+    """
+
+    def __init__(self,
+                 project_manager,
+                 generate: Callable[[str], str],
+                 verbatim_turns: int = 3,
+                 max_fold_turns: int = 12,
+                 max_turn_chars: int = 2000,
+                 max_summary_words: int = 400):
+        """
+        Args:
+            project_manager: ProjectManager owning the chat files
+            generate: Runs a summary prompt on the fast model and returns its text
+            verbatim_turns: Newest exchanges kept out of the summary and sent as-is
+            max_fold_turns: Exchanges folded into the summary per model call
+            max_turn_chars: Question/answer characters shown to the summarizer
+            max_summary_words: Target length of the summary
+        """
+        self.project_manager = project_manager
+        self.generate = generate
+        self.verbatim_turns = max(1, verbatim_turns)
+        self.max_fold_turns = max(1, max_fold_turns)
+        self.max_turn_chars = max_turn_chars
+        self.max_summary_words = max_summary_words
+        # One worker: updates of the same summary never overlap and run in save order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="glm-memory")
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def summary_path(self, project_name: str, model_name: str) -> Path:
+        chat_file = self.project_manager.chat_file_path(project_name, model_name)
+        return chat_file.with_name(chat_file.name.replace("_chat.json", "_summary.json"))
+
+    @staticmethod
+    def _read(path: Path) -> Optional[Dict]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, project_name: str, model_name: str) -> Dict:
+        """Summary record of a chat (empty when none has been written)"""
+        record = self._read(self.summary_path(project_name, model_name))
+        return record or {"summary": "", "last_turn": None, "summarized_turns": 0}
+
+    def _save(self, path: Path, record: Dict):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    # Prompt side
+    # ------------------------------------------------------------------
+
+    def prompt_history(self,
+                       project_name: str,
+                       chat_history: List[Tuple[str, str]],
+                       max_verbatim: int = 5) -> Tuple[str, List[Tuple[str, str]]]:
+        """
+        Summary and verbatim turns to send for a chat history
+
+        Args:
+            project_name: Project whose summaries to search
+            chat_history: Conversation so far, oldest first
+            max_verbatim: Most exchanges sent verbatim
+
+        Returns:
+            (summary or "", exchanges after the summarized part, oldest first)
+        """
+        chat_history = [tuple(turn) for turn in chat_history or []]
+        if not chat_history:
+            return "", []
+
+        positions = {turn_fingerprint(q, a): i for i, (q, a) in enumerate(chat_history)}
+        project_path = self.project_manager.projects_dir / project_name
+        best: Tuple[int, str] = (-1, "")
+        for path in project_path.glob("*_summary.json"):
+            record = self._read(path) or {}
+            position = positions.get(record.get("last_turn"))
+            if position is not None and record.get("summary") and position > best[0]:
+                best = (position, record["summary"])
+
+        position, summary = best
+        return summary, chat_history[position + 1:][-max_verbatim:]
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def schedule_update(self, project_name: str, model_name: str) -> Future:
+        """Fold the chat's new exchanges into its summary in the background"""
+        return self._executor.submit(self._update_logged, project_name, model_name)
+
+    def _update_logged(self, project_name: str, model_name: str) -> Optional[Dict]:
+        try:
+            return self.update(project_name, model_name)
+        except Exception as e:
+            print(f"⚠️ Conversation summary update failed for {model_name} in {project_name}: {e}")
+            return None
+
+    def update(self, project_name: str, model_name: str) -> Dict:
+        """Fold every exchange that left the verbatim window into the summary
+
+        Returns:
+            The stored summary record
+        """
+        chats = self.project_manager.load_project_chats(project_name, model_name)
+        path = self.summary_path(project_name, model_name)
+        record = self.load(project_name, model_name)
+
+        # Resume after the last summarized exchange (from the start if it's gone)
+        fingerprints = [turn_fingerprint(q, a) for q, a in chats]
+        start = 0
+        if record.get("last_turn") in fingerprints:
+            start = len(fingerprints) - fingerprints[::-1].index(record["last_turn"])
+        pending = chats[start:len(chats) - self.verbatim_turns]
+        if not pending:
+            return record
+
+        for offset in range(0, len(pending), self.max_fold_turns):
+            batch = pending[offset:offset + self.max_fold_turns]
+            summary = self.generate(self._summary_prompt(record.get("summary", ""), batch)).strip()
+            if not summary:
+                raise ValueError("the summary model returned nothing")
+
+            record = {
+                "summary": summary,
+                "last_turn": turn_fingerprint(*batch[-1]),
+                "summarized_turns": record.get("summarized_turns", 0) + len(batch),
+                "updated": datetime.now().isoformat(),
+            }
+            # Saved per batch so a failure later on keeps the progress
+            with self._lock:
+                self._save(path, record)
+
+        print(f"🧾 Conversation summary for {model_name} in {project_name}: {record['summarized_turns']} exchange(s)")
+        return record
+
+    def _summary_prompt(self, summary: str, turns: List[Tuple[str, str]]) -> str:
+        def clip(text: str) -> str:
+            return text if len(text) <= self.max_turn_chars else text[:self.max_turn_chars] + "..."
+
+        exchanges = "\n\n".join(
+            f"Developer: {clip(question)}\nAssistant: {clip(answer)}" for question, answer in turns
+        )
+        return SUMMARY_PROMPT_TEMPLATE.format(
+            summary=summary or "(nothing yet)",
+            turns=exchanges,
+            max_words=self.max_summary_words,
+        )
+
+    def wait(self):
+        """Block until queued updates have run (tests, shutdown)"""
+        self._executor.submit(lambda: None).result()
@@ -0,0 +1,176 @@
+"""
+Conversation Sessions for Ollama's Chat Endpoint
+Keeps each project/model conversation as a stable message list so Ollama
+can reuse its prompt KV cache and only prefill the newest turn
+"""
+
+import json
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from .deadlines import Deadline, GenerationTimeout
+
+
+class ConversationSession:
+    """Messages exactly as previously sent, behind a frozen system prefix
+
+    The system message (system prompt + project context snapshot) never
+    changes during a session and earlier turns are replayed byte for byte,
+    so every request shares its prefix with the one before it. Volatile
+    content such as retrieved documents only appears in the newest user
+    message.
+    """
+
+    def __init__(self, system_content: str):
+        self.system_content = system_content
+        self.turns: List[Tuple[str, str]] = []  # (question, answer) as in the UI history
+        self.dropped = 0  # oldest UI history turns removed by compact()
+        self._turn_messages: List[Tuple[Dict, Dict]] = []  # (user, assistant) as sent
+
+    @classmethod
+    def from_history(cls, system_content: str, chat_history: List[Tuple[str, str]]) -> "ConversationSession":
+        """Seed a session from an existing chat (plain question/answer turns)"""
+        session = cls(system_content)
+        for question, answer in chat_history:
+            session.add_turn(question, question, answer)
+        return session
+
+    def follows(self, chat_history: List[Tuple[str, str]]) -> bool:
+        """Whether ``chat_history`` is exactly the conversation this session has seen
+
+        The UI keeps its full history, so turns dropped by compact() are
+        skipped before comparing.
+        """
+        history = [tuple(turn) for turn in chat_history or []]
+        return len(history) == self.dropped + len(self.turns) and history[self.dropped:] == self.turns
+
+    def messages(self, user_content: Optional[str] = None) -> List[Dict]:
+        """Messages to send, optionally with a new user turn appended"""
+        messages = [{"role": "system", "content": self.system_content}]
+        for user, assistant in self._turn_messages:
+            messages.extend([user, assistant])
+        if user_content is not None:
+            messages.append({"role": "user", "content": user_content})
+        return messages
+
+    def add_turn(self, question: str, user_content: str, answer: str):
+        self.turns.append((question, answer))
+        self._turn_messages.append((
+            {"role": "user", "content": user_content},
+            {"role": "assistant", "content": answer},
+        ))
+
+    def token_count(self, count_tokens: Callable[[str], int]) -> int:
+        return sum(count_tokens(message["content"]) + 4 for message in self.messages())
+
+    def compact(self, max_tokens: int, count_tokens: Callable[[str], int]) -> int:
+        """Drop the oldest turns until the session fits ``max_tokens``
+
+        Each compaction invalidates Ollama's cached prefix once, so callers
+        should compact well below the limit rather than one turn at a time.
+
+        Returns:
+            Number of turns dropped
+        """
+        dropped = 0
+        while self._turn_messages and self.token_count(count_tokens) > max_tokens:
+            self._turn_messages.pop(0)
+            self.turns.pop(0)
+            dropped += 1
+        self.dropped += dropped
+        return dropped
+
+
+class ConversationSessionStore:
+    """Sessions keyed by (caller session, project, model)"""
+
+    def __init__(self):
+        self._sessions: Dict[Tuple[str, str, str], ConversationSession] = {}
+        self._lock = threading.Lock()
+
+    def get(self,
+            project_name: str,
+            model_name: str,
+            chat_history: List[Tuple[str, str]],
+            system_content_factory: Callable[[], str],
+            session_id: str = "default") -> ConversationSession:
+        """Session continuing ``chat_history``; a new one if the history diverged"""
+        key = (session_id, project_name, model_name)
+        with self._lock:
+            session = self._sessions.get(key)
+        if session is not None and session.follows(chat_history):
+            return session
+
+        session = ConversationSession.from_history(system_content_factory(), chat_history or [])
+        with self._lock:
+            self._sessions[key] = session
+        return session
+
+    def reset(self, project_name: Optional[str] = None):
+        """Forget sessions (all, or those of one project)"""
+        with self._lock:
+            if project_name is None:
+                self._sessions.clear()
+            else:
+                for key in [key for key in self._sessions if key[1] == project_name]:
+                    del self._sessions[key]
+
+
+class OllamaChatClient:
+    """Minimal streaming client for Ollama's /api/chat"""
+
+    def __init__(self, base_url: str = "http://localhost:11434", timeout: float = 600):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def stream_chat(self,
+                    model_id: str,
+                    messages: List[Dict],
+                    options: Optional[Dict] = None,
+                    keep_alive: Optional[str] = None,
+                    stats: Optional[Dict] = None,
+                    deadline: Optional[Deadline] = None) -> Iterator[str]:
+        """
+        Yield response text chunks; token counters are written to ``stats``
+
+        Raises:
+            GenerationTimeout: When ``deadline`` expires first; the connection
+                is closed, which stops the generation in Ollama
+        """
+        payload = {"model": model_id, "messages": messages, "stream": True, "options": options or {}}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+
+        read_timeout = self.timeout if deadline is None else max(0.1, min(self.timeout, deadline.remaining()))
+        try:
+            yield from self._stream_lines(payload, read_timeout, stats, deadline)
+        except requests.exceptions.RequestException:
+            if deadline is not None and deadline.expired:
+                raise GenerationTimeout(model_id, deadline) from None
+            raise
+
+    def _stream_lines(self, payload: Dict, read_timeout: float, stats: Optional[Dict],
+                      deadline: Optional[Deadline]) -> Iterator[str]:
+        with requests.post(
+            f"{self.base_url}/api/chat", json=payload, stream=True, timeout=(10, read_timeout)
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if deadline is not None and deadline.expired:
+                    raise GenerationTimeout(payload["model"], deadline)
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(data["error"])
+                content = data.get("message", {}).get("content", "")
+                if content:
+                    yield content
+                if data.get("done") and stats is not None:
+                    stats.update({
+                        "prompt_eval_count": data.get("prompt_eval_count", 0),
+                        "eval_count": data.get("eval_count", 0),
+                        "prompt_eval_duration_ms": data.get("prompt_eval_duration", 0) / 1e6,
+                    })
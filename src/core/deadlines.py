@@ -0,0 +1,81 @@
+"""
+Deadlines for model generations
+Request and HRM subtask time limits, and the timeout raised when a
+generation is cancelled for running past them
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class Deadline:
+    """Point in time (monotonic clock) by which some work must finish"""
+
+    def __init__(self, seconds: float, label: str = "request"):
+        """
+        Args:
+            seconds: Time allowed from now
+            label: What the deadline limits ("request", "subtask", "retry")
+        """
+        self.seconds = seconds
+        self.label = label
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    @staticmethod
+    def earliest(*deadlines: Optional["Deadline"]) -> Optional["Deadline"]:
+        """The deadline expiring first (None when none is set)"""
+        active = [deadline for deadline in deadlines if deadline is not None]
+        return min(active, key=lambda deadline: deadline.expires_at) if active else None
+
+    def __repr__(self) -> str:
+        return f"Deadline({self.label}, {self.remaining():.1f}s left of {self.seconds:.0f}s)"
+
+
+class GenerationTimeout(TimeoutError):
+    """A generation ran past its deadline and was cancelled"""
+
+    def __init__(self, model_name: str, deadline: Deadline, stage: str = "generation"):
+        """
+        Args:
+            model_name: Model the generation ran on
+            deadline: The deadline that expired
+            stage: "queue" (waiting for a scheduler slot) or "generation"
+        """
+        self.model_name = model_name
+        self.deadline = deadline
+        self.stage = stage
+        super().__init__(
+            f"{model_name} exceeded its {deadline.label} deadline of {deadline.seconds:g}s ({stage})"
+        )
+
+
+# Deadline of the enclosing HRM subtask; copied into worker threads and tasks
+_scoped_deadline: ContextVar[Optional[Deadline]] = ContextVar("scoped_deadline", default=None)
+
+
+def scoped_deadline() -> Optional[Deadline]:
+    """Deadline of the innermost deadline_scope, if any"""
+    return _scoped_deadline.get()
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float], label: str = "subtask"):
+    """Limit generations in the enclosed block to ``seconds`` (None: no limit)"""
+    if not seconds:
+        yield None
+        return
+    deadline = Deadline.earliest(Deadline(seconds, label), _scoped_deadline.get())
+    token = _scoped_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _scoped_deadline.reset(token)
@@ -0,0 +1,56 @@
+"""
+Diversity Reranking
+Maximal marginal relevance over retrieved chunks, so overlapping chunks of
+the same page don't crowd the prompt with the same information
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+
+def mmr_select(relevance: Sequence[float],
+               embeddings: Sequence[Sequence[float]],
+               k: int,
+               lambda_mult: float = 0.5) -> List[int]:
+    """
+    Greedy maximal marginal relevance selection
+
+    Each step picks the candidate maximizing
+    ``lambda_mult * relevance - (1 - lambda_mult) * max cosine similarity to
+    the candidates already picked``. The pairwise similarity matrix is
+    computed once up front; negative similarities count as zero, so a chunk
+    pointing away from the picked ones gains nothing over an unrelated one.
+
+    Args:
+        relevance: Relevance of each candidate to the query, higher is better
+        embeddings: Candidate embeddings, one row per candidate
+        k: Number of candidates to select
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    count = min(k, len(relevance))
+    if count <= 0:
+        return []
+
+    relevance = np.asarray(relevance, dtype=np.float32)
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    similarity = np.maximum(vectors @ vectors.T, 0.0)
+
+    first = int(np.argmax(relevance))
+    selected = [first]
+    max_similarity = similarity[first].copy()
+    available = np.ones(len(relevance), dtype=bool)
+    available[first] = False
+    while len(selected) < count:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
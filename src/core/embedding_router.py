@@ -0,0 +1,173 @@
+"""
+Embedding Router
+Classifies prompts by cosine similarity against per-domain prototype
+embeddings built from the routing_patterns domains, using the MiniLM model
+already loaded for retrieval
+"""
+
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class EmbeddingRouter:
+    """Nearest-prototype domain classifier with optional regex blending"""
+
+    def __init__(self,
+                 embeddings,
+                 routing_patterns: Dict[str, Dict],
+                 cache_path: str = "./cache/routing_prototypes.npz",
+                 min_similarity: float = 0.25,
+                 full_similarity: float = 0.6,
+                 regex_weight: float = 0.5):
+        """
+        Args:
+            embeddings: LangChain embeddings (the retrieval MiniLM model)
+            routing_patterns: Domain configs with "patterns" and optional "examples"
+            cache_path: Where prototype embeddings are persisted
+            min_similarity: Cosine similarity that maps to zero confidence
+            full_similarity: Cosine similarity that maps to full confidence
+            regex_weight: Weight of the regex score in blended mode
+        """
+        self.embeddings = embeddings
+        self.cache_path = Path(cache_path)
+        self.min_similarity = min_similarity
+        self.full_similarity = full_similarity
+        self.regex_weight = regex_weight
+
+        self.domains = list(routing_patterns.keys())
+        self.prototype_texts = {
+            domain: self._prototype_texts(domain, config)
+            for domain, config in routing_patterns.items()
+        }
+
+        self._prototypes: Optional[np.ndarray] = None  # (domains, dim), unit rows
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Prototypes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _pattern_to_phrase(pattern: str) -> str:
+        """Turn a routing regex into the plain words it matches"""
+        text = pattern.replace(r"\s+", " ").replace(r"\+", "+")
+        text = re.sub(r"(?<=[a-z])\.(?=[a-z])", " ", text)  # state.variable
+        text = re.sub(r"\(\?:|[()|*?\\^$\[\]]|\.\*", " ", text)
+        return " ".join(text.split())
+
+    @classmethod
+    def _prototype_texts(cls, domain: str, config: Dict) -> List[str]:
+        label = domain.replace("_", " ")
+        texts = [f"{label}: {cls._pattern_to_phrase(pattern)}" for pattern in config.get("patterns", [])]
+        texts.extend(config.get("examples", []))
+        return texts or [label]
+
+    def _fingerprint(self) -> str:
+        model_name = getattr(self.embeddings, "model_name", type(self.embeddings).__name__)
+        material = json.dumps([model_name, self.prototype_texts], sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _load_prototypes(self, fingerprint: str) -> Optional[np.ndarray]:
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                if str(data["fingerprint"]) != fingerprint:
+                    return None
+                if list(data["domains"]) != self.domains:
+                    return None
+                return data["prototypes"]
+        except Exception:
+            return None
+
+    def _save_prototypes(self, prototypes: np.ndarray, fingerprint: str):
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.stem + ".tmp.npz")
+            np.savez(
+                tmp_path,
+                prototypes=prototypes,
+                domains=np.array(self.domains),
+                fingerprint=np.array(fingerprint),
+            )
+            tmp_path.replace(self.cache_path)
+        except Exception as e:
+            print(f"⚠️ Could not persist routing prototypes: {e}")
+
+    def _build_prototypes(self) -> np.ndarray:
+        rows = []
+        for domain in self.domains:
+            vectors = np.asarray(self.embeddings.embed_documents(self.prototype_texts[domain]), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+            centroid = vectors.mean(axis=0)
+            rows.append(centroid / (np.linalg.norm(centroid) + 1e-12))
+        return np.vstack(rows).astype(np.float32)
+
+    @property
+    def prototypes(self) -> np.ndarray:
+        """Prototype matrix, loaded from disk or computed once"""
+        if self._prototypes is None:
+            with self._lock:
+                if self._prototypes is None:
+                    fingerprint = self._fingerprint()
+                    prototypes = self._load_prototypes(fingerprint)
+                    if prototypes is None:
+                        prototypes = self._build_prototypes()
+                        self._save_prototypes(prototypes, fingerprint)
+                        print(f"🧭 Built routing prototypes for {len(self.domains)} domains")
+                    self._prototypes = prototypes
+        return self._prototypes
+
+    # ------------------------------------------------------------------
+    # Classification
+    # ------------------------------------------------------------------
+
+    def similarities(self, query_embedding: Sequence[float]) -> Dict[str, float]:
+        """Cosine similarity of the query to every domain prototype"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) + 1e-12)
+        scores = self.prototypes @ query
+        return dict(zip(self.domains, scores.tolist()))
+
+    def embedding_scores(self, query_embedding: Sequence[float]) -> Dict[str, float]:
+        """Similarities rescaled to 0-1 confidences"""
+        span = max(self.full_similarity - self.min_similarity, 1e-6)
+        return {
+            domain: float(np.clip((similarity - self.min_similarity) / span, 0.0, 1.0))
+            for domain, similarity in self.similarities(query_embedding).items()
+        }
+
+    def route(self,
+              query_embedding: Sequence[float],
+              regex_scores: Optional[Dict[str, float]] = None,
+              mode: str = "blended") -> Tuple[str, float]:
+        """
+        Pick the routing domain for a query
+
+        Args:
+            query_embedding: Embedding of the prompt
+            regex_scores: Regex confidence per domain (used in blended mode)
+            mode: "embedding" or "blended"
+
+        Returns:
+            (domain, confidence); "general" when nothing clears zero
+        """
+        scores = self.embedding_scores(query_embedding)
+        if mode == "blended" and regex_scores is not None:
+            weight = self.regex_weight
+            scores = {
+                domain: weight * regex_scores.get(domain, 0.0) + (1 - weight) * score
+                for domain, score in scores.items()
+            }
+
+        best_domain = "general"
+        best_confidence = 0.0
+        for domain in self.domains:
+            if scores[domain] > best_confidence:
+                best_domain = domain
+                best_confidence = scores[domain]
+        return best_domain, best_confidence
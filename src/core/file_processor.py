@@ -5,11 +5,17 @@ from datetime import datetime
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain.schema import Document
 
+from .index_generation import IndexGeneration
+
 
 class FileProcessor:
-    def __init__(self, vectorstore, text_splitter):
+    def __init__(self, vectorstore, text_splitter, index_generation=None, lexical_index=None):
         self.vectorstore = vectorstore
         self.text_splitter = text_splitter
+        # Bumped after every add so cached retrieval results expire
+        self.index_generation = index_generation or IndexGeneration()
+        # BM25 index kept in step with the vectorstore's chunks
+        self.lexical_index = lexical_index
         self.supported_extensions = [
             ".pdf",
             ".txt",
@@ -31,6 +37,15 @@ class FileProcessor:
 
     def process_file(self, file_path):
         """Process files with enhanced metadata including folder structure"""
+        result = self._process_file(file_path)
+        self._save_lexical_index()
+        return result
+
+    def _save_lexical_index(self):
+        if self.lexical_index is not None:
+            self.lexical_index.save()
+
+    def _process_file(self, file_path):
         file_path = Path(file_path)
         file_ext = file_path.suffix.lower()
 
@@ -96,7 +111,10 @@ class FileProcessor:
 
             # Process and store
             splits = self.text_splitter.split_documents(documents)
-            self.vectorstore.add_documents(splits)
+            ids = self.vectorstore.add_documents(splits)
+            if self.lexical_index is not None:
+                self.lexical_index.add(ids, splits)
+            self.index_generation.bump()
             return f"Processed {len(splits)} chunks from {folder_category}/{file_path.name}"
 
         except Exception as e:
@@ -118,7 +136,7 @@ class FileProcessor:
             ):
                 try:
                     relative_path = file_path.relative_to(uploads_dir)
-                    result = self.process_file(str(file_path))
+                    result = self._process_file(str(file_path))
                     processed_files.append(
                         {
                             "file": str(relative_path),
@@ -146,6 +164,8 @@ class FileProcessor:
                         }
                     )
 
+        self._save_lexical_index()
+
         # Organize results by category
         categories = {}
         for item in processed_files:
@@ -188,13 +208,15 @@ class FileProcessor:
                     manual_count += 1
                     doc_type = "📚 Manual"
 
-                result = self.process_file(str(doc_file))
+                result = self._process_file(str(doc_file))
                 processed_count += 1
                 print(f"✅ {doc_type}: {doc_file.name}")
 
             except Exception as e:
                 print(f"❌ Error processing {doc_file}: {e}")
 
+        self._save_lexical_index()
+
         return f"""🎵 FAUST Documentation Loaded Successfully!
 
 📊 Processed {processed_count} files:
@@ -0,0 +1,31 @@
+"""
+Index Generation Counter
+Version number of the vectorstore's contents, bumped whenever documents
+are added, so results cached against it expire with the index
+"""
+
+import threading
+
+
+class IndexGeneration:
+    """Thread-safe counter of changes to the knowledge base"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        """Current generation"""
+        with self._lock:
+            return self._value
+
+    def bump(self) -> int:
+        """Record a change to the indexed documents
+
+        Returns:
+            The new generation
+        """
+        with self._lock:
+            self._value += 1
+            return self._value
@@ -0,0 +1,122 @@
+"""
+Keyword Automaton
+Aho-Corasick matcher that finds every registered term in one pass over
+the text, however many terms there are, with the same substring
+semantics as ``term in text``
+"""
+
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+
+class KeywordAutomaton:
+    """Multi-pattern substring matcher over grouped terms
+
+    Matching is case-insensitive; terms added with ``case_sensitive=True``
+    are also checked against the original text. Results list each group's
+    matched terms in registration order.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[str, str, bool]] = []  # (group, term, case sensitive)
+        self._seen = set()
+        self._groups: List[str] = []
+        self._built = False
+        self._goto: List[Dict[str, int]] = []
+        self._fail: List[int] = []
+        self._output: List[List[int]] = []
+
+    @classmethod
+    def from_groups(cls, groups: Mapping[str, Iterable[str]], case_sensitive: bool = False) -> "KeywordAutomaton":
+        """Automaton over ``{group: terms}``"""
+        automaton = cls()
+        for group, terms in groups.items():
+            automaton.add_group(group)
+            for term in terms:
+                automaton.add(group, term, case_sensitive)
+        return automaton
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add_group(self, group: str):
+        """Register a group so scans report it even when nothing matched"""
+        if group not in self._groups:
+            self._groups.append(group)
+
+    def add(self, group: str, term: str, case_sensitive: bool = False):
+        """Register ``term`` under ``group`` (duplicates are ignored)"""
+        self.add_group(group)
+        if not term or (group, term) in self._seen:
+            return
+        self._seen.add((group, term))
+        self._entries.append((group, term, case_sensitive))
+        self._built = False
+
+    def build(self):
+        """Compile the trie and failure links (done on the first scan otherwise)"""
+        goto: List[Dict[str, int]] = [{}]
+        output: List[List[int]] = [[]]
+        for index, (_, term, _) in enumerate(self._entries):
+            state = 0
+            for char in term.lower():
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append(index)
+
+        # Breadth-first failure links; each state also reports its suffixes' terms
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fail[next_state] = goto[link].get(char, 0)
+                output[next_state] = output[next_state] + output[fail[next_state]]
+
+        self._goto, self._fail, self._output = goto, fail, output
+        self._built = True
+
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """
+        Every registered term occurring in ``text``
+
+        Returns:
+            Group -> matched terms in registration order (every group present)
+        """
+        if not self._built:
+            self.build()
+        goto, fail, output, entries = self._goto, self._fail, self._output, self._entries
+
+        lowered = text.lower()
+        # Lowercasing a few characters changes their length; positions only line up without them
+        aligned = len(lowered) == len(text)
+        found = set()
+        state = 0
+        for position, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                if index in found:
+                    continue
+                _, term, case_sensitive = entries[index]
+                if case_sensitive:
+                    if aligned:
+                        if text[position + 1 - len(term):position + 1] != term:
+                            continue
+                    elif term not in text:
+                        continue
+                found.add(index)
+
+        hits: Dict[str, List[str]] = {group: [] for group in self._groups}
+        for index in sorted(found):
+            group, term, _ = entries[index]
+            hits[group].append(term)
+        return hits
@@ -0,0 +1,78 @@
+"""
+Lazy Loading Helpers
+Deferred package exports (PEP 562) and components built on first use, so
+importing the app and rendering its shell doesn't load torch, the
+embedding model or Chroma
+"""
+
+import importlib
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """
+    Module ``__getattr__``/``__dir__`` pair re-exporting names on first access
+
+    Args:
+        package: ``__name__`` of the package doing the re-exporting
+        exports: Exported name -> relative module defining it (e.g. ".prompts")
+
+    Returns:
+        (__getattr__, __dir__) to assign at package module level
+    """
+    def __getattr__(name: str):
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        # Cache on the package so later lookups skip __getattr__
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
+
+
+class lazy_component:
+    """Instance attribute built by its method on first access
+
+    Construction happens once per instance even when several threads ask
+    for the component at the same time; later reads are plain attribute
+    lookups. Assigning the attribute directly replaces the component.
+    """
+
+    def __init__(self, factory: Callable):
+        self.factory = factory
+        self.name = factory.__name__
+        self.__doc__ = factory.__doc__
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+
+        # dict.setdefault is atomic, so every thread sees the same lock
+        locks = instance.__dict__.setdefault("_lazy_component_locks", {})
+        lock = locks.setdefault(self.name, threading.Lock())
+        with lock:
+            if self.name not in instance.__dict__:
+                start = time.perf_counter()
+                instance.__dict__[self.name] = self.factory(instance)
+                print(f"⏱️ {self.name} initialized in {time.perf_counter() - start:.2f}s")
+        return instance.__dict__[self.name]
+
+    @staticmethod
+    def loaded(instance, name: str) -> Optional[object]:
+        """The component if it has been built, without building it"""
+        return instance.__dict__.get(name)
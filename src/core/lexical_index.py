@@ -0,0 +1,271 @@
+"""
+Lexical Index
+BM25 inverted index over the knowledge base's chunk text, built at ingest
+time next to the Chroma collection, so exact identifiers such as
+``fi.resonlp`` or ``dsp::IIR::Filter`` find their chunks without relying
+on embedding similarity
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Identifiers with their qualifiers: fi.resonlp, dsp::IIR::Filter, re.zita_rev1
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:(?:::|\.)[A-Za-z_][A-Za-z0-9_]*)*")
+QUALIFIER_PATTERN = re.compile(r"::|\.")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its me my
+not of on or so than that the their then there these this to use using was what when which
+with without you your we our will would should could about also any all more most some such
+""".split())
+
+INDEX_FILENAME = "lexical_index.json"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms of ``text``; qualified identifiers also yield their parts"""
+    tokens = []
+    for match in IDENTIFIER_PATTERN.finditer(text):
+        token = match.group(0).lower()
+        if QUALIFIER_PATTERN.search(token):
+            tokens.append(token)
+            tokens.extend(part for part in QUALIFIER_PATTERN.split(token) if len(part) > 1)
+        elif len(token) > 1 and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class LexicalIndex:
+    """BM25 over the chunks stored in Chroma, keyed by their Chroma ids"""
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            path: JSON file the index persists to (in memory only when None)
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        # Chunks are numbered internally so postings stay compact on disk
+        self._documents: Dict[int, Tuple[str, str, int]] = {}  # num -> (chroma id, source, length)
+        self._numbers: Dict[str, int] = {}  # chroma id -> num
+        self._postings: Dict[str, Dict[int, int]] = {}  # term -> {num: term frequency}
+        self._total_length = 0
+        self._next_number = 0
+        self._dirty = False
+        self._lock = threading.RLock()
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def add(self, ids: Sequence[str], documents: Sequence) -> int:
+        """
+        Index chunks just added to the vectorstore
+
+        Args:
+            ids: Chroma ids returned by ``add_documents``
+            documents: The chunks, in the same order
+
+        Returns:
+            Number of chunks indexed
+        """
+        with self._lock:
+            for doc_id, doc in zip(ids, documents):
+                metadata = getattr(doc, "metadata", None) or {}
+                self._add_text(doc_id, doc.page_content or "", str(metadata.get("source", "")))
+            self._dirty = True
+            return min(len(ids), len(documents))
+
+    def _add_text(self, doc_id: str, text: str, source: str):
+        if doc_id in self._numbers:
+            self._remove_numbers({self._numbers[doc_id]})
+        counts = Counter(tokenize(text))
+        length = sum(counts.values())
+        number = self._next_number
+        self._next_number += 1
+        self._documents[number] = (doc_id, source, length)
+        self._numbers[doc_id] = number
+        self._total_length += length
+        for term, frequency in counts.items():
+            self._postings.setdefault(term, {})[number] = frequency
+
+    def _remove_numbers(self, numbers: set):
+        for number in numbers:
+            doc_id, _, length = self._documents.pop(number)
+            del self._numbers[doc_id]
+            self._total_length -= length
+        # One pass over the vocabulary however many chunks go
+        for term in list(self._postings):
+            postings = self._postings[term]
+            for number in numbers.intersection(postings):
+                del postings[number]
+            if not postings:
+                del self._postings[term]
+
+    def remove_source(self, source: str) -> int:
+        """Drop every chunk of a source file; returns how many were removed"""
+        with self._lock:
+            numbers = {number for number, (_, doc_source, _) in self._documents.items() if doc_source == source}
+            if numbers:
+                self._remove_numbers(numbers)
+                self._dirty = True
+            return len(numbers)
+
+    def rebuild(self, collection, batch_size: int = 500) -> int:
+        """
+        Re-index everything in a Chroma collection (chunks ingested before the index existed)
+
+        Returns:
+            Number of chunks indexed
+        """
+        with self._lock:
+            self._documents.clear()
+            self._numbers.clear()
+            self._postings.clear()
+            self._total_length = 0
+            offset = 0
+            while True:
+                batch = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+                ids = batch.get("ids") or []
+                if not ids:
+                    break
+                metadatas = batch.get("metadatas") or [None] * len(ids)
+                for doc_id, text, metadata in zip(ids, batch.get("documents") or [], metadatas):
+                    self._add_text(doc_id, text or "", str((metadata or {}).get("source", "")))
+                offset += len(ids)
+            self._dirty = True
+            return len(self._documents)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, k: int = 8) -> List[Tuple[str, float]]:
+        """
+        Best BM25 matches for a query
+
+        Returns:
+            (Chroma id, score) pairs, best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self._documents:
+                return []
+            total = len(self._documents)
+            average_length = self._total_length / total or 1.0
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for number, frequency in postings.items():
+                    length = self._documents[number][2]
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[number] = scores.get(number, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(self._documents[number][0], score) for number, score in best]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            for number_text, (doc_id, source, length) in data["documents"].items():
+                number = int(number_text)
+                self._documents[number] = (doc_id, source, length)
+                self._numbers[doc_id] = number
+                self._total_length += length
+            self._postings = {
+                term: {number: frequency for number, frequency in postings}
+                for term, postings in data["postings"].items()
+            }
+            self._next_number = max(self._documents, default=-1) + 1
+            print(f"🔤 Lexical index loaded: {len(self._documents)} chunks")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Could not load lexical index from {self.path}: {e}")
+            self._documents, self._numbers, self._postings = {}, {}, {}
+            self._total_length = 0
+
+    def save(self) -> bool:
+        """Write the index if it changed since the last save
+
+        Returns:
+            False if the write failed
+        """
+        with self._lock:
+            if self.path is None or not self._dirty:
+                return True
+            data = {
+                "version": 1,
+                "documents": {str(number): list(entry) for number, entry in self._documents.items()},
+                "postings": {term: list(postings.items()) for term, postings in self._postings.items()},
+            }
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"❌ Error saving lexical index: {e}")
+                return False
+            self._dirty = False
+            return True
+
+    @classmethod
+    def from_persist_directory(cls, persist_directory: str, collection=None) -> "LexicalIndex":
+        """
+        Index stored in a Chroma persist directory, built from the collection if missing
+
+        Args:
+            persist_directory: Chroma's persist directory
+            collection: Chroma collection to index when no index file exists yet
+        """
+        index = cls(str(Path(persist_directory) / INDEX_FILENAME))
+        if not index.path.exists() and collection is not None:
+            try:
+                if collection.count():
+                    count = index.rebuild(collection)
+                    index.save()
+                    print(f"🔤 Lexical index built from existing collection: {count} chunks")
+            except Exception as e:
+                print(f"⚠️ Could not build lexical index from the collection: {e}")
+        return index
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Merge rankings by summing 1/(k + rank)
+
+    Args:
+        rankings: Keys of each ranking, best first
+        k: Rank offset damping the top positions
+
+    Returns:
+        (key, fused score), best first; ties keep first-seen order
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
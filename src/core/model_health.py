@@ -0,0 +1,174 @@
+"""
+Ollama Model Health Monitor
+Cheap, cached availability checks based on the Ollama tags and
+running-model endpoints instead of test generations
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+
+class ModelHealthMonitor:
+    """Cache installed/running model status from Ollama, refreshed in the background"""
+
+    def __init__(self,
+                 models: Dict[str, str],
+                 base_url: str = "http://localhost:11434",
+                 ttl_seconds: float = 30.0,
+                 request_timeout: float = 2.0,
+                 on_refresh=None):
+        """
+        Args:
+            models: Display name -> Ollama model id
+            base_url: Ollama server URL
+            ttl_seconds: Background refresh interval; results older than twice
+                this count as unknown
+            request_timeout: Timeout for each HTTP probe
+            on_refresh: Optional callback receiving the list of running model names
+        """
+        self.models = models
+        self.base_url = base_url.rstrip("/")
+        self.ttl_seconds = ttl_seconds
+        self.request_timeout = request_timeout
+        self.on_refresh = on_refresh
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._installed: set = set()
+        self._running: set = set()
+        self._server_error: Optional[str] = None
+        self._last_refresh = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Probing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _normalize(model_id: str) -> str:
+        """Ollama reports untagged models as ':latest'"""
+        return model_id if ":" in model_id else f"{model_id}:latest"
+
+    def _fetch_model_ids(self, endpoint: str) -> set:
+        response = requests.get(f"{self.base_url}{endpoint}", timeout=self.request_timeout)
+        response.raise_for_status()
+        entries = response.json().get("models", []) or []
+        return {
+            self._normalize(entry.get("name") or entry.get("model", ""))
+            for entry in entries
+        }
+
+    def refresh(self) -> Dict[str, str]:
+        """Probe Ollama now and update the cached status"""
+        with self._refresh_lock:
+            try:
+                installed = self._fetch_model_ids("/api/tags")
+                running = self._fetch_model_ids("/api/ps")
+                error = None
+            except Exception as e:
+                installed, running = set(), set()
+                error = str(e)
+
+            with self._lock:
+                self._installed = installed
+                self._running = running
+                self._server_error = error
+                self._last_refresh = time.time()
+
+        if self.on_refresh and error is None:
+            try:
+                self.on_refresh(self.running_models())
+            except Exception as e:
+                print(f"⚠️ Health refresh callback failed: {e}")
+
+        return self.get_status(refresh=False)
+
+    def _is_stale(self) -> bool:
+        """No probe yet, or the background refresh has fallen well behind"""
+        return not self._last_refresh or time.time() - self._last_refresh > 2 * self.ttl_seconds
+
+    # ------------------------------------------------------------------
+    # Cached queries - these never probe Ollama; the background thread does
+    # ------------------------------------------------------------------
+
+    def get_status(self, refresh: bool = False) -> Dict[str, str]:
+        """
+        Status per display name, in check_model_availability format
+
+        Args:
+            refresh: Probe Ollama now (blocking) instead of reading the cached status
+        """
+        if refresh:
+            self.refresh()
+
+        with self._lock:
+            status = {}
+            for model_name, model_id in self.models.items():
+                if self._server_error:
+                    status[model_name] = f"⚠️ Error: {self._server_error[:50]}"
+                elif not self._last_refresh:
+                    status[model_name] = "⏳ Checking..."
+                elif self._normalize(model_id) in self._installed:
+                    status[model_name] = "✅ Available"
+                else:
+                    status[model_name] = "❌ Not installed"
+            return status
+
+    def is_available(self, model_name: str) -> bool:
+        """Whether the model is installed (unknown or stale counts as available)"""
+        with self._lock:
+            if self._server_error or self._is_stale():
+                # Can't tell - let the request try rather than block routing
+                return True
+            model_id = self.models.get(model_name)
+            return bool(model_id) and self._normalize(model_id) in self._installed
+
+    def is_running(self, model_name: str) -> bool:
+        """Whether Ollama had the model loaded at the last probe"""
+        with self._lock:
+            model_id = self.models.get(model_name)
+            return bool(model_id) and self._normalize(model_id) in self._running
+
+    def running_models(self) -> List[str]:
+        """Display names of the models Ollama has loaded"""
+        with self._lock:
+            return [
+                name for name, model_id in self.models.items()
+                if self._normalize(model_id) in self._running
+            ]
+
+    def server_reachable(self) -> bool:
+        with self._lock:
+            return self._last_refresh > 0 and self._server_error is None
+
+    def last_refresh_age(self) -> Optional[float]:
+        """Seconds since the last probe, None if never probed"""
+        return time.time() - self._last_refresh if self._last_refresh else None
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    def start_background_refresh(self):
+        """Refresh the cached status every ``ttl_seconds`` in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+
+        def loop():
+            while not self._stop_event.is_set():
+                self.refresh()
+                self._stop_event.wait(self.ttl_seconds)
+
+        self._thread = threading.Thread(target=loop, name="ollama-health", daemon=True)
+        self._thread.start()
+
+    def stop_background_refresh(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.request_timeout * 2 + 1)
+            self._thread = None
@@ -0,0 +1,208 @@
+"""
+Model Residency Manager for Ollama
+Tracks which models are loaded, keeps the most-used ones pinned within a
+RAM budget and preloads models before the router needs them
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+
+class ModelResidencyManager:
+    """Control Ollama model loading, keep-alive and eviction within a RAM budget"""
+
+    def __init__(self,
+                 models: Dict[str, str],
+                 footprints_gb: Dict[str, float],
+                 ram_budget_gb: float = 24.0,
+                 base_url: str = "http://localhost:11434",
+                 pinned_keep_alive: str = "30m",
+                 default_keep_alive: str = "5m",
+                 usage_file: str = "./cache/model_usage.json"):
+        """
+        Args:
+            models: Display name -> Ollama model id
+            footprints_gb: Approximate resident memory per display name
+            ram_budget_gb: Memory available for resident models
+            base_url: Ollama server URL
+            pinned_keep_alive: keep_alive passed for pinned models
+            default_keep_alive: keep_alive passed for all other models
+            usage_file: Where usage counts are persisted between runs
+        """
+        self.models = models
+        self.footprints_gb = footprints_gb
+        self.ram_budget_gb = ram_budget_gb
+        self.base_url = base_url.rstrip("/")
+        self.pinned_keep_alive = pinned_keep_alive
+        self.default_keep_alive = default_keep_alive
+        self.usage_file = Path(usage_file)
+
+        self._lock = threading.Lock()
+        self._resident: Dict[str, float] = {}  # model name -> last use time
+        self._preloading: set = set()
+        self._dirty_uses = 0
+        self.usage_counts: Dict[str, int] = self._load_usage()
+
+    # ------------------------------------------------------------------
+    # Usage bookkeeping
+    # ------------------------------------------------------------------
+
+    def _load_usage(self) -> Dict[str, int]:
+        try:
+            with open(self.usage_file, "r") as f:
+                counts = json.load(f)
+            return {name: int(counts.get(name, 0)) for name in self.models}
+        except Exception:
+            return {name: 0 for name in self.models}
+
+    def _save_usage(self):
+        try:
+            self.usage_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.usage_file, "w") as f:
+                json.dump(self.usage_counts, f, indent=2)
+        except Exception as e:
+            print(f"⚠️ Could not persist model usage: {e}")
+
+    def record_use(self, model_name: str):
+        """Record that a generation is about to run on ``model_name``"""
+        with self._lock:
+            self.usage_counts[model_name] = self.usage_counts.get(model_name, 0) + 1
+            self._resident[model_name] = time.time()
+            self._dirty_uses += 1
+            save = self._dirty_uses >= 10
+            if save:
+                self._dirty_uses = 0
+            to_unload = self._plan_evictions(model_name)
+
+        if save:
+            self._save_usage()
+        for victim in to_unload:
+            self._unload(victim)
+
+    # ------------------------------------------------------------------
+    # Residency policy
+    # ------------------------------------------------------------------
+
+    def pinned_models(self) -> List[str]:
+        """Most-used models that fit together in the RAM budget"""
+        pinned = []
+        used_gb = 0.0
+        by_usage = sorted(self.models, key=lambda name: self.usage_counts.get(name, 0), reverse=True)
+        for name in by_usage:
+            if self.usage_counts.get(name, 0) == 0:
+                break
+            footprint = self.footprints_gb.get(name, 0.0)
+            if used_gb + footprint <= self.ram_budget_gb:
+                pinned.append(name)
+                used_gb += footprint
+        return pinned
+
+    def keep_alive_for(self, model_name: str) -> str:
+        """keep_alive to pass with a request for ``model_name``"""
+        if model_name in self.pinned_models():
+            return self.pinned_keep_alive
+        return self.default_keep_alive
+
+    def is_hot(self, model_name: str) -> bool:
+        """Whether the model is believed to be loaded in Ollama"""
+        with self._lock:
+            return model_name in self._resident
+
+    def hot_models(self) -> List[str]:
+        """Models believed to be loaded, most recently used first"""
+        with self._lock:
+            return sorted(self._resident, key=self._resident.get, reverse=True)
+
+    def mark_resident(self, loaded_models: List[str]):
+        """Sync residency with the models Ollama reports as loaded"""
+        now = time.time()
+        with self._lock:
+            self._resident = {
+                name: self._resident.get(name, now) for name in loaded_models
+            }
+
+    def _plan_evictions(self, incoming: str) -> List[str]:
+        """Pick resident models to unload so ``incoming`` fits (lock held)"""
+        pinned = set(self.pinned_models())
+        used_gb = sum(self.footprints_gb.get(name, 0.0) for name in self._resident)
+        victims = []
+
+        # Least recently used, unpinned models go first
+        candidates = sorted(
+            (name for name in self._resident if name != incoming and name not in pinned),
+            key=self._resident.get,
+        )
+        for name in candidates:
+            if used_gb <= self.ram_budget_gb:
+                break
+            victims.append(name)
+            used_gb -= self.footprints_gb.get(name, 0.0)
+            del self._resident[name]
+
+        return victims
+
+    # ------------------------------------------------------------------
+    # Ollama load / unload
+    # ------------------------------------------------------------------
+
+    def preload(self, model_name: str):
+        """Load ``model_name`` in the background so the next request skips the reload"""
+        if model_name not in self.models:
+            return
+        with self._lock:
+            if model_name in self._resident or model_name in self._preloading:
+                return
+            self._preloading.add(model_name)
+
+        threading.Thread(
+            target=self._preload_worker, args=(model_name,), name="model-preload", daemon=True
+        ).start()
+
+    def _preload_worker(self, model_name: str):
+        try:
+            # A generate request without a prompt only loads the model
+            response = requests.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.models[model_name], "keep_alive": self.keep_alive_for(model_name)},
+                timeout=300,
+            )
+            response.raise_for_status()
+            with self._lock:
+                self._resident[model_name] = time.time()
+                to_unload = self._plan_evictions(model_name)
+            for victim in to_unload:
+                self._unload(victim)
+            print(f"🔥 Preloaded {model_name}")
+        except Exception as e:
+            print(f"⚠️ Preloading {model_name} failed: {e}")
+        finally:
+            with self._lock:
+                self._preloading.discard(model_name)
+
+    def _unload(self, model_name: str):
+        """Ask Ollama to release a model immediately"""
+        try:
+            requests.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.models[model_name], "keep_alive": 0},
+                timeout=30,
+            )
+            print(f"💤 Unloaded {model_name} to stay within RAM budget")
+        except Exception as e:
+            print(f"⚠️ Unloading {model_name} failed: {e}")
+
+    def get_status(self) -> Dict:
+        """Get residency diagnostics"""
+        hot = self.hot_models()
+        return {
+            "ram_budget_gb": self.ram_budget_gb,
+            "resident_gb": sum(self.footprints_gb.get(name, 0.0) for name in hot),
+            "hot_models": hot,
+            "pinned_models": self.pinned_models(),
+            "usage_counts": dict(self.usage_counts),
+        }
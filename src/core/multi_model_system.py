@@ -1,19 +1,83 @@
 import os
-import re
-from typing import Optional, List, Tuple, Dict, Union
-from langchain_community.llms import Ollama
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import threading
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from functools import partial
+from typing import TYPE_CHECKING, Optional, List, Tuple, Dict, Union, Iterator, Callable
 from .project_manager import ProjectManager
-from .file_processor import FileProcessor
 from .prompts import SYSTEM_PROMPTS
 from .context_enhancer import ContextEnhancer, enhance_vectorstore_retrieval
+from .streaming import ResponseStream, StreamReset, StreamKeepAlive
+from .phase_executor import PhaseExecutor
+from .response_cache import ResponseCache
+from .model_residency import ModelResidencyManager
+from .model_health import ModelHealthMonitor
+from .routing_engine import RoutingEngine
+from .retrieval_context import RetrievalContext
+from .index_generation import IndexGeneration
+from .lexical_index import LexicalIndex
+from .orchestration_context import OrchestrationContext
+from .prompt_assembler import PromptAssembler, PromptSection, PromptBudget
+from .request_context import RequestContext, current_request, request_scope, bind_request
+from .conversation_session import ConversationSessionStore, OllamaChatClient
+from .conversation_memory import ConversationMemory
+from .request_scheduler import RequestScheduler
+from .deadlines import Deadline, GenerationTimeout, deadline_scope
+from .lazy_loading import lazy_component
+from .telemetry import TelemetryRecorder
 
-# HRM local wrapper import
-from ..integrations.hrm_local_wrapper import HRMLocalWrapper, HRMDecomposition, SubTask
+# Heavy dependencies (langchain, chromadb, torch) are imported by the lazy
+# components below on first use
+if TYPE_CHECKING:
+    from ..integrations.hrm_local_wrapper import HRMDecomposition, SubTask
 
 
+# Lower fills the token budget first; the current question is always included
+PROMPT_SECTION_PRIORITIES = {
+    "draft": 0,
+    "knowledge_base": 1,
+    "history": 2,
+    "summary": 3,
+    "project": 4,
+}
+
+# Layout order, most stable first, so consecutive prompts share the longest
+# prefix Ollama can reuse from its KV cache
+PROMPT_SECTION_LAYOUT = ("project", "summary", "history", "knowledge_base", "draft")
+
+# New user message of a conversation session turn; the stable parts live in
+# the session's system message and earlier turns
+SESSION_TURN_TEMPLATE = """{context}
+
+=== CURRENT QUESTION ===
+{question}"""
+
+# Lazy components built by warm_up(), in order: retrieval first, HRM last
+WARMUP_COMPONENTS = ("embeddings", "vectorstore", "embedding_router", "lexical_index", "context_enhancer", "hrm_wrapper")
+
+CHAT_PROMPT_TEMPLATE = """{context}
+
+=== CURRENT QUESTION ===
+{question}
+
+=== INSTRUCTIONS ===
+Please provide a detailed and helpful response based on the context above and your knowledge. 
+If the conversation history shows we were discussing something specific, please continue that conversation naturally.
+Reference the knowledge base information when relevant."""
+
+# Second pass of draft_refine mode: the large model reviews the fast model's draft
+REFINE_PROMPT_TEMPLATE = """{context}
+
+=== CURRENT QUESTION ===
+{question}
+
+=== INSTRUCTIONS ===
+The draft answer above was written quickly by a smaller model. Using the context above and your knowledge,
+check it carefully: keep what is correct, fix mistakes (especially FAUST/JUCE syntax and API usage),
+fill in anything missing, and reply with the complete improved answer only."""
+
 
 class MultiModelGLMSystem:
     def __init__(self):
@@ -23,53 +87,256 @@ class MultiModelGLMSystem:
             "Code Llama (FAUST Specialist)": "codellama:13b",
             "DeepSeek Coder (Fast DSP)": "deepseek-coder:6.7b",
         }
+        
+        # Fast model writing the preview answer in draft_refine routing mode
+        self.draft_model = "DeepSeek Coder (Fast DSP)"
 
-        # Cache for model instances
+        # Cache for model instances (the system is shared by all browser sessions)
         self._model_instances = {}
+        self._model_instances_lock = threading.Lock()
+        
+        # Ollama server (OLLAMA_HOST may omit the scheme)
+        ollama_host = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+        if not ollama_host.startswith("http"):
+            ollama_host = f"http://{ollama_host}"
+        self.ollama_base_url = ollama_host
+        
+        # Model residency - approximate resident size of each quantized model
+        self.model_footprints_gb = {
+            "GLM-Z1 (Reasoning & General)": 20.0,
+            "Code Llama (FAUST Specialist)": 7.5,
+            "DeepSeek Coder (Fast DSP)": 4.0,
+        }
+        self.residency_manager = ModelResidencyManager(
+            self.models,
+            self.model_footprints_gb,
+            ram_budget_gb=float(os.environ.get("GLM_MODEL_RAM_BUDGET_GB", "24")),
+            base_url=self.ollama_base_url,
+        )
+        
+        # Cached Ollama health status from /api/tags and /api/ps; loaded models
+        # reported by Ollama keep the residency manager in sync
+        self.health_monitor = ModelHealthMonitor(
+            self.models,
+            base_url=self.ollama_base_url,
+            ttl_seconds=float(os.environ.get("GLM_HEALTH_TTL_SECONDS", "30")),
+            on_refresh=self.residency_manager.mark_resident,
+        )
+        self.health_monitor.start_background_refresh()
+        
+        # Prefer an already-loaded model when complexity is this close to a routing threshold
+        self.residency_routing_margin = 0.1
+        
+        # Per-model generation limits - the 32B model only runs one call at a time.
+        # Enforced by the request scheduler below for every session and for the
+        # HRM subtasks the phase executor runs concurrently
+        self.model_concurrency_limits = {
+            "GLM-Z1 (Reasoning & General)": 1,
+            "Code Llama (FAUST Specialist)": 1,
+            "DeepSeek Coder (Fast DSP)": 2,
+        }
+        self.phase_executor = PhaseExecutor()
+        
+        # Every generation, from any session, is admitted through per-model queues
+        # with a global in-flight limit; sessions are served fairly
+        self.scheduler = RequestScheduler(
+            self.model_concurrency_limits,
+            max_in_flight=int(os.environ.get("GLM_MAX_IN_FLIGHT", "2")),
+        )
+        # Seconds between keep-alive chunks while a streamed HRM orchestration runs,
+        # so the UI can show queue positions reported by the subtask threads
+        self.stream_keep_alive_interval = 0.5
+        
+        # Deadlines (seconds, 0 disables): a whole request and one HRM subtask.
+        # A generation past its deadline is cancelled and the fallback matrix's
+        # timeout strategy retries it on a fallback model.
+        self.request_timeout = float(os.environ.get("GLM_REQUEST_TIMEOUT", "900"))
+        self.subtask_timeout = float(os.environ.get("GLM_SUBTASK_TIMEOUT", "240"))
+        
+        # Token-budgeted prompt assembly - largest num_ctx used per model and
+        # approximate characters per token of each model's tokenizer
+        self.model_context_windows = {
+            "GLM-Z1 (Reasoning & General)": 32768,
+            "Code Llama (FAUST Specialist)": 16384,
+            "DeepSeek Coder (Fast DSP)": 16384,
+        }
+        self.prompt_assembler = PromptAssembler(
+            self.model_context_windows,
+            chars_per_token={
+                "GLM-Z1 (Reasoning & General)": 3.6,
+                "Code Llama (FAUST Specialist)": 3.2,
+                "DeepSeek Coder (Fast DSP)": 3.4,
+            },
+        )
+        
+        # Persistent response cache for repeated prompts
+        self.response_cache = ResponseCache()
+        
+        # Knowledge base version; retrieval caches for the fixed expansion terms key on it
+        self.index_generation = IndexGeneration()
+        
+        # Per-stage request telemetry: rotating JSONL log plus an optional
+        # Prometheus endpoint (GLM_PROMETHEUS_PORT), bound to localhost unless
+        # GLM_PROMETHEUS_HOST opts into a wider interface
+        self.telemetry = TelemetryRecorder(os.environ.get("GLM_METRICS_PATH", "./logs/metrics.jsonl"))
+        prometheus_port = os.environ.get("GLM_PROMETHEUS_PORT")
+        if prometheus_port:
+            try:
+                self.telemetry.start_prometheus_server(
+                    int(prometheus_port), os.environ.get("GLM_PROMETHEUS_HOST", "127.0.0.1")
+                )
+            except OSError as e:
+                print(f"⚠️ Could not start Prometheus endpoint on port {prometheus_port}: {e}")
+        
+        # Conversation session mode - chats run through Ollama's /api/chat with a
+        # frozen system prefix so the model's KV cache is reused across turns
+        self.conversation_mode = os.environ.get("GLM_CONVERSATION_MODE", "0") == "1"
+        self.conversation_sessions = ConversationSessionStore()
+        self.chat_client = OllamaChatClient(self.ollama_base_url)
+        
+        # Asyncio engine behind generate_response (event loop starts on first request).
+        # Imported here because the orchestrator module imports from src.core itself.
+        from ..integrations.main_orchestrator import UnifiedCodingAssistant
+        self.engine = UnifiedCodingAssistant(self)
         
         # Initialize pattern-based routing rules
         self.routing_patterns = self._initialize_routing_patterns()
         
+        # One precompiled scan per prompt shared by routing, HRM and context enhancement
+        self.routing_engine = RoutingEngine(
+            {domain: config["patterns"] for domain, config in self.routing_patterns.items()}
+        )
+        
         # Initialize fallback strategies
         self.fallback_matrix = self._initialize_fallback_matrix()
         
-        # Initialize HRM local wrapper
-        self.hrm_wrapper = HRMLocalWrapper(
+        # Routing classifier: "regex" (default), or opt into "embedding" /
+        # "blended", which load the MiniLM embedder (warmed at startup) and
+        # change routing decisions
+        self.routing_classifier = os.environ.get("GLM_ROUTING_CLASSIFIER", "regex")
+
+        # Create necessary directories
+        os.makedirs("./uploads", exist_ok=True)
+        os.makedirs("./projects", exist_ok=True)
+        os.makedirs("./chroma_db", exist_ok=True)
+        os.makedirs("./faust_documentation", exist_ok=True)
+        
+        # HRM, embeddings, Chroma and the managers below are lazy components,
+        # built on first use or by warm_up()
+        self._warmup_thread: Optional[threading.Thread] = None
+    
+    # ------------------------------------------------------------------
+    # Lazily built components
+    # ------------------------------------------------------------------
+
+    @lazy_component
+    def hrm_wrapper(self):
+        """HRM local wrapper (imports torch and builds the HRM model)"""
+        from ..integrations.hrm_local_wrapper import HRMLocalWrapper
+        return HRMLocalWrapper(
             device="auto",  # Will auto-detect MPS on M4 Max
-            enable_caching=True
+            enable_caching=True,
+            routing_engine=self.routing_engine
         )
 
-        # Initialize embeddings and vectorstore
-        self.embeddings = HuggingFaceEmbeddings(
+    @lazy_component
+    def embeddings(self):
+        """MiniLM sentence embeddings shared by retrieval and routing"""
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(
             model_name="all-MiniLM-L6-v2",
             model_kwargs={"device": "cpu"},
             encode_kwargs={"normalize_embeddings": True},
         )
 
-        self.vectorstore = Chroma(
+    @lazy_component
+    def vectorstore(self):
+        from langchain_community.vectorstores import Chroma
+        return Chroma(
             persist_directory="./chroma_db", embedding_function=self.embeddings
         )
 
-        # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
+    @lazy_component
+    def embedding_router(self):
+        """Embedding router over the retrieval MiniLM model; the query embedding is shared with retrieval"""
+        from .embedding_router import EmbeddingRouter
+        return EmbeddingRouter(self.embeddings, self.routing_patterns)
+
+    @lazy_component
+    def text_splitter(self):
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        return RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
             length_function=len,
             is_separator_regex=False,
         )
 
-        # Initialize managers
-        self.project_manager = ProjectManager()
-        self.file_processor = FileProcessor(self.vectorstore, self.text_splitter)
+    @lazy_component
+    def project_manager(self):
+        return ProjectManager()
 
-        # Create necessary directories
-        os.makedirs("./uploads", exist_ok=True)
-        os.makedirs("./projects", exist_ok=True)
-        os.makedirs("./chroma_db", exist_ok=True)
-        os.makedirs("./faust_documentation", exist_ok=True)
+    @lazy_component
+    def conversation_memory(self):
+        """Rolling chat summaries, updated by the fast model after each saved exchange"""
+        return ConversationMemory(
+            self.project_manager,
+            self._summarize_conversation,
+            verbatim_turns=int(os.environ.get("GLM_MEMORY_VERBATIM_TURNS", "3")),
+        )
+
+    @lazy_component
+    def file_processor(self):
+        from .file_processor import FileProcessor
+        return FileProcessor(self.vectorstore, self.text_splitter, self.index_generation, self.lexical_index)
+
+    @lazy_component
+    def lexical_index(self):
+        """BM25 index of the knowledge base, persisted inside the Chroma directory"""
+        return LexicalIndex.from_persist_directory(
+            "./chroma_db", collection=getattr(self.vectorstore, "_collection", None)
+        )
+
+    @lazy_component
+    def context_enhancer(self):
+        enhancer = ContextEnhancer(
+            self.vectorstore,
+            routing_engine=self.routing_engine,
+            index_generation=self.index_generation,
+            lexical_index=self.lexical_index,
+            mmr_lambda=float(os.environ.get("GLM_MMR_LAMBDA", "0.5")),
+        )
+        # Function/class registries grow with the downloaded documentation
+        enhancer.load_registries("./faust_documentation", "./juce_documentation")
+        return enhancer
+
+    def loaded_component(self, name: str):
+        """A lazy component if it has been built already (never builds it)"""
+        return lazy_component.loaded(self, name)
+
+    def warm_up(self, components: Optional[Tuple[str, ...]] = None):
+        """Build the given lazy components now, in order
         
-        # Initialize context enhancer after vectorstore is ready
-        self.context_enhancer = ContextEnhancer(self.vectorstore)
+        Args:
+            components: Component names (defaults to WARMUP_COMPONENTS, without
+                the embedding router unless an embedding classifier is selected)
+        """
+        if components is None:
+            components = tuple(
+                name for name in WARMUP_COMPONENTS
+                if name != "embedding_router" or self.routing_classifier != "regex"
+            )
+        for name in components:
+            try:
+                getattr(self, name)
+            except Exception as e:
+                print(f"⚠️ Warm-up of {name} failed: {e}")
+
+    def start_background_warmup(self):
+        """Build the heavy components on a daemon thread so the first request doesn't pay for them"""
+        if self._warmup_thread is None or not self._warmup_thread.is_alive():
+            self._warmup_thread = threading.Thread(target=self.warm_up, name="glm-warmup", daemon=True)
+            self._warmup_thread.start()
     
     def _initialize_routing_patterns(self):
         """Initialize pattern-based routing rules for intelligent task routing"""
@@ -85,7 +352,12 @@ class MultiModelGLMSystem:
                 "primary_model": "Code Llama (FAUST Specialist)",
                 "secondary_model": "GLM-Z1 (Reasoning & General)",
                 "confidence_threshold": 0.8,
-                "complexity_threshold": 6
+                "complexity_threshold": 6,
+                "examples": [
+                    "Make a warm analog-style sound that sweeps slowly",
+                    "Write DSP code for a resonant lowpass filter",
+                    "Build a synth voice with an envelope and vibrato"
+                ]
             },
             "system_architecture": {
                 "patterns": [
@@ -98,7 +370,12 @@ class MultiModelGLMSystem:
                 "primary_model": "GLM-Z1 (Reasoning & General)",
                 "secondary_model": "DeepSeek Coder (Fast DSP)",
                 "confidence_threshold": 0.75,
-                "complexity_threshold": 7
+                "complexity_threshold": 7,
+                "examples": [
+                    "How should I split this codebase into cleaner modules?",
+                    "Plan the overall structure of a plugin host application",
+                    "Which design pattern fits an event dispatch layer?"
+                ]
             },
             "juce_integration": {
                 "patterns": [
@@ -110,7 +387,12 @@ class MultiModelGLMSystem:
                 "primary_model": "DeepSeek Coder (Fast DSP)",
                 "secondary_model": "GLM-Z1 (Reasoning & General)",
                 "confidence_threshold": 0.8,
-                "complexity_threshold": 6
+                "complexity_threshold": 6,
+                "examples": [
+                    "Add a gain knob to my JUCE plugin editor",
+                    "Wire the audio processor parameters to the UI",
+                    "Handle MIDI input in a VST3 instrument"
+                ]
             },
             "optimization_performance": {
                 "patterns": [
@@ -123,44 +405,74 @@ class MultiModelGLMSystem:
                 "primary_model": "DeepSeek Coder (Fast DSP)",
                 "secondary_model": "GLM-Z1 (Reasoning & General)",
                 "confidence_threshold": 0.7,
-                "complexity_threshold": 5
+                "complexity_threshold": 5,
+                "examples": [
+                    "My audio callback is too slow, how do I make it faster?",
+                    "Reduce CPU usage of this convolution loop",
+                    "Find where this code allocates memory on the audio thread"
+                ]
             }
         }
     
     def _initialize_fallback_matrix(self):
-        """Initialize fallback strategies for model unavailability"""
+        """Initialize fallback strategies for model unavailability and timeouts
+        
+        "timeout" is executed by _stream_timeout_retry: the generation is
+        retried on the first available "unavailable" fallback with the prompt
+        trimmed to ``prompt_ratio`` of that model's budget, the answer capped
+        at ``num_predict`` tokens and a ``retry_seconds`` deadline bounded by
+        the request's (see RequestContext.retry_deadline).
+        """
         return {
             "GLM-Z1 (Reasoning & General)": {
                 "unavailable": ["DeepSeek Coder (Fast DSP)", "Code Llama (FAUST Specialist)"],
-                "timeout": ["Split task into smaller parts", "Retry with simplified prompt"],
+                "timeout": {
+                    "strategy": "Retry with simplified prompt",
+                    "prompt_ratio": 0.5,
+                    "num_predict": 1024,
+                    "retry_seconds": 120,
+                },
                 "error": ["Clear context and retry", "Use alternative model"]
             },
             "Code Llama (FAUST Specialist)": {
                 "unavailable": ["GLM-Z1 (Reasoning & General)", "DeepSeek Coder (Fast DSP)"],
-                "timeout": ["Reduce code complexity", "Break into smaller functions"],
+                "timeout": {
+                    "strategy": "Reduce code complexity",
+                    "prompt_ratio": 0.5,
+                    "num_predict": 768,
+                    "retry_seconds": 120,
+                },
                 "error": ["Validate FAUST syntax", "Check documentation context"]
             },
             "DeepSeek Coder (Fast DSP)": {
                 "unavailable": ["GLM-Z1 (Reasoning & General)", "Code Llama (FAUST Specialist)"],
-                "timeout": ["Simplify optimization request", "Focus on single optimization"],
+                "timeout": {
+                    "strategy": "Focus on single optimization",
+                    "prompt_ratio": 0.4,
+                    "num_predict": 512,
+                    "retry_seconds": 90,
+                },
                 "error": ["Fall back to basic implementation", "Use standard patterns"]
             }
         }
 
     def get_model_instance(self, model_name: str):
         """Get or create a cached model instance"""
-        if model_name not in self._model_instances:
-            model_id = self.models.get(model_name)
-            if model_id:
-                try:
-                    self._model_instances[model_name] = Ollama(
-                        model=model_id,
-                        temperature=0.7,
-                        system=SYSTEM_PROMPTS.get(model_name, ""),
-                    )
-                except Exception as e:
-                    print(f"Error loading model {model_name}: {e}")
-                    return None
+        with self._model_instances_lock:
+            if model_name not in self._model_instances:
+                model_id = self.models.get(model_name)
+                if model_id:
+                    try:
+                        from langchain_community.llms import Ollama
+                        self._model_instances[model_name] = Ollama(
+                            model=model_id,
+                            base_url=self.ollama_base_url,
+                            temperature=0.7,
+                            system=SYSTEM_PROMPTS.get(model_name, ""),
+                        )
+                    except Exception as e:
+                        print(f"Error loading model {model_name}: {e}")
+                        return None
 
         return self._model_instances.get(model_name)
 
@@ -173,91 +485,201 @@ class MultiModelGLMSystem:
         use_context: bool = True,
         project_name: str = "Default", 
         chat_history: Optional[List[Tuple[str, str]]] = None,
-        use_hrm_decomposition: bool = True
+        use_hrm_decomposition: bool = True,
+        use_cache: bool = True,
+        conversation_mode: Optional[bool] = None,
+        session_id: str = "default",
+        on_queue: Optional[Callable[[int], None]] = None,
+        timeout: Optional[float] = None
     ) -> Dict[str, Union[str, Dict]]:
         """Enhanced routing with hybrid manual + auto mode support
         
         Args:
             prompt: User's request
             selected_model: "auto" or specific model name
-            routing_mode: "manual", "auto", or "assisted"
+            routing_mode: "manual", "auto", "assisted" or "draft_refine" (a fast
+                draft from draft_model, then the routed large model refines it;
+                the draft is returned under "draft")
             context: Additional context
             use_context: Whether to use knowledge base context
             project_name: Project name for context
             chat_history: Previous conversation
             use_hrm_decomposition: Whether to use HRM for complex tasks
+            use_cache: Whether cached responses may be reused for this request
+            conversation_mode: Run direct chats as a conversation session
+                (defaults to GLM_CONVERSATION_MODE)
+            session_id: Caller identity for fair scheduling across sessions
+            on_queue: Called with the queue position while a generation waits
+                for a scheduler slot (0 once it starts)
+            timeout: Seconds the request may take (defaults to
+                GLM_REQUEST_TIMEOUT, 0 disables); a generation still running
+                then is cancelled and retried on a fallback model
             
         Returns:
             Dict with response and routing metadata
         """
+        # Thin sync facade over the asyncio orchestration engine
+        return self.engine.run(
+            self.engine.process_request(
+                prompt,
+                selected_model=selected_model,
+                routing_mode=routing_mode,
+                context=context,
+                use_context=use_context,
+                project_name=project_name,
+                chat_history=chat_history,
+                use_hrm_decomposition=use_hrm_decomposition,
+                use_cache=use_cache,
+                conversation_mode=conversation_mode,
+                session_id=session_id,
+                on_queue=on_queue,
+                timeout=timeout,
+            )
+        )
+
+    def stream_response(
+        self, 
+        prompt: str, 
+        selected_model: str = "auto", 
+        routing_mode: str = "auto", 
+        context: str = "",
+        use_context: bool = True,
+        project_name: str = "Default", 
+        chat_history: Optional[List[Tuple[str, str]]] = None,
+        use_hrm_decomposition: bool = True,
+        use_cache: bool = True,
+        conversation_mode: Optional[bool] = None,
+        session_id: str = "default",
+        on_queue: Optional[Callable[[int], None]] = None,
+        timeout: Optional[float] = None
+    ) -> ResponseStream:
+        """Streaming counterpart of generate_response
+        
+        Routing runs up front so ``stream.routing`` is available before the
+        first token. Iterating the returned stream yields tokens as Ollama
+        produces them; HRM orchestrated tasks are yielded as one synthesized
+        chunk once all subtasks have completed, with empty keep-alive chunks
+        while they run. In draft_refine mode the
+        fast model's draft streams first and is replaced (``stream.drafts``)
+        once the refined answer starts.
+        
+        Returns:
+            ResponseStream yielding response text chunks
+        """
+        request = RequestContext(
+            use_cache=use_cache, session_id=session_id, on_queue=on_queue,
+            deadline=self._request_deadline(timeout),
+        )
+        
         try:
-            # Step 1: Always run HRM analysis (even in manual mode for recommendations)
-            hrm_analysis = self._analyze_with_hrm(prompt, context)
-            
-            # Step 2: Determine final model based on routing mode
+            # Routing runs in the request scope so its query embedding is reused by retrieval
+            with request_scope(request):
+                hrm_analysis = self._analyze_with_hrm(prompt, context)
             final_model, routing_decision = self._determine_final_model(
                 prompt, selected_model, routing_mode, hrm_analysis
             )
+            routing_info = self._compile_routing_info(
+                routing_mode, final_model, hrm_analysis, routing_decision
+            )
+            self._preload_routed_model(final_model, hrm_analysis, routing_mode)
             
-            # Step 3: Execute with chosen model
-            if hrm_analysis.get("complexity_score", 0) > 0.7 and routing_mode == "auto":
-                # Complex task - use HRM orchestration
-                response_text = self._execute_complex_orchestration(
+            draft_model = self._draft_model_for(final_model) if routing_mode == "draft_refine" else None
+            if self._should_orchestrate(hrm_analysis, routing_mode):
+                chunks = self._stream_complex_orchestration(
                     prompt, hrm_analysis, use_context, project_name, chat_history
                 )
+            elif draft_model:
+                routing_info["draft_model"] = draft_model
+                chunks = self._stream_draft_refine(
+                    prompt, draft_model, final_model, use_context, project_name, chat_history
+                )
             else:
-                # Simple task - direct model execution
-                response_text = self.chat_with_model(
-                    prompt, final_model, use_context, project_name, chat_history
+                chunks = self.stream_chat_with_model(
+                    prompt, final_model, use_context, project_name, chat_history,
+                    conversation_mode=conversation_mode
                 )
             
-            # Step 4: Compile routing metadata
-            routing_info = {
-                "mode": routing_mode,
-                "selected_model": final_model,
-                "hrm_recommendation": hrm_analysis.get("recommended_model", final_model),
-                "complexity_score": hrm_analysis.get("complexity_score", 0),
-                "domain": hrm_analysis.get("domain", "general"),
-                "confidence": hrm_analysis.get("confidence_score", 1.0),
-                "subtasks": hrm_analysis.get("subtask_count", 0),
-                "execution_time": hrm_analysis.get("execution_time", 0),
-                "fallback_used": routing_decision.get("fallback_used", False),
-                "routing_reason": routing_decision.get("reason", "Direct selection")
-            }
-            
-            return {
-                "response": response_text,
-                "routing": routing_info
-            }
-            
         except Exception as e:
-            # Fallback to basic chat
             fallback_model = self._get_fallback_model(selected_model)
-            response_text = self.chat_with_model(
-                prompt, fallback_model, use_context, project_name, chat_history
+            chunks = self.stream_chat_with_model(
+                prompt, fallback_model, use_context, project_name, chat_history,
+                conversation_mode=False
             )
-            
-            return {
-                "response": response_text,
-                "routing": {
-                    "mode": "fallback",
-                    "selected_model": fallback_model,
-                    "error": str(e),
-                    "fallback_used": True
-                }
+            routing_info = {
+                "mode": "fallback",
+                "selected_model": fallback_model,
+                "error": str(e),
+                "fallback_used": True
             }
+        
+        routing_info.update(request.routing_stats())
+        
+        def on_complete(_text):
+            routing_info.update(request.routing_stats())
+            self._record_telemetry(routing_info)
+        
+        return ResponseStream(bind_request(request, chunks), routing_info, on_complete=on_complete)
+
+    def _request_deadline(self, timeout: Optional[float] = None) -> Optional[Deadline]:
+        """Deadline for a new request (``timeout`` overrides GLM_REQUEST_TIMEOUT)"""
+        seconds = self.request_timeout if timeout is None else timeout
+        return Deadline(seconds, "request") if seconds else None
+
+    def _record_telemetry(self, routing_info: Dict):
+        """Append a finished request's stage breakdown to the metrics log"""
+        telemetry = routing_info.get("telemetry")
+        if not telemetry:
+            return
+        try:
+            self.telemetry.record(telemetry, routing_info)
+        except Exception as e:
+            print(f"⚠️ Telemetry recording failed: {e}")
+
+    def _preload_routed_model(self, final_model: str, hrm_analysis: Dict, routing_mode: str):
+        """Start loading the model the request is about to run on"""
+        if self._should_orchestrate(hrm_analysis, routing_mode) and "hrm_decomposition" in hrm_analysis:
+            subtasks = hrm_analysis["hrm_decomposition"].subtasks
+            if subtasks:
+                final_model = subtasks[0].model_preference
+        self.residency_manager.preload(final_model)
+
+    def _should_orchestrate(self, hrm_analysis: Dict, routing_mode: str) -> bool:
+        """Complex auto-routed tasks go through HRM orchestration"""
+        return hrm_analysis.get("complexity_score", 0) > 0.7 and routing_mode == "auto"
+
+    def _compile_routing_info(
+        self, routing_mode: str, final_model: str, hrm_analysis: Dict, routing_decision: Dict
+    ) -> Dict:
+        """Compile routing metadata for the UI"""
+        return {
+            "mode": routing_mode,
+            "selected_model": final_model,
+            "hrm_recommendation": hrm_analysis.get("recommended_model", final_model),
+            "complexity_score": hrm_analysis.get("complexity_score", 0),
+            "domain": hrm_analysis.get("domain", "general"),
+            "confidence": hrm_analysis.get("confidence_score", 1.0),
+            "subtasks": hrm_analysis.get("subtask_count", 0),
+            "execution_time": hrm_analysis.get("execution_time", 0),
+            "fallback_used": routing_decision.get("fallback_used", False),
+            "routing_reason": routing_decision.get("reason", "Direct selection")
+        }
     
     def _analyze_with_hrm(self, prompt: str, context: str) -> Dict:
         """Always run HRM analysis for routing intelligence"""
+        trace = current_request().trace
+        start = time.perf_counter()
         try:
             # Pattern-based quick analysis
-            domain, confidence = self._detect_domain_patterns(prompt)
-            complexity_score = self._estimate_complexity(prompt)
-            recommended_model = self._recommend_model_from_patterns(prompt, domain, complexity_score)
+            with trace.span("routing"):
+                domain, confidence = self._detect_domain_patterns(prompt)
+                complexity_score = self._estimate_complexity(prompt)
+                recommended_model = self._recommend_model_from_patterns(prompt, domain, complexity_score)
             
             # For complex tasks, use full HRM decomposition
             if complexity_score > 0.7:
-                hrm_decomposition = self.hrm_wrapper.decompose_task(prompt, context={"domain": domain})
+                with trace.span("hrm_decomposition") as span:
+                    hrm_decomposition = self.hrm_wrapper.decompose_task(prompt, context={"domain": domain})
+                    span.set(subtasks=len(hrm_decomposition.subtasks))
                 return {
                     "complexity_score": complexity_score,
                     "domain": domain,
@@ -265,7 +687,7 @@ class MultiModelGLMSystem:
                     "recommended_model": recommended_model,
                     "subtask_count": len(hrm_decomposition.subtasks),
                     "hrm_decomposition": hrm_decomposition,
-                    "execution_time": 0
+                    "execution_time": round(time.perf_counter() - start, 3)
                 }
             else:
                 return {
@@ -274,7 +696,7 @@ class MultiModelGLMSystem:
                     "confidence_score": confidence,
                     "recommended_model": recommended_model,
                     "subtask_count": 0,
-                    "execution_time": 0
+                    "execution_time": round(time.perf_counter() - start, 3)
                 }
                 
         except Exception as e:
@@ -285,61 +707,38 @@ class MultiModelGLMSystem:
                 "confidence_score": 0.5,
                 "recommended_model": "GLM-Z1 (Reasoning & General)",
                 "subtask_count": 0,
-                "execution_time": 0
+                "execution_time": round(time.perf_counter() - start, 3)
             }
     
     def _detect_domain_patterns(self, prompt: str) -> Tuple[str, float]:
-        """Detect domain using pattern matching"""
-        prompt_lower = prompt.lower()
-        best_domain = "general"
-        best_confidence = 0.0
-        
-        for domain, config in self.routing_patterns.items():
-            domain_confidence = 0.0
-            pattern_matches = 0
-            
-            for pattern in config["patterns"]:
-                if re.search(pattern, prompt_lower):
-                    pattern_matches += 1
-                    domain_confidence += 0.2  # Each pattern adds 20% confidence
-            
-            # Normalize confidence based on pattern matches
-            if pattern_matches > 0:
-                domain_confidence = min(domain_confidence, 1.0)
-                if domain_confidence > best_confidence:
-                    best_confidence = domain_confidence
-                    best_domain = domain
-        
-        return best_domain, best_confidence
+        """Detect domain using pattern matching, optionally blended with embeddings"""
+        analysis = self.routing_engine.analyze(prompt)
+        if self.routing_classifier == "regex":
+            return analysis.domain, analysis.domain_confidence
+        
+        try:
+            regex_scores = {
+                domain: min(0.2 * matches, 1.0)
+                for domain, matches in analysis.domain_scores.items()
+            }
+            return self.embedding_router.route(
+                self._embed_query(prompt), regex_scores, mode=self.routing_classifier
+            )
+        except Exception as e:
+            print(f"⚠️ Embedding routing failed, using regex routing: {e}")
+            return analysis.domain, analysis.domain_confidence
+    
+    def _embed_query(self, text: str) -> List[float]:
+        """Embed text once per request (shared by routing and retrieval)"""
+        return current_request().embed_query(text, self.embeddings.embed_query)
+    
+    def _retrieval_context(self, query: str) -> RetrievalContext:
+        """Retrieval context for ``query`` reusing the request's embedding"""
+        return RetrievalContext(query, self._embed_query(query))
     
     def _estimate_complexity(self, prompt: str) -> float:
         """Estimate task complexity on 0-1 scale"""
-        complexity_indicators = [
-            (r"(create|build|implement|develop).*(complete|full|entire|comprehensive)", 0.3),
-            (r"(multiple|several|many|various).*(component|module|class|function)", 0.2),
-            (r"(integrate|combine|merge|connect).*(with|and|plus)", 0.2),
-            (r"(optimize|refactor|redesign|restructure)", 0.15),
-            (r"(real.time|thread.safe|high.performance|low.latency)", 0.2),
-            (r"(test|debug|profile|benchmark)", 0.1),
-            (r"(documentation|comment|explain|describe)", -0.1),
-            (r"(simple|basic|quick|small)", -0.2)
-        ]
-        
-        base_complexity = 0.3  # Base complexity
-        prompt_lower = prompt.lower()
-        
-        for pattern, weight in complexity_indicators:
-            if re.search(pattern, prompt_lower):
-                base_complexity += weight
-        
-        # Word count factor
-        word_count = len(prompt.split())
-        if word_count > 50:
-            base_complexity += 0.2
-        elif word_count > 100:
-            base_complexity += 0.3
-            
-        return max(0.0, min(1.0, base_complexity))
+        return self.routing_engine.analyze(prompt).complexity
     
     def get_routing_suggestion(self, prompt: str, selected_model: str) -> Dict[str, Union[str, float]]:
         """Get routing suggestion for UI display in assisted mode"""
@@ -362,23 +761,52 @@ class MultiModelGLMSystem:
         return suggestion
     
     def _recommend_model_from_patterns(self, prompt: str, domain: str, complexity_score: float) -> str:
-        """Recommend model based on patterns and complexity"""
+        """Recommend model based on patterns and complexity
+        
+        When the complexity sits close to the switching threshold both
+        candidates are about equally suitable, so an already-loaded model
+        is preferred to avoid a multi-second reload.
+        """
         if domain in self.routing_patterns:
             config = self.routing_patterns[domain]
+            threshold = config.get("complexity_threshold", 7) / 10
+            primary = config["primary_model"]
+            secondary = config.get("secondary_model", primary)
             
             # Use secondary model for very complex tasks in this domain
-            if complexity_score > config.get("complexity_threshold", 7) / 10:
-                return config.get("secondary_model", config["primary_model"])
+            if complexity_score > threshold:
+                preferred, alternative = secondary, primary
             else:
-                return config["primary_model"]
+                preferred, alternative = primary, secondary
+            
+            if abs(complexity_score - threshold) <= self.residency_routing_margin:
+                return self._prefer_hot_model(preferred, alternative)
+            return preferred
         
         # Fallback based on complexity
         if complexity_score > 0.7:
-            return "GLM-Z1 (Reasoning & General)"  # Best for complex reasoning
+            preferred = "GLM-Z1 (Reasoning & General)"  # Best for complex reasoning
         elif "faust" in prompt.lower() or "dsp" in prompt.lower():
             return "Code Llama (FAUST Specialist)"
         else:
-            return "DeepSeek Coder (Fast DSP)"
+            preferred = "DeepSeek Coder (Fast DSP)"
+        
+        if abs(complexity_score - 0.7) <= self.residency_routing_margin:
+            alternative = (
+                "DeepSeek Coder (Fast DSP)"
+                if preferred == "GLM-Z1 (Reasoning & General)"
+                else "GLM-Z1 (Reasoning & General)"
+            )
+            return self._prefer_hot_model(preferred, alternative)
+        return preferred
+    
+    def _prefer_hot_model(self, preferred: str, alternative: str) -> str:
+        """Swap to the alternative only if it is loaded and the preferred model is not"""
+        residency = self.residency_manager
+        if not residency.is_hot(preferred) and residency.is_hot(alternative):
+            print(f"🔥 Routing to already-loaded {alternative} instead of {preferred}")
+            return alternative
+        return preferred
     
     def _determine_final_model(self, prompt: str, selected_model: str, routing_mode: str, hrm_analysis: Dict) -> Tuple[str, Dict]:
         """Determine final model based on routing mode"""
@@ -389,24 +817,46 @@ class MultiModelGLMSystem:
             routing_decision["reason"] = "Manual selection by user"
             if selected_model != hrm_analysis.get("recommended_model"):
                 routing_decision["suggestion"] = f"HRM recommends {hrm_analysis.get('recommended_model')}"
-            return selected_model, routing_decision
+            return self._ensure_available_model(selected_model, routing_decision), routing_decision
+            
+        elif routing_mode == "draft_refine":
+            # The fast model drafts; the routed model - at least GLM-Z1 - refines
+            recommended = hrm_analysis.get("recommended_model", "GLM-Z1 (Reasoning & General)")
+            if recommended == self.draft_model:
+                recommended = "GLM-Z1 (Reasoning & General)"
+            routing_decision["reason"] = f"Draft with {self.draft_model}, refine with {recommended}"
+            return self._ensure_available_model(recommended, routing_decision), routing_decision
             
         elif routing_mode == "auto" or selected_model == "auto":
             # Auto mode - use HRM recommendation
             routing_decision["reason"] = f"HRM auto-routing (domain: {hrm_analysis.get('domain')}, complexity: {hrm_analysis.get('complexity_score'):.2f})"
-            return hrm_analysis.get("recommended_model", "GLM-Z1 (Reasoning & General)"), routing_decision
+            recommended = hrm_analysis.get("recommended_model", "GLM-Z1 (Reasoning & General)")
+            return self._ensure_available_model(recommended, routing_decision), routing_decision
             
         elif routing_mode == "assisted":
             # Assisted mode - provide recommendation but wait for confirmation
             # For now, use recommendation (UI would handle confirmation)
             routing_decision["reason"] = "Assisted mode using HRM recommendation"
-            return hrm_analysis.get("recommended_model", selected_model), routing_decision
+            recommended = hrm_analysis.get("recommended_model", selected_model)
+            return self._ensure_available_model(recommended, routing_decision), routing_decision
             
         else:
             # Fallback
             routing_decision["reason"] = "Fallback to default model"
             return "GLM-Z1 (Reasoning & General)", routing_decision
     
+    def _ensure_available_model(self, model_name: str, routing_decision: Dict) -> str:
+        """Swap an uninstalled model for its fallback using the cached health status"""
+        if self.health_monitor.is_available(model_name):
+            return model_name
+        
+        fallback = self._get_fallback_model(model_name)
+        if fallback != model_name:
+            print(f"⚠️ {model_name} is not installed - routing to {fallback}")
+            routing_decision["fallback_used"] = True
+            routing_decision["reason"] += f" ({model_name} unavailable, using {fallback})"
+        return fallback
+    
     def _execute_complex_orchestration(self, prompt: str, hrm_analysis: Dict, use_context: bool, project_name: str, chat_history: Optional[List[Tuple[str, str]]]) -> str:
         """Execute complex task using HRM orchestration"""
         if "hrm_decomposition" in hrm_analysis:
@@ -427,12 +877,51 @@ class MultiModelGLMSystem:
                 use_hrm_decomposition=True
             )
     
+    def _stream_complex_orchestration(self, prompt: str, hrm_analysis: Dict, use_context: bool, project_name: str, chat_history: Optional[List[Tuple[str, str]]]) -> Iterator[str]:
+        """Streaming variant of _execute_complex_orchestration"""
+        if "hrm_decomposition" in hrm_analysis:
+            yield from self._keep_alive_while(partial(
+                self._process_hrm_decomposition,
+                hrm_analysis["hrm_decomposition"], 
+                use_context, 
+                project_name, 
+                chat_history
+            ))
+        else:
+            yield from self.stream_chat_with_model_enhanced(
+                prompt, 
+                hrm_analysis.get("recommended_model", "GLM-Z1 (Reasoning & General)"),
+                use_context, 
+                project_name, 
+                chat_history, 
+                use_hrm_decomposition=True
+            )
+    
+    def _keep_alive_while(self, work: Callable[[], str]) -> Iterator[Union[str, StreamKeepAlive]]:
+        """Run ``work`` on a worker thread, yielding keep-alive markers until its result
+        
+        The work runs in a copy of the caller's context, so the active request
+        follows it. An abandoned stream doesn't wait for the work to finish.
+        """
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hrm-stream")
+        try:
+            future = pool.submit(contextvars.copy_context().run, work)
+            while True:
+                try:
+                    result = future.result(timeout=self.stream_keep_alive_interval)
+                    break
+                except FutureTimeoutError:
+                    yield StreamKeepAlive()
+        finally:
+            pool.shutdown(wait=False)
+        yield result
+    
     def _get_fallback_model(self, failed_model: str) -> str:
         """Get fallback model when primary fails"""
         if failed_model in self.fallback_matrix:
             fallback_options = self.fallback_matrix[failed_model].get("unavailable", [])
             for fallback in fallback_options:
-                if self.get_model_instance(fallback):
+                if self.health_monitor.is_available(fallback):
                     return fallback
         
         # Ultimate fallback
@@ -478,9 +967,45 @@ class MultiModelGLMSystem:
                 question, model_name, use_context, project_name, chat_history
             )
     
+    def stream_chat_with_model_enhanced(
+        self,
+        question: str,
+        model_name: str,
+        use_context: bool = True,
+        project_name: str = "Default", 
+        chat_history: Optional[List[Tuple[str, str]]] = None,
+        use_hrm_decomposition: bool = True,
+    ) -> Iterator[str]:
+        """Streaming variant of chat_with_model_enhanced
+        
+        Single-task requests stream token by token; decomposed requests yield
+        the synthesized HRM result once all subtasks are done.
+        """
+        if use_hrm_decomposition:
+            try:
+                hrm_decomposition = self.hrm_wrapper.decompose_task(
+                    question, 
+                    context={
+                        'project': project_name,
+                        'model': model_name,
+                        'use_context': use_context
+                    }
+                )
+                
+                if len(hrm_decomposition.subtasks) > 1:
+                    print(f"🧠 HRM decomposed task into {len(hrm_decomposition.subtasks)} subtasks")
+                    yield self._process_hrm_decomposition(hrm_decomposition, use_context, project_name, chat_history)
+                    return
+            except Exception as e:
+                print(f"❌ Enhanced chat failed, falling back to standard: {e}")
+        
+        yield from self.stream_chat_with_model(
+            question, model_name, use_context, project_name, chat_history
+        )
+    
     def _process_hrm_decomposition(
         self, 
-        hrm_decomposition: HRMDecomposition, 
+        hrm_decomposition: "HRMDecomposition", 
         use_context: bool, 
         project_name: str,
         chat_history: Optional[List[Tuple[str, str]]]
@@ -497,72 +1022,106 @@ class MultiModelGLMSystem:
         
         subtasks_by_id = {st.id: st for st in hrm_decomposition.subtasks}
         
-        # Process subtasks in optimal order
+        # Project context and retrieval shared by the subtasks
+        orchestration = OrchestrationContext(hrm_decomposition.original_query, project_name)
+        
+        # Process subtasks in optimal order; tasks within a phase run concurrently
         for phase, task_ids in enumerate(execution_order, 1):
             print(f"\n🔄 Phase {phase}: Processing {len(task_ids)} task(s)")
             
-            phase_results = []
+            jobs = []
             for task_id in task_ids:
                 subtask = subtasks_by_id[task_id]
                 
                 print(f"  🎯 {subtask.id}: {subtask.description}")
                 print(f"     Model: {subtask.model_preference} | Complexity: {subtask.complexity}/10")
                 
-                # Build enhanced prompt with HRM context
+                # Build enhanced prompt with HRM context from previous phases
                 enhanced_prompt = self._build_hrm_prompt(
                     subtask,
                     hrm_decomposition,
                     context_accumulator
                 )
                 
-                # Process subtask
-                try:
-                    subtask_result = self.chat_with_model(
-                        enhanced_prompt,
-                        subtask.model_preference,
-                        use_context,
-                        project_name,
-                        chat_history
-                    )
-                    
-                    result_entry = {
-                        'subtask_id': subtask.id,
-                        'description': subtask.description,
-                        'result': subtask_result,
-                        'model': subtask.model_preference,
-                        'complexity': subtask.complexity,
-                        'phase': phase
-                    }
-                    
-                    results.append(result_entry)
-                    phase_results.append(result_entry)
-                    
-                    # Add to context for subsequent subtasks
-                    context_accumulator.append(f"Subtask {subtask.id}: {subtask.description}")
-                    context_accumulator.append(f"Result: {subtask_result[:300]}{'...' if len(subtask_result) > 300 else ''}")
-                    
-                    print(f"     ✅ Completed successfully")
-                    
-                except Exception as e:
-                    print(f"     ❌ Failed: {e}")
-                    results.append({
-                        'subtask_id': subtask.id,
-                        'description': subtask.description,
-                        'result': f"Error processing subtask: {e}",
-                        'model': subtask.model_preference,
-                        'complexity': subtask.complexity,
-                        'phase': phase
-                    })
+                jobs.append(partial(
+                    self._execute_hrm_subtask,
+                    subtask,
+                    enhanced_prompt,
+                    phase,
+                    use_context,
+                    project_name,
+                    chat_history,
+                    orchestration
+                ))
+            
+            # Results come back in task_ids order, independent of completion order
+            phase_results = self.phase_executor.run_phase(jobs)
+            
+            for result_entry in phase_results:
+                results.append(result_entry)
+                
+                if result_entry.get('error'):
+                    continue
+                
+                # Add to context for subsequent phases
+                subtask_result = result_entry['result']
+                context_accumulator.append(f"Subtask {result_entry['subtask_id']}: {result_entry['description']}")
+                context_accumulator.append(f"Result: {subtask_result[:300]}{'...' if len(subtask_result) > 300 else ''}")
             
-            print(f"✅ Phase {phase} completed ({len([r for r in phase_results if 'Error' not in r['result']])}/{len(task_ids)} successful)")
+            print(f"✅ Phase {phase} completed ({len([r for r in phase_results if not r.get('error')])}/{len(task_ids)} successful)")
+        
+        self._finish_orchestration(orchestration)
         
         # Synthesize final result
-        return self._synthesize_hrm_results(hrm_decomposition, results)
+        with current_request().trace.span("synthesis"):
+            return self._synthesize_hrm_results(hrm_decomposition, results)
+    
+    def _execute_hrm_subtask(
+        self,
+        subtask: "SubTask",
+        enhanced_prompt: str,
+        phase: int,
+        use_context: bool,
+        project_name: str,
+        chat_history: Optional[List[Tuple[str, str]]],
+        orchestration: OrchestrationContext
+    ) -> Dict:
+        """Run a single HRM subtask and package its result entry"""
+        result_entry = {
+            'subtask_id': subtask.id,
+            'description': subtask.description,
+            'model': subtask.model_preference,
+            'complexity': subtask.complexity,
+            'phase': phase
+        }
+        
+        try:
+            with deadline_scope(self.subtask_timeout, "subtask"):
+                sections = self._subtask_prompt_sections(subtask, orchestration, use_context, chat_history)
+                result_entry['result'] = self.chat_with_model(
+                    enhanced_prompt,
+                    subtask.model_preference,
+                    use_context,
+                    project_name,
+                    chat_history,
+                    conversation_mode=False,
+                    sections=sections,
+                    track_usage=False
+                )
+            if not result_entry['result'].startswith("❌"):
+                orchestration.record_model_usage(subtask.model_preference)
+            print(f"     ✅ {subtask.id} completed successfully")
+        except Exception as e:
+            print(f"     ❌ {subtask.id} failed: {e}")
+            result_entry['result'] = f"Error processing subtask: {e}"
+            result_entry['error'] = True
+        
+        return result_entry
     
     def _build_hrm_prompt(
         self, 
-        subtask: SubTask, 
-        hrm_decomposition: HRMDecomposition,
+        subtask: "SubTask", 
+        hrm_decomposition: "HRMDecomposition",
         context_accumulator: List[str]
     ) -> str:
         """Build enhanced prompt for HRM subtask"""
@@ -622,7 +1181,7 @@ class MultiModelGLMSystem:
     
     def _synthesize_hrm_results(
         self, 
-        hrm_decomposition: HRMDecomposition, 
+        hrm_decomposition: "HRMDecomposition", 
         results: List[Dict]
     ) -> str:
         """Synthesize HRM subtask results into final response"""
@@ -705,131 +1264,729 @@ class MultiModelGLMSystem:
         use_context: bool = True,
         project_name: str = "Default",
         chat_history: Optional[List[Tuple[str, str]]] = None,
+        retrieval: Optional[RetrievalContext] = None,
+        conversation_mode: Optional[bool] = None,
+        sections: Optional[List[PromptSection]] = None,
+        track_usage: bool = True,
     ) -> str:
-        """Chat with a specific model with enhanced context"""
+        """Chat with a specific model with enhanced context
+        
+        Args:
+            conversation_mode: Continue the project's conversation session on
+                /api/chat instead of a one-shot prompt (defaults to GLM_CONVERSATION_MODE)
+            sections: Context sections gathered by the caller (skips retrieval)
+            track_usage: Record the model in the project metadata; HRM
+                subtasks leave this to the end of the decomposition
+        """
+        if self._use_conversation_mode(conversation_mode):
+            return "".join(self.stream_chat_with_model(
+                question, model_name, use_context, project_name, chat_history,
+                retrieval, conversation_mode=True, sections=sections, track_usage=track_usage
+            ))
+
         try:
             # Get model instance
             llm = self.get_model_instance(model_name)
             if not llm:
                 return f"❌ Model {model_name} is not available. Please check if it's installed with 'ollama pull {self.models[model_name]}'"
 
-            # Ensure chat_history is a list
-            if chat_history is None:
-                chat_history = []
+            if sections is None:
+                sections = self._gather_prompt_sections(
+                    question, use_context, project_name, chat_history, retrieval
+                )
+            enhanced_prompt, budget = self._assemble_chat_prompt(question, sections, model_name)
 
-            # Build enhanced context if enabled
-            if use_context:
-                context_parts = []
+            try:
+                response = "".join(self._stream_assembled_prompt(llm, model_name, enhanced_prompt, budget))
+            except GenerationTimeout as e:
+                response = "".join(self._stream_timeout_retry(e, question, sections))
 
-                # 1. Get enhanced knowledge base context
-                try:
-                    # Determine task type from question
-                    task_type = "general"
-                    question_lower = question.lower()
-                    if any(term in question_lower for term in ["faust", "dsp", "signal processing", "audio effect"]):
-                        task_type = "faust"
-                    elif any(term in question_lower for term in ["juce", "plugin", "vst", "au", "processor"]):
-                        task_type = "juce"
-                    
-                    # Get enhanced context
-                    enhanced_context = enhance_vectorstore_retrieval(self.vectorstore, question, task_type)
-                    
-                    if enhanced_context:
-                        context_parts.append(enhanced_context)
-                        print(f"✅ Enhanced context retrieved for {task_type} task")
-                    else:
-                        # Fallback to basic retrieval
-                        relevant_docs = self.vectorstore.similarity_search(question, k=5)
-                        if relevant_docs:
-                            kb_context = "\n\n".join(
-                                [doc.page_content for doc in relevant_docs]
-                            )
-                            context_parts.append(
-                                f"=== KNOWLEDGE BASE CONTEXT ===\n{kb_context[:3000]}"
-                            )
-                            print(f"✅ Found {len(relevant_docs)} relevant documents from knowledge base")
-                        else:
-                            print("⚠️ No relevant documents found in knowledge base")
-                except Exception as e:
-                    print(f"❌ Error accessing enhanced knowledge base: {e}")
-
-                # 2. Get conversation history context
-                if chat_history and len(chat_history) > 0:
-                    # Include last 5 exchanges for context
-                    recent_history = (
-                        chat_history[-5:] if len(chat_history) > 5 else chat_history
-                    )
-                    history_context = []
+            # Track model usage in project
+            if track_usage:
+                self._track_model_usage(project_name, model_name)
 
-                    for i, (prev_q, prev_a) in enumerate(recent_history, 1):
-                        history_context.append(f"Exchange {i}:")
-                        history_context.append(f"Human: {prev_q}")
-                        history_context.append(
-                            f"Assistant: {prev_a[:500]}{'...' if len(prev_a) > 500 else ''}"
-                        )
-                        history_context.append("")
+            return response
 
-                    if history_context:
-                        context_parts.append(
-                            f"=== CONVERSATION HISTORY ===\n"
-                            + "\n".join(history_context)
-                        )
-                        print(
-                            f"✅ Including {len(recent_history)} previous exchanges for context"
-                        )
+        except Exception as e:
+            error_msg = f"❌ Error: {str(e)}\n\nMake sure the model is installed with:\nollama pull {self.models[model_name]}"
+            print(f"❌ Chat error: {e}")
+            return error_msg
 
-                # 3. Get project context
-                try:
-                    project_context = self.project_manager.get_project_context(
-                        project_name
+    def stream_chat_with_model(
+        self,
+        question: str,
+        model_name: str,
+        use_context: bool = True,
+        project_name: str = "Default",
+        chat_history: Optional[List[Tuple[str, str]]] = None,
+        retrieval: Optional[RetrievalContext] = None,
+        conversation_mode: Optional[bool] = None,
+        sections: Optional[List[PromptSection]] = None,
+        track_usage: bool = True,
+    ) -> Iterator[str]:
+        """Streaming variant of chat_with_model that yields tokens as Ollama produces them"""
+        try:
+            llm = self.get_model_instance(model_name)
+            if not llm:
+                yield f"❌ Model {model_name} is not available. Please check if it's installed with 'ollama pull {self.models[model_name]}'"
+                return
+
+            if sections is None:
+                sections = self._gather_prompt_sections(
+                    question, use_context, project_name, chat_history, retrieval
+                )
+            emitted = False
+            try:
+                if self._use_conversation_mode(conversation_mode):
+                    chunks = self._stream_session_chat(
+                        question, model_name, sections, project_name, chat_history
                     )
-                    if project_context:
-                        context_parts.append(
-                            f"=== PROJECT CONTEXT ===\n{project_context}"
-                        )
-                        print(f"✅ Including project context from {project_name}")
-                except Exception as e:
-                    print(f"❌ Error getting project context: {e}")
+                else:
+                    enhanced_prompt, budget = self._assemble_chat_prompt(question, sections, model_name)
+                    chunks = self._stream_assembled_prompt(llm, model_name, enhanced_prompt, budget)
+                for chunk in chunks:
+                    emitted = True
+                    yield chunk
+            except GenerationTimeout as e:
+                yield from self._stream_timeout_retry(e, question, sections, after_output=emitted)
 
-                # Build the enhanced prompt
-                if context_parts:
-                    full_context = "\n\n".join(context_parts)
-                    enhanced_prompt = f"""{full_context}
+            if track_usage:
+                self._track_model_usage(project_name, model_name)
 
-=== CURRENT QUESTION ===
-{question}
+        except Exception as e:
+            print(f"❌ Streaming chat error: {e}")
+            yield f"\n\n❌ Error: {str(e)}\n\nMake sure the model is installed with:\nollama pull {self.models[model_name]}"
 
-=== INSTRUCTIONS ===
-Please provide a detailed and helpful response based on the context above and your knowledge. 
-If the conversation history shows we were discussing something specific, please continue that conversation naturally.
-Reference the knowledge base information when relevant."""
+    def _stream_assembled_prompt(
+        self,
+        llm,
+        model_name: str,
+        prompt: str,
+        budget: PromptBudget,
+        deadline: Optional[Deadline] = None,
+        num_predict: Optional[int] = None,
+    ) -> Iterator[str]:
+        """Stream one assembled prompt, served from the response cache when possible
+        
+        The generation runs on the engine loop so it can be cancelled: once
+        ``deadline`` (default: the request's or subtask's) expires the HTTP
+        stream is closed, which also stops the generation in Ollama.
+        
+        Args:
+            num_predict: Cap on generated tokens; capped answers aren't cached
+        
+        Raises:
+            GenerationTimeout: When the deadline expires, queued or generating
+        """
+        cache_key, cached = self._lookup_cached_response(model_name, llm, prompt)
+        if cached is not None:
+            print(f"⚡ Response cache hit for {model_name}")
+            yield cached
+            return
 
-                    print(
-                        f"🚀 Sending enhanced prompt with {len(context_parts)} context sections"
-                    )
-                    response = llm.invoke(enhanced_prompt)
-                else:
-                    print("⚠️ No context available, using basic prompt")
-                    response = llm.invoke(question)
+        if deadline is None:
+            deadline = current_request().generation_deadline()
+        options = self._model_call_options(model_name, budget)
+        if num_predict:
+            options["num_predict"] = num_predict
+
+        response_parts = []
+        with self._generation_slot(model_name, deadline), self._model_call_span(model_name, budget) as span:
+            for chunk in self.engine.stream_sync(llm.astream(prompt, **options), model_name, deadline):
+                span.first_token()
+                response_parts.append(chunk)
+                yield chunk
+            span.set(output_tokens=self.prompt_assembler.count_tokens("".join(response_parts), model_name))
+        if not num_predict:
+            self._store_cached_response(cache_key, model_name, "".join(response_parts))
+
+    def _stream_timeout_retry(
+        self,
+        timeout: GenerationTimeout,
+        question: str,
+        sections: List[PromptSection],
+        after_output: bool = False,
+    ) -> Iterator[str]:
+        """Execute the fallback matrix's timeout strategy for a cancelled generation
+        
+        The retry runs on the failed model's first available fallback with a
+        trimmed prompt, a num_predict cap and its own deadline, which stays
+        within the request's budget (plus one shared retry window once the
+        request's deadline has passed).
+        
+        Args:
+            after_output: The timed-out generation already streamed some text
+        """
+        request = current_request()
+        failed_model = timeout.model_name
+        policy = self.fallback_matrix.get(failed_model, {}).get("timeout", {})
+        fallback_model = self._get_fallback_model(failed_model)
+        strategy = policy.get("strategy", "Retry with simplified prompt")
+        record = {
+            "model": failed_model,
+            "stage": timeout.stage,
+            "deadline": timeout.deadline.label,
+            "deadline_s": timeout.deadline.seconds,
+            "strategy": strategy,
+            "fallback_model": fallback_model,
+        }
+        print(f"⏱️ {timeout} - {strategy} on {fallback_model}")
+
+        retry_deadline = request.retry_deadline(policy.get("retry_seconds", 120))
+        if retry_deadline is None:
+            request.record_timeout({**record, "fallback_model": None})
+            yield f"\n\n⏱️ {failed_model} timed out and the request has no time left for a retry."
+            return
+
+        llm = self.get_model_instance(fallback_model)
+        if not llm:
+            request.record_timeout({**record, "fallback_model": None})
+            yield f"\n\n⏱️ {failed_model} timed out and no fallback model could be loaded."
+            return
+        request.record_timeout(record)
+
+        usable = self.prompt_assembler.context_window(fallback_model) - self.prompt_assembler.output_reserve
+        prompt, budget = self._assemble_chat_prompt(
+            question, sections, fallback_model,
+            budget_tokens=int(usable * policy.get("prompt_ratio", 0.5)),
+        )
+        separator = "\n\n" if after_output else ""
+        yield (
+            f"{separator}⏱️ *{failed_model} timed out after {timeout.deadline.seconds:g}s - "
+            f"{strategy.lower()} on {fallback_model}*\n\n"
+        )
+        with request.trace.span("timeout_fallback", model=fallback_model, from_model=failed_model):
+            try:
+                yield from self._stream_assembled_prompt(
+                    llm, fallback_model, prompt, budget,
+                    deadline=retry_deadline,
+                    num_predict=policy.get("num_predict"),
+                )
+            except GenerationTimeout as e:
+                request.record_timeout({
+                    "model": fallback_model,
+                    "stage": e.stage,
+                    "deadline": e.deadline.label,
+                    "deadline_s": e.deadline.seconds,
+                    "strategy": strategy,
+                    "fallback_model": None,
+                })
+                yield f"\n\n❌ {fallback_model} also timed out. Try a shorter question or check Ollama's load."
+
+    def _draft_model_for(self, refine_model: str) -> Optional[str]:
+        """Model drafting for ``refine_model`` in draft_refine mode (None: answer directly)"""
+        if refine_model == self.draft_model or not self.health_monitor.is_available(self.draft_model):
+            return None
+        return self.draft_model
+
+    def _draft_section(self, draft: str) -> PromptSection:
+        return PromptSection(
+            "draft", [draft], PROMPT_SECTION_PRIORITIES["draft"],
+            header="=== DRAFT ANSWER (fast model) ===",
+        )
+
+    def _stream_draft_refine(
+        self,
+        question: str,
+        draft_model: str,
+        refine_model: str,
+        use_context: bool = True,
+        project_name: str = "Default",
+        chat_history: Optional[List[Tuple[str, str]]] = None,
+    ) -> Iterator[Union[str, StreamReset]]:
+        """Stream a fast draft, then the refined answer that replaces it
+        
+        Both models share one context gathering; the refine prompt adds the
+        draft. The StreamReset marker is only sent once the first refined
+        token arrives, so a failed refinement leaves the draft as the answer.
+        The refine model was preloaded by routing and loads while the draft
+        streams.
+        """
+        sections = self._gather_prompt_sections(question, use_context, project_name, chat_history)
+
+        draft_parts = []
+        try:
+            for chunk in self._stream_phase("draft", draft_model, question, sections):
+                draft_parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            print(f"⚠️ Draft with {draft_model} failed, refining from scratch: {e}")
+        draft = "".join(draft_parts)
+
+        refine_sections = sections + [self._draft_section(draft)] if draft else sections
+        refined = False
+        try:
+            for chunk in self._stream_phase(
+                "refine", refine_model, question, refine_sections, REFINE_PROMPT_TEMPLATE
+            ):
+                if not refined and draft_parts:
+                    yield StreamReset(refine_model)
+                refined = True
+                yield chunk
+        except Exception as e:
+            print(f"❌ Refinement with {refine_model} failed: {e}")
+            if not draft_parts:
+                yield f"❌ Error: {str(e)}\n\nMake sure the model is installed with:\nollama pull {self.models[refine_model]}"
+            elif not refined:
+                yield f"\n\n⚠️ Refinement with {refine_model} failed - this is the {draft_model} draft ({e})"
             else:
-                print("📝 Context disabled, using direct question")
-                response = llm.invoke(question)
+                yield f"\n\n❌ Refinement interrupted: {e}"
 
-            # Track model usage in project
-            metadata = self.project_manager.get_project_metadata(project_name)
-            if model_name not in metadata.get("models_used", []):
-                metadata.setdefault("models_used", []).append(model_name)
-                self.project_manager.update_project_metadata(project_name, metadata)
+        self._track_model_usage(project_name, refine_model if refined else draft_model)
 
-            return response
+    def _stream_phase(
+        self,
+        phase: str,
+        model_name: str,
+        question: str,
+        sections: List[PromptSection],
+        template: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Stream one draft_refine generation, recording its latencies on the request"""
+        request = current_request()
+        llm = self.get_model_instance(model_name)
+        if not llm:
+            raise RuntimeError(f"Model {model_name} is not available")
 
+        prompt, budget = self._assemble_chat_prompt(question, sections, model_name, template)
+        stats = {"model": model_name, "start_ms": request.trace.elapsed_ms()}
+        for chunk in self._stream_assembled_prompt(llm, model_name, prompt, budget):
+            stats.setdefault("first_token_ms", request.trace.elapsed_ms())
+            yield chunk
+        stats["complete_ms"] = request.trace.elapsed_ms()
+        request.record_draft_refine(phase, stats)
+
+    def _use_conversation_mode(self, conversation_mode: Optional[bool]) -> bool:
+        return self.conversation_mode if conversation_mode is None else conversation_mode
+
+    def _session_system_content(self, model_name: str, project_name: str) -> str:
+        """Stable prefix of a conversation session: system prompt + project context snapshot"""
+        parts = [SYSTEM_PROMPTS.get(model_name, "")]
+        try:
+            with current_request().trace.span("project_context"):
+                project_context = self.project_manager.get_project_context(project_name)
+            if project_context:
+                parts.append(f"=== PROJECT CONTEXT ===\n{project_context}")
         except Exception as e:
-            error_msg = f"❌ Error: {str(e)}\n\nMake sure the model is installed with:\nollama pull {self.models[model_name]}"
-            print(f"❌ Chat error: {e}")
-            return error_msg
+            print(f"❌ Error getting project context: {e}")
+        return "\n\n".join(part for part in parts if part)
+
+    def _stream_session_chat(
+        self,
+        question: str,
+        model_name: str,
+        sections: List[PromptSection],
+        project_name: str = "Default",
+        chat_history: Optional[List[Tuple[str, str]]] = None,
+    ) -> Iterator[str]:
+        """Stream one turn of the project's conversation session via /api/chat
+        
+        The system message and earlier turns are resent byte for byte, so
+        Ollama only prefills the new user message. That message carries the
+        volatile context (retrieved documents) followed by the question; the
+        history and project sections are already part of the session.
+        """
+        request = current_request()
+        session = self.conversation_sessions.get(
+            project_name, model_name, chat_history,
+            partial(self._session_system_content, model_name, project_name),
+            session_id=request.session_id,
+        )
+        count_tokens = partial(self.prompt_assembler.count_tokens, model_name=model_name)
+        usable = (
+            self.prompt_assembler.context_window(model_name) - self.prompt_assembler.output_reserve
+        )
+
+        # Compact well below the limit; every compaction re-prefills the whole session once
+        compacted = 0
+        if session.token_count(count_tokens) > usable * 3 // 4:
+            compacted = session.compact(usable // 2, count_tokens)
+            print(f"🗜️ Conversation session compacted: dropped {compacted} oldest turn(s)")
+
+        session_tokens = session.token_count(count_tokens)
+        user_content, budget = self.prompt_assembler.assemble(
+            model_name,
+            question,
+            [section for section in sections if section.name == "knowledge_base"],
+            SESSION_TURN_TEMPLATE,
+            budget_tokens=usable - session_tokens,
+        )
+        budget.sections["session"] = session_tokens
+        budget.num_ctx = self.prompt_assembler.select_num_ctx(
+            model_name, budget.total + self.prompt_assembler.output_reserve
+        )
+        request.record_prompt(budget)
+
+        options = self._model_call_options(model_name, budget)
+        keep_alive = options.pop("keep_alive")
+        options["temperature"] = 0.7
+
+        print(
+            f"💬 Conversation turn {len(session.turns) + 1} on {model_name}: "
+            f"{session_tokens} session + {budget.total - session_tokens} new tokens"
+        )
+        stats = {}
+        response_parts = []
+        deadline = request.generation_deadline()
+        with self._generation_slot(model_name, deadline), self._model_call_span(model_name, budget) as span:
+            try:
+                for chunk in self.chat_client.stream_chat(
+                    self.models[model_name], session.messages(user_content), options, keep_alive, stats,
+                    deadline=deadline,
+                ):
+                    span.first_token()
+                    response_parts.append(chunk)
+                    yield chunk
+            except GenerationTimeout as e:
+                # The client only knows the Ollama model id
+                raise GenerationTimeout(model_name, e.deadline, e.stage) from None
+            span.set(output_tokens=stats.get("eval_count", 0),
+                     prefilled_tokens=stats.get("prompt_eval_count", 0))
+
+        session.add_turn(question, user_content, "".join(response_parts))
+        request.record_conversation({
+            "turns": len(session.turns),
+            "session_tokens": session_tokens,
+            "prefilled_tokens": stats.get("prompt_eval_count", 0),
+            "prefill_ms": round(stats.get("prompt_eval_duration_ms", 0.0), 1),
+            "compacted_turns": compacted,
+        })
+
+    def _gather_prompt_sections(
+        self,
+        question: str,
+        use_context: bool = True,
+        project_name: str = "Default",
+        chat_history: Optional[List[Tuple[str, str]]] = None,
+        retrieval: Optional[RetrievalContext] = None,
+    ) -> List[PromptSection]:
+        """Collect the context sections competing for the prompt budget
+        
+        Retrieval and project I/O happen here; fitting the sections to a
+        model's budget is left to _assemble_chat_prompt so this can run
+        before routing has picked the model.
+        
+        Args:
+            retrieval: Shared query embedding to search with; built from
+                ``question`` when not given
+        """
+        if not use_context:
+            print("📝 Context disabled, using direct question")
+            return []
+
+        task_type = self.routing_engine.analyze(question).retrieval_task_type
+        sections = [
+            self._knowledge_base_section(question, task_type, retrieval),
+            *self._history_sections(project_name, chat_history),
+            self._project_section(project_name),
+        ]
+        return self._order_sections(sections)
+
+    def _subtask_prompt_sections(
+        self,
+        subtask: "SubTask",
+        orchestration: OrchestrationContext,
+        use_context: bool = True,
+        chat_history: Optional[List[Tuple[str, str]]] = None,
+    ) -> List[PromptSection]:
+        """Context sections for an HRM subtask, shared through the decomposition's cache
+        
+        Project context is read once per decomposition and knowledge base
+        retrieval runs once per (task type, context requirements) key, so
+        subtasks needing the same docs share one query.
+        """
+        if not use_context:
+            return []
+
+        task_type, requirements = orchestration.retrieval_key(subtask)
+        query = orchestration.retrieval_query(requirements)
+        project_name = orchestration.project_name
+        sections = [
+            orchestration.memo(
+                ("knowledge_base", task_type, requirements),
+                lambda: self._knowledge_base_section(query, task_type),
+            ),
+            *self._history_sections(project_name, chat_history),
+            orchestration.memo(("project", project_name), lambda: self._project_section(project_name)),
+        ]
+        return self._order_sections(sections)
+
+    @staticmethod
+    def _order_sections(sections: List[Optional[PromptSection]]) -> List[PromptSection]:
+        return sorted(
+            (section for section in sections if section is not None),
+            key=lambda section: PROMPT_SECTION_LAYOUT.index(section.name),
+        )
+
+    def _knowledge_base_section(
+        self,
+        query: str,
+        task_type: str,
+        retrieval: Optional[RetrievalContext] = None,
+    ) -> Optional[PromptSection]:
+        """Knowledge base context for ``query`` (None when nothing relevant is found)"""
+        try:
+            # Embed the query once; every search below goes by vector
+            if retrieval is None:
+                retrieval = self._retrieval_context(query)
+
+            # Get enhanced context
+            with current_request().trace.span("retrieval", task_type=task_type):
+                enhanced_context = enhance_vectorstore_retrieval(
+                    self.vectorstore, query, task_type,
+                    routing_engine=self.routing_engine, retrieval=retrieval,
+                    enhancer=self.context_enhancer,
+                )
+
+            if enhanced_context:
+                print(f"✅ Enhanced context retrieved for {task_type} task")
+                return PromptSection(
+                    "knowledge_base", [enhanced_context], PROMPT_SECTION_PRIORITIES["knowledge_base"]
+                )
+
+            # Fallback to basic retrieval
+            relevant_docs = retrieval.search(self.vectorstore, k=5)
+            if relevant_docs:
+                print(f"✅ Found {len(relevant_docs)} relevant documents from knowledge base")
+                return PromptSection(
+                    "knowledge_base",
+                    [doc.page_content for doc in relevant_docs],
+                    PROMPT_SECTION_PRIORITIES["knowledge_base"],
+                    header="=== KNOWLEDGE BASE CONTEXT ===",
+                )
+            print("⚠️ No relevant documents found in knowledge base")
+        except Exception as e:
+            print(f"❌ Error accessing enhanced knowledge base: {e}")
+        return None
+
+    def _history_sections(
+        self,
+        project_name: str,
+        chat_history: Optional[List[Tuple[str, str]]],
+    ) -> List[Optional[PromptSection]]:
+        """Rolling summary of the conversation plus the exchanges it doesn't cover yet
+        
+        Without a summary this is the last 5 exchanges, so prompt size stays
+        roughly constant however long the conversation gets.
+        """
+        if not chat_history:
+            return []
+        try:
+            summary, recent_history = self.conversation_memory.prompt_history(project_name, chat_history)
+        except Exception as e:
+            print(f"⚠️ Conversation summary unavailable: {e}")
+            summary, recent_history = "", chat_history[-5:]
+
+        summary_section = None
+        if summary:
+            summary_section = PromptSection(
+                "summary", [summary], PROMPT_SECTION_PRIORITIES["summary"],
+                header="=== CONVERSATION SUMMARY ===",
+            )
+            print(f"✅ Including conversation summary ({len(chat_history) - len(recent_history)} earlier exchanges)")
+        return [summary_section, self._history_section(recent_history)]
+
+    def _history_section(self, recent_history: List[Tuple[str, str]]) -> Optional[PromptSection]:
+        """Recent exchanges, newest first so the budget keeps the most recent"""
+        if not recent_history:
+            return None
+        history_items = [
+            f"Exchange {i}:\nHuman: {prev_q}\nAssistant: {prev_a}\n"
+            for i, (prev_q, prev_a) in enumerate(recent_history, 1)
+        ]
+        print(f"✅ Including {len(recent_history)} previous exchanges for context")
+        return PromptSection(
+            "history",
+            list(reversed(history_items)),
+            PROMPT_SECTION_PRIORITIES["history"],
+            header="=== CONVERSATION HISTORY ===",
+            separator="\n",
+            reverse_layout=True,
+        )
+
+    def _project_section(self, project_name: str) -> Optional[PromptSection]:
+        """Project context read from the project's metadata and saved chats"""
+        try:
+            with current_request().trace.span("project_context"):
+                project_context = self.project_manager.get_project_context(project_name)
+            if project_context:
+                print(f"✅ Including project context from {project_name}")
+                return PromptSection(
+                    "project",
+                    [project_context],
+                    PROMPT_SECTION_PRIORITIES["project"],
+                    header="=== PROJECT CONTEXT ===",
+                )
+        except Exception as e:
+            print(f"❌ Error getting project context: {e}")
+        return None
+
+    def _assemble_chat_prompt(
+        self,
+        question: str,
+        sections: List[PromptSection],
+        model_name: str,
+        template: Optional[str] = None,
+        budget_tokens: Optional[int] = None,
+    ) -> Tuple[str, PromptBudget]:
+        """Fit the gathered sections into ``model_name``'s token budget
+        
+        The token breakdown is recorded on the active request for routing_info.
+        
+        Args:
+            template: Prompt template (defaults to CHAT_PROMPT_TEMPLATE)
+            budget_tokens: Smaller budget than the model's window allows
+        """
+        request = current_request()
+        with request.trace.span("prompt_assembly", model=model_name) as span:
+            prompt, budget = self.prompt_assembler.assemble(
+                model_name,
+                question,
+                sections,
+                template or CHAT_PROMPT_TEMPLATE,
+                system_prompt=SYSTEM_PROMPTS.get(model_name, ""),
+                budget_tokens=budget_tokens,
+            )
+            span.set(prompt_tokens=budget.total)
+        request.record_prompt(budget)
+
+        if prompt == question:
+            print("⚠️ No context available, using basic prompt")
+        else:
+            print(
+                f"🚀 Sending enhanced prompt: {budget.total} tokens "
+                f"(num_ctx {budget.num_ctx}, dropped: {', '.join(budget.dropped) or 'none'})"
+            )
+        return prompt, budget
+
+    @contextmanager
+    def _model_call_span(self, model_name: str, budget: Optional[PromptBudget] = None):
+        """Telemetry span around one generation; callers add tokens and the first token"""
+        attrs = {"prompt_tokens": budget.total} if budget is not None else {}
+        with current_request().trace.span("model_call", model=model_name, **attrs) as span:
+            try:
+                yield span
+            except GenerationTimeout as e:
+                span.set(timed_out=True, deadline=e.deadline.label)
+                raise
+
+    @contextmanager
+    def _generation_slot(self, model_name: str, deadline: Optional[Deadline] = None):
+        """Hold a scheduler slot for one generation of the active request
+        
+        Raises:
+            GenerationTimeout: When ``deadline`` expires while still queued
+        """
+        request = current_request()
+        timeout = None if deadline is None else deadline.remaining()
+        admitted = False
+        try:
+            with self.scheduler.slot(model_name, request.session_id, request.on_queue, timeout) as ticket:
+                admitted = True
+                request.record_queue_wait(ticket.wait_seconds)
+                yield ticket
+        except TimeoutError:
+            if admitted:
+                raise
+            raise GenerationTimeout(model_name, deadline, "queue") from None
+
+    def _model_call_options(self, model_name: str, budget: Optional[PromptBudget] = None) -> Dict:
+        """Per-request Ollama options for a generation on ``model_name``"""
+        self.residency_manager.record_use(model_name)
+        options = {"keep_alive": self.residency_manager.keep_alive_for(model_name)}
+        if budget is not None:
+            options["num_ctx"] = budget.num_ctx
+        return options
+
+    def _lookup_cached_response(self, model_name: str, llm, prompt: str) -> Tuple[Optional[str], Optional[str]]:
+        """Look up a cached response for the active request
+        
+        Returns:
+            (cache key, cached response); the key is None when caching is bypassed
+        """
+        request = current_request()
+        if not request.use_cache:
+            return None, None
+        
+        cache_key = ResponseCache.make_key(
+            self.models.get(model_name, model_name),
+            SYSTEM_PROMPTS.get(model_name, ""),
+            getattr(llm, "temperature", None) or 0.0,
+            prompt,
+        )
+        try:
+            cached = self.response_cache.get(cache_key)
+        except Exception as e:
+            print(f"⚠️ Response cache lookup failed: {e}")
+            cached = None
+        
+        request.record_cache(cached is not None)
+        return cache_key, cached
+
+    def _store_cached_response(self, cache_key: Optional[str], model_name: str, response: str):
+        """Store a freshly generated response under its cache key"""
+        if not cache_key or not response:
+            return
+        try:
+            self.response_cache.put(cache_key, model_name, response)
+        except Exception as e:
+            print(f"⚠️ Response cache store failed: {e}")
+
+    def _track_model_usage(self, project_name: str, model_name: str):
+        """Record that a model was used in the project metadata"""
+        self._track_models_usage(project_name, [model_name])
+
+    def _track_models_usage(self, project_name: str, model_names: List[str]):
+        """Record several models with one metadata read and at most one write"""
+        metadata = self.project_manager.get_project_metadata(project_name)
+        models_used = metadata.setdefault("models_used", [])
+        new_models = [model for model in model_names if model not in models_used]
+        if new_models:
+            models_used.extend(new_models)
+            self.project_manager.update_project_metadata(project_name, metadata)
+
+    def save_exchange(self, project_name: str, model_name: str, question: str, answer: str):
+        """Save a chat exchange to the project and fold it into the rolling summary in the background"""
+        self.project_manager.save_chat_to_project(project_name, model_name, question, answer)
+        self.conversation_memory.schedule_update(project_name, model_name)
+
+    def _summarize_conversation(self, prompt: str) -> str:
+        """Run a conversation summary prompt on the fast model (memory worker thread)"""
+        model_name = self.draft_model
+        llm = self.get_model_instance(model_name)
+        if not llm:
+            raise RuntimeError(f"{model_name} is not available")
+
+        # Queued like any other generation, under its own scheduler session
+        request = RequestContext(use_cache=False, session_id="conversation-memory")
+        deadline = Deadline(self.subtask_timeout, "summary") if self.subtask_timeout else None
+        with request_scope(request):
+            options = self._model_call_options(model_name)
+            with self._generation_slot(model_name, deadline), self._model_call_span(model_name):
+                return "".join(self.engine.stream_sync(llm.astream(prompt, **options), model_name, deadline))
+
+    def _finish_orchestration(self, orchestration: OrchestrationContext):
+        """Write the decomposition's model usage and report its context reuse"""
+        if orchestration.models_used:
+            try:
+                self._track_models_usage(orchestration.project_name, orchestration.models_used)
+            except Exception as e:
+                print(f"⚠️ Could not record model usage: {e}")
+        current_request().record_orchestration(orchestration.stats())
+        print(f"♻️ Subtask context: {orchestration.computed} computed, {orchestration.reused} reused")
 
     def check_vectorstore_status(self):
         """Check if vectorstore has documents and get count (excluding test documents)"""
+        # Don't block page renders on loading the embedding model and Chroma
+        if self.loaded_component("vectorstore") is None:
+            return {
+                "status": "⏳ Loading",
+                "document_count": 0,
+                "total_count": 0,
+                "test_count": 0,
+                "message": "Knowledge base is loading in the background...",
+            }
+
         try:
             # Get actual document count from ChromaDB collection, excluding test documents
             collection = self.vectorstore._collection
@@ -893,34 +2050,21 @@ Reference the knowledge base information when relevant."""
                     "message": f"Error accessing knowledge base: {fallback_error}",
                 }
 
-    def check_model_availability(self):
-        """Check which models are available"""
-        status = {}
-
-        for model_name, model_id in self.models.items():
-            try:
-                # Try to create an instance
-                llm = Ollama(model=model_id)
-                # Try a simple test
-                llm.invoke("test")
-                status[model_name] = "✅ Available"
-            except Exception as e:
-                if "not found" in str(e).lower():
-                    status[model_name] = f"❌ Not installed"
-                else:
-                    status[model_name] = f"⚠️ Error: {str(e)[:50]}"
-
-        return status
+    def check_model_availability(self, force_refresh: bool = False):
+        """Check which models are available
+        
+        Reads the cached Ollama tags/ps probe; no completions are generated.
+        
+        Args:
+            force_refresh: Probe Ollama now instead of using the cached status
+        """
+        if force_refresh:
+            return self.health_monitor.refresh()
+        return self.health_monitor.get_status()
 
     def get_available_models(self):
         """Get list of available models"""
-        available = []
-        for model_name in self.models.keys():
-            if model_name in self._model_instances:
-                available.append(model_name)
-            else:
-                # Try to load it
-                if self.get_model_instance(model_name):
-                    available.append(model_name)
-
-        return available
+        return [
+            model_name for model_name in self.models
+            if self.health_monitor.is_available(model_name)
+        ]
@@ -0,0 +1,76 @@
+"""
+Orchestration Context Cache
+Context shared by the subtasks of one HRM decomposition: project context
+is read once, knowledge base retrieval runs once per distinct subtask need,
+and model usage is written to the project metadata once at the end
+"""
+
+import threading
+from typing import Callable, Dict, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# HRM subtask task types with their own retrieval strategy; others use "general"
+RETRIEVAL_TASK_TYPES = ("faust", "juce")
+
+
+class OrchestrationContext:
+    """Memoized context for the subtasks of one decomposition
+
+    Subtasks of a phase run concurrently, so each key is computed under
+    its own lock: the first subtask computes it and the others wait for
+    and reuse the result instead of repeating the same I/O.
+    """
+
+    def __init__(self, original_query: str, project_name: str):
+        """
+        Args:
+            original_query: Query the decomposition was made from
+            project_name: Project whose context the subtasks share
+        """
+        self.original_query = original_query
+        self.project_name = project_name
+        self.models_used: List[str] = []
+        self.computed = 0
+        self.reused = 0
+        self._values: Dict[Tuple, object] = {}
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def retrieval_key(subtask) -> Tuple[str, Tuple[str, ...]]:
+        """(retrieval task type, context requirements) - subtasks with equal keys share one query"""
+        task_type = subtask.task_type if subtask.task_type in RETRIEVAL_TASK_TYPES else "general"
+        return task_type, tuple(sorted(set(subtask.context_requirements or ())))
+
+    def retrieval_query(self, requirements: Tuple[str, ...]) -> str:
+        """Retrieval query for a set of context requirements ("faust_libraries" -> "faust libraries")"""
+        if not requirements:
+            return self.original_query
+        needs = ", ".join(requirement.replace("_", " ") for requirement in requirements)
+        return f"{self.original_query}\n{needs}"
+
+    def memo(self, key: Tuple, compute: Callable[[], T]) -> T:
+        """Value for ``key``, computed by the first caller only"""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._values:
+                    self.reused += 1
+                    return self._values[key]
+            value = compute()
+            with self._lock:
+                self._values[key] = value
+                self.computed += 1
+            return value
+
+    def record_model_usage(self, model_name: str):
+        """Note a model used by a subtask; written to the project once by the caller"""
+        with self._lock:
+            if model_name not in self.models_used:
+                self.models_used.append(model_name)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"context_computed": self.computed, "context_reused": self.reused}
@@ -0,0 +1,61 @@
+"""
+Concurrent Phase Executor for HRM Orchestration
+Runs independent subtasks of an execution phase in parallel; per-model
+concurrency limits are enforced by the shared request scheduler
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class PhaseExecutor:
+    """Execute the ready subtasks of one phase concurrently
+
+    Every generation a subtask makes waits for a slot of the system's
+    request scheduler, which keeps e.g. GLM-Z1 32B calls serialized while
+    two DeepSeek 6.7B calls overlap, across all sessions. Results are
+    returned in submission order, so merging is deterministic regardless of
+    which subtask finishes first.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Args:
+            max_workers: Upper bound on threads used for a single phase
+        """
+        self.max_workers = max(1, max_workers)
+
+    def run_phase(self, jobs: Sequence[Callable[[], T]]) -> List[T]:
+        """
+        Run one phase of jobs concurrently
+
+        Args:
+            jobs: Callables each performing one subtask
+
+        Returns:
+            Job results in the same order as ``jobs``. Exceptions raised by a
+            job are re-raised when its result is collected.
+        """
+        if not jobs:
+            return []
+
+        # Single job: no point paying for a thread hop
+        if len(jobs) == 1:
+            return [jobs[0]()]
+
+        workers = min(self.max_workers, len(jobs))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hrm-phase") as pool:
+            # Each job runs in a copy of the caller's context so request-scoped
+            # state (cache options, counters) follows it onto the worker thread
+            futures = [
+                pool.submit(contextvars.copy_context().run, job)
+                for job in jobs
+            ]
+            return [future.result() for future in futures]
+
+    def get_status(self) -> Dict:
+        """Get executor configuration"""
+        return {"max_workers": self.max_workers}
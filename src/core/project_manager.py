@@ -1,15 +1,78 @@
+import atexit
+import copy
 import json
+import os
 import shutil
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def _default_metadata(project_name: str, description: str = "") -> Dict:
+    """Metadata of a new project"""
+    return {
+        "name": project_name,
+        "created": datetime.now().isoformat(),
+        "description": description,
+        "models_used": [],
+        "files": {
+            "included": [],
+            "excluded": [],
+            "include_patterns": [
+                "*.py",
+                "*.cpp",
+                "*.h",
+                "*.hpp",
+                "*.c",
+                "*.cc",
+                "*.dsp",
+                "*.lib",
+                "*.fst",
+                "*.txt",
+                "*.md",
+                "*.json",
+            ],
+            "exclude_patterns": [
+                "__pycache__",
+                "*.pyc",
+                ".git",
+                "node_modules",
+                "*.exe",
+                "*.dll",
+                "*.so",
+                "*.dylib",
+            ],
+        },
+        "editor_settings": {
+            "theme": "monokai",
+            "font_size": 14,
+            "tab_size": 4,
+            "wrap_lines": False,
+        },
+    }
 
 
 class ProjectManager:
-    def __init__(self):
+    def __init__(self, flush_delay: float = 1.0):
+        """
+        Args:
+            flush_delay: Seconds metadata changes are held in memory before
+                being written, so bursts of updates cost one write
+        """
         self.projects_dir = Path("./projects")
         self.projects_dir.mkdir(exist_ok=True)
 
+        # In-memory metadata store: project -> (file signature, metadata).
+        # Reads are served from memory while the file is unchanged on disk;
+        # writes are coalesced and flushed in the background.
+        self.flush_delay = flush_delay
+        self._metadata: Dict[str, Tuple[Optional[Tuple[int, int]], Dict]] = {}
+        self._dirty: Set[str] = set()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._metadata_lock = threading.RLock()
+        atexit.register(self.flush)
+
     def get_project_list(self):
         """Get list of available projects"""
         projects = ["Default"]  # Always have a default project
@@ -31,49 +94,12 @@ class ProjectManager:
 
         try:
             project_path.mkdir(parents=True, exist_ok=True)
-            metadata = {
-                "name": project_name,
-                "created": datetime.now().isoformat(),
-                "description": "",
-                "models_used": [],
-                "files": {
-                    "included": [],
-                    "excluded": [],
-                    "include_patterns": [
-                        "*.py",
-                        "*.cpp",
-                        "*.h",
-                        "*.hpp",
-                        "*.c",
-                        "*.cc",
-                        "*.dsp",
-                        "*.lib",
-                        "*.fst",
-                        "*.txt",
-                        "*.md",
-                        "*.json",
-                    ],
-                    "exclude_patterns": [
-                        "__pycache__",
-                        "*.pyc",
-                        ".git",
-                        "node_modules",
-                        "*.exe",
-                        "*.dll",
-                        "*.so",
-                        "*.dylib",
-                    ],
-                },
-                "editor_settings": {
-                    "theme": "monokai",
-                    "font_size": 14,
-                    "tab_size": 4,
-                    "wrap_lines": False,
-                },
-            }
+            metadata = _default_metadata(project_name)
 
-            with open(project_path / "project_metadata.json", "w") as f:
-                json.dump(metadata, f, indent=2)
+            # Written right away so the project is complete on disk
+            with self._metadata_lock:
+                self._dirty.discard(project_name.strip())
+                self._write_metadata(project_name.strip(), metadata)
 
             return True, f"Project '{project_name}' created successfully"
 
@@ -87,131 +113,118 @@ class ProjectManager:
         else:
             return str(self.projects_dir / project_name)
 
-    def get_project_metadata(self, project_name: str) -> Dict:
-        """Get project metadata"""
-        if project_name == "Default":
-            # Return default metadata for the default project
-            return {
-                "name": "Default",
-                "created": datetime.now().isoformat(),
-                "description": "Default workspace project",
-                "models_used": [],
-                "files": {
-                    "included": [],
-                    "excluded": [],
-                    "include_patterns": [
-                        "*.py",
-                        "*.cpp",
-                        "*.h",
-                        "*.hpp",
-                        "*.c",
-                        "*.cc",
-                        "*.dsp",
-                        "*.lib",
-                        "*.fst",
-                        "*.txt",
-                        "*.md",
-                        "*.json",
-                    ],
-                    "exclude_patterns": [
-                        "__pycache__",
-                        "*.pyc",
-                        ".git",
-                        "node_modules",
-                        "*.exe",
-                        "*.dll",
-                        "*.so",
-                        "*.dylib",
-                    ],
-                },
-                "editor_settings": {
-                    "theme": "monokai",
-                    "font_size": 14,
-                    "tab_size": 4,
-                    "wrap_lines": False,
-                },
-            }
-
-        project_path = self.projects_dir / project_name
-        metadata_file = project_path / "project_metadata.json"
+    # ------------------------------------------------------------------
+    # Metadata store
+    # ------------------------------------------------------------------
 
-        if not metadata_file.exists():
-            # Create default metadata if it doesn't exist
-            return self.create_default_metadata(project_name)
+    def _metadata_file(self, project_name: str) -> Path:
+        return self.projects_dir / project_name / "project_metadata.json"
 
+    @staticmethod
+    def _signature(path: Path) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of a file, None when it doesn't exist"""
         try:
-            with open(metadata_file, "r") as f:
-                return json.load(f)
-        except Exception:
-            return self.create_default_metadata(project_name)
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _write_metadata(self, project_name: str, metadata: Dict):
+        """Write metadata atomically and remember it as the on-disk version (lock held)"""
+        metadata_file = self._metadata_file(project_name)
+        metadata_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = metadata_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(tmp_file, metadata_file)
+        self._metadata[project_name] = (self._signature(metadata_file), metadata)
 
-    def create_default_metadata(self, project_name: str) -> Dict:
-        """Create default metadata for a project"""
-        metadata = {
-            "name": project_name,
-            "created": datetime.now().isoformat(),
-            "description": "",
-            "models_used": [],
-            "files": {
-                "included": [],
-                "excluded": [],
-                "include_patterns": [
-                    "*.py",
-                    "*.cpp",
-                    "*.h",
-                    "*.hpp",
-                    "*.c",
-                    "*.cc",
-                    "*.dsp",
-                    "*.lib",
-                    "*.fst",
-                    "*.txt",
-                    "*.md",
-                    "*.json",
-                ],
-                "exclude_patterns": [
-                    "__pycache__",
-                    "*.pyc",
-                    ".git",
-                    "node_modules",
-                    "*.exe",
-                    "*.dll",
-                    "*.so",
-                    "*.dylib",
-                ],
-            },
-            "editor_settings": {
-                "theme": "monokai",
-                "font_size": 14,
-                "tab_size": 4,
-                "wrap_lines": False,
-            },
-        }
+    def get_project_metadata(self, project_name: str) -> Dict:
+        """Get project metadata
+
+        Served from memory unless the file changed on disk since it was
+        read or written. Callers get a copy they may modify and pass to
+        update_project_metadata.
+        """
+        with self._metadata_lock:
+            if project_name == "Default":
+                # The default project's metadata only lives in memory
+                if project_name not in self._metadata:
+                    self._metadata[project_name] = (
+                        None, _default_metadata("Default", "Default workspace project")
+                    )
+                return copy.deepcopy(self._metadata[project_name][1])
 
-        # Save the metadata
-        project_path = self.projects_dir / project_name
-        project_path.mkdir(parents=True, exist_ok=True)
+            metadata_file = self._metadata_file(project_name)
+            cached = self._metadata.get(project_name)
+            if cached is not None:
+                # A pending write is newer than the file
+                if project_name in self._dirty or cached[0] == self._signature(metadata_file):
+                    return copy.deepcopy(cached[1])
 
-        with open(project_path / "project_metadata.json", "w") as f:
-            json.dump(metadata, f, indent=2)
+            signature = self._signature(metadata_file)
+            if signature is None:
+                # Create default metadata if it doesn't exist
+                return self.create_default_metadata(project_name)
+
+            try:
+                with open(metadata_file, "r") as f:
+                    metadata = json.load(f)
+            except Exception:
+                return self.create_default_metadata(project_name)
 
-        return metadata
+            self._metadata[project_name] = (signature, metadata)
+            return copy.deepcopy(metadata)
+
+    def create_default_metadata(self, project_name: str) -> Dict:
+        """Create default metadata for a project"""
+        metadata = _default_metadata(project_name)
+        self.update_project_metadata(project_name, metadata)
+        return copy.deepcopy(metadata)
 
     def update_project_metadata(self, project_name: str, metadata: Dict) -> bool:
-        """Update project metadata"""
-        if project_name == "Default":
-            return True  # Don't save metadata for default project
+        """Update project metadata
+
+        The change is visible to readers immediately and written to disk
+        (atomically, coalesced with other changes) after ``flush_delay``.
+        """
+        with self._metadata_lock:
+            if project_name == "Default":
+                # Don't save metadata for default project
+                self._metadata[project_name] = (None, copy.deepcopy(metadata))
+                return True
+
+            signature = self._metadata.get(project_name, (None, None))[0]
+            self._metadata[project_name] = (signature, copy.deepcopy(metadata))
+            self._dirty.add(project_name)
+            if self.flush_delay <= 0:
+                return self.flush()
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return True
 
-        try:
-            project_path = self.projects_dir / project_name
-            project_path.mkdir(parents=True, exist_ok=True)
+    def flush(self) -> bool:
+        """Write pending metadata changes now
 
-            with open(project_path / "project_metadata.json", "w") as f:
-                json.dump(metadata, f, indent=2)
+        Returns:
+            False when a write failed; it is retried on the next flush
+        """
+        with self._metadata_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
 
-            return True
-        except Exception:
-            return False
+            ok = True
+            for project_name in sorted(self._dirty):
+                try:
+                    self._write_metadata(project_name, self._metadata[project_name][1])
+                    self._dirty.discard(project_name)
+                except Exception as e:
+                    print(f"❌ Error saving metadata for {project_name}: {e}")
+                    ok = False
+            return ok
 
     def update_file_patterns(
         self,
@@ -398,22 +411,23 @@ class ProjectManager:
             print(f"Error getting project context: {e}")
             return f"Error loading context for project '{project_name}'"
 
+    def chat_file_path(self, project_name: str, model_name: str) -> Path:
+        """Chat file of a model in a project (projects/<project>/<model>_chat.json)"""
+        clean_model_name = (
+            model_name.replace(" ", "_")
+            .replace("(", "")
+            .replace(")", "")
+            .replace("&", "and")
+            .replace(",", "")
+            .replace("-", "_")
+        )
+        return self.projects_dir / project_name / f"{clean_model_name}_chat.json"
+
     def save_chat_to_project(self, project_name, model_name, question, answer):
         """Save chat to specific project with better error handling"""
         try:
-            project_path = self.projects_dir / project_name
-            project_path.mkdir(parents=True, exist_ok=True)
-
-            clean_model_name = (
-                model_name.replace(" ", "_")
-                .replace("(", "")
-                .replace(")", "")
-                .replace("&", "and")
-                .replace(",", "")
-                .replace("-", "_")
-            )
-
-            chat_file = project_path / f"{clean_model_name}_chat.json"
+            chat_file = self.chat_file_path(project_name, model_name)
+            chat_file.parent.mkdir(parents=True, exist_ok=True)
 
             # Load existing chats
             chats = []
@@ -439,11 +453,13 @@ class ProjectManager:
             if len(chats) > 50:
                 chats = chats[-50:]
 
-            # Save updated chats
-            with open(chat_file, "w", encoding="utf-8") as f:
+            # Save updated chats; replaced atomically since the summary worker reads the file
+            tmp_file = chat_file.with_suffix(".tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
                 json.dump(chats, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, chat_file)
 
-            print(f"✅ Saved chat to {project_name}/{clean_model_name}_chat.json")
+            print(f"✅ Saved chat to {project_name}/{chat_file.name}")
 
         except Exception as e:
             print(f"❌ Error saving chat to project: {e}")
@@ -451,18 +467,7 @@ class ProjectManager:
     def load_project_chats(self, project_name, model_name):
         """Load chats for specific project and model with better error handling"""
         try:
-            project_path = self.projects_dir / project_name
-
-            clean_model_name = (
-                model_name.replace(" ", "_")
-                .replace("(", "")
-                .replace(")", "")
-                .replace("&", "and")
-                .replace(",", "")
-                .replace("-", "_")
-            )
-
-            chat_file = project_path / f"{clean_model_name}_chat.json"
+            chat_file = self.chat_file_path(project_name, model_name)
 
             if not chat_file.exists():
                 print(f"📝 No previous chats found for {model_name} in {project_name}")
@@ -489,6 +494,10 @@ class ProjectManager:
 
         try:
             project_path = self.projects_dir / project_name
+            with self._metadata_lock:
+                # A pending write must not recreate the deleted project
+                self._dirty.discard(project_name)
+                self._metadata.pop(project_name, None)
             if project_path.exists():
                 shutil.rmtree(project_path)
                 return True, f"Project '{project_name}' deleted successfully"
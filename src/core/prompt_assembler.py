@@ -0,0 +1,214 @@
+"""
+Token-budgeted Prompt Assembler
+Fills a per-model context budget with prioritized prompt sections and picks
+the num_ctx each request runs with
+"""
+
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class PromptSection:
+    """One block of context competing for the prompt budget"""
+    name: str  # key in the token breakdown
+    items: List[str]  # filled in this order; the first item that doesn't fit is truncated
+    priority: int  # lower fills first
+    header: str = ""
+    separator: str = "\n\n"
+    reverse_layout: bool = False  # items given newest-first but laid out oldest-first
+
+
+@dataclass
+class PromptBudget:
+    """Token accounting for one assembled prompt"""
+    model_name: str
+    num_ctx: int
+    budget: int
+    sections: Dict[str, int] = field(default_factory=dict)
+    dropped: List[str] = field(default_factory=list)
+    truncated: List[str] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return sum(self.sections.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            "model": self.model_name,
+            "total": self.total,
+            "budget": self.budget,
+            "num_ctx": self.num_ctx,
+            "sections": dict(self.sections),
+            "dropped": list(self.dropped),
+            "truncated": list(self.truncated),
+        }
+
+
+class PromptAssembler:
+    """Greedy, priority-ordered prompt assembly within each model's context window"""
+
+    def __init__(self,
+                 context_windows: Dict[str, int],
+                 chars_per_token: Optional[Dict[str, float]] = None,
+                 default_context_window: int = 4096,
+                 output_reserve: int = 2048,
+                 min_num_ctx: int = 4096,
+                 num_ctx_step: int = 2048,
+                 min_section_tokens: int = 64):
+        """
+        Args:
+            context_windows: Largest num_ctx to use per model
+            chars_per_token: Average characters per token per model tokenizer
+            default_context_window: Window for models not listed
+            output_reserve: Tokens kept free for the response
+            min_num_ctx: Smallest num_ctx requested from Ollama
+            num_ctx_step: num_ctx is rounded up to a multiple of this
+            min_section_tokens: Don't bother truncating an item into less than this
+        """
+        self.context_windows = context_windows
+        self.chars_per_token = chars_per_token or {}
+        self.default_context_window = default_context_window
+        self.output_reserve = output_reserve
+        self.min_num_ctx = min_num_ctx
+        self.num_ctx_step = num_ctx_step
+        self.min_section_tokens = min_section_tokens
+
+        self._num_ctx_in_use: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Token counting
+    # ------------------------------------------------------------------
+
+    def _chars_per_token(self, model_name: str) -> float:
+        return self.chars_per_token.get(model_name, 3.5)
+
+    def count_tokens(self, text: str, model_name: str) -> int:
+        """Approximate token count of ``text`` for ``model_name``'s tokenizer"""
+        if not text:
+            return 0
+        return math.ceil(len(text) / self._chars_per_token(model_name))
+
+    def truncate(self, text: str, max_tokens: int, model_name: str) -> str:
+        """Cut ``text`` to roughly ``max_tokens`` tokens"""
+        max_chars = int(max_tokens * self._chars_per_token(model_name)) - 3
+        if len(text) <= max_chars:
+            return text
+        return text[:max(0, max_chars)] + "..."
+
+    def context_window(self, model_name: str) -> int:
+        return self.context_windows.get(model_name, self.default_context_window)
+
+    # ------------------------------------------------------------------
+    # num_ctx selection
+    # ------------------------------------------------------------------
+
+    def select_num_ctx(self, model_name: str, needed: int) -> int:
+        """Smallest step-aligned num_ctx that fits, without shrinking a loaded model
+
+        Ollama reloads a model whenever num_ctx changes, so once a larger
+        context is in use it is kept for smaller prompts as well.
+        """
+        window = self.context_window(model_name)
+        num_ctx = max(self.min_num_ctx, math.ceil(needed / self.num_ctx_step) * self.num_ctx_step)
+        with self._lock:
+            in_use = self._num_ctx_in_use.get(model_name, 0)
+            num_ctx = min(window, max(num_ctx, in_use))
+            self._num_ctx_in_use[model_name] = num_ctx
+        return num_ctx
+
+    # ------------------------------------------------------------------
+    # Assembly
+    # ------------------------------------------------------------------
+
+    def assemble(self,
+                 model_name: str,
+                 question: str,
+                 sections: List[PromptSection],
+                 template: str,
+                 system_prompt: str = "",
+                 budget_tokens: Optional[int] = None) -> Tuple[str, PromptBudget]:
+        """
+        Fill the model's budget with sections in priority order
+
+        Args:
+            model_name: Model the prompt is for
+            question: Current question (always included in full)
+            sections: Candidate context sections, in layout order
+            template: Format string with {context} and {question} placeholders
+            system_prompt: System prompt sent alongside (counted, not included)
+            budget_tokens: Tokens available for this prompt when other content
+                (e.g. earlier conversation turns) shares the window
+
+        Returns:
+            (prompt, budget); the bare question when no section fits
+        """
+        window = self.context_window(model_name)
+        if budget_tokens is None:
+            budget_tokens = window - self.output_reserve
+        budget = PromptBudget(model_name=model_name, num_ctx=window, budget=budget_tokens)
+
+        fixed = {
+            "system": self.count_tokens(system_prompt, model_name),
+            "question": self.count_tokens(question, model_name),
+            "instructions": self.count_tokens(template.format(context="", question=""), model_name),
+        }
+        remaining = budget.budget - sum(fixed.values())
+
+        kept: Dict[str, List[str]] = {}
+        for section in sorted(sections, key=lambda s: s.priority):
+            items = [item for item in section.items if item]
+            if not items:
+                continue
+
+            overhead = self.count_tokens(section.header, model_name) + 1
+            section_items = []
+            used = overhead
+            for item in items:
+                cost = self.count_tokens(item, model_name) + 1
+                if used + cost <= remaining:
+                    section_items.append(item)
+                    used += cost
+                    continue
+                room = remaining - used - 1
+                if room >= self.min_section_tokens:
+                    section_items.append(self.truncate(item, room, model_name))
+                    used = remaining
+                    budget.truncated.append(section.name)
+                break
+
+            if not section_items:
+                budget.dropped.append(section.name)
+                continue
+            if len(section_items) < len(items) and section.name not in budget.truncated:
+                budget.truncated.append(section.name)
+
+            kept[section.name] = section_items
+            remaining -= used
+
+        rendered = []
+        for section in sections:
+            if section.name not in kept:
+                continue
+            items = kept[section.name]
+            if section.reverse_layout:
+                items = list(reversed(items))
+            body = section.separator.join(items)
+            text = f"{section.header}\n{body}" if section.header else body
+            budget.sections[section.name] = self.count_tokens(text, model_name)
+            rendered.append(text)
+
+        if rendered:
+            prompt = template.format(context="\n\n".join(rendered), question=question)
+            budget.sections.update(fixed)
+        else:
+            prompt = question
+            budget.sections.update(system=fixed["system"], question=fixed["question"])
+
+        budget.num_ctx = self.select_num_ctx(model_name, budget.total + self.output_reserve)
+        if budget.total + self.output_reserve > window:
+            print(f"⚠️ Prompt for {model_name} needs {budget.total} tokens, over its {window} window")
+        return prompt, budget
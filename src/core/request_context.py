@@ -0,0 +1,187 @@
+"""
+Per-request context for MultiModelGLMSystem
+Carries request-scoped options and counters across threads and asyncio tasks
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .deadlines import Deadline, scoped_deadline
+from .telemetry import RequestTrace
+
+
+@dataclass
+class RequestContext:
+    """Options and statistics for one generate/stream request"""
+    use_cache: bool = True
+    session_id: str = "default"
+    on_queue: Optional[Callable[[int], None]] = field(default=None, repr=False)
+    deadline: Optional[Deadline] = None
+    queue_wait: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    query_embeddings: Dict[str, List[float]] = field(default_factory=dict, repr=False)
+    prompt_budgets: List = field(default_factory=list, repr=False)
+    conversation: Dict = field(default_factory=dict)
+    draft_refine: Dict[str, Dict] = field(default_factory=dict)
+    timeouts: List[Dict] = field(default_factory=list)
+    orchestration: Dict[str, int] = field(default_factory=dict)
+    trace: RequestTrace = field(default_factory=RequestTrace, repr=False)
+    _retry_window: Optional[Deadline] = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _embed_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def embed_query(self, text: str, embed_fn: Callable[[str], List[float]]) -> List[float]:
+        """Embed ``text`` once per request; routing and retrieval share the vector"""
+        # Held while embedding so concurrent routing and retrieval don't both compute it
+        with self._embed_lock:
+            embedding = self.query_embeddings.get(text)
+            if embedding is None:
+                with self.trace.span("embed_query"):
+                    embedding = embed_fn(text)
+                self.query_embeddings[text] = embedding
+            return embedding
+
+    def record_cache(self, hit: bool):
+        """Count a response cache lookup"""
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def cache_stats(self) -> Dict:
+        return {
+            "cache_enabled": self.use_cache,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+    def record_prompt(self, budget):
+        """Keep the token breakdown (PromptBudget) of an assembled prompt"""
+        with self._lock:
+            self.prompt_budgets.append(budget)
+
+    def prompt_stats(self) -> Dict:
+        """Token breakdown of the request's prompts (summed over HRM subtasks)"""
+        with self._lock:
+            budgets = list(self.prompt_budgets)
+        if not budgets:
+            return {}
+        if len(budgets) == 1:
+            return {"prompt_tokens": budgets[0].to_dict()}
+
+        sections: Dict[str, int] = {}
+        for budget in budgets:
+            for name, tokens in budget.sections.items():
+                sections[name] = sections.get(name, 0) + tokens
+        return {
+            "prompt_tokens": {
+                "prompts": len(budgets),
+                "total": sum(budget.total for budget in budgets),
+                "sections": sections,
+                "num_ctx": max(budget.num_ctx for budget in budgets),
+            }
+        }
+
+    def record_queue_wait(self, seconds: float):
+        """Add time a generation spent queued in the scheduler"""
+        with self._lock:
+            self.queue_wait += seconds
+
+    def record_conversation(self, stats: Dict):
+        """Keep the KV-cache reuse statistics of a conversation session turn"""
+        with self._lock:
+            self.conversation = dict(stats)
+
+    def generation_deadline(self) -> Optional[Deadline]:
+        """Deadline for a generation now: the request's or the enclosing subtask's, if earlier"""
+        return Deadline.earliest(self.deadline, scoped_deadline())
+
+    def retry_deadline(self, seconds: float) -> Optional[Deadline]:
+        """Deadline for a timeout fallback retry; None when the request has no time left
+        
+        A retry never outlives the request's deadline. Once that has expired,
+        the first retry opens one ``seconds`` window that every later retry
+        of the request shares, so a request takes at most its own deadline
+        plus one retry window.
+        """
+        retry = Deadline(seconds, "retry")
+        with self._lock:
+            if self.deadline is None or not self.deadline.expired:
+                return Deadline.earliest(retry, self.deadline)
+            if self._retry_window is None:
+                self._retry_window = retry
+            if self._retry_window.expired:
+                return None
+            return Deadline.earliest(retry, self._retry_window)
+
+    def record_timeout(self, info: Dict):
+        """Keep a generation timeout and the fallback that handled it"""
+        with self._lock:
+            self.timeouts.append(dict(info))
+
+    def record_draft_refine(self, phase: str, stats: Dict):
+        """Keep the model and latencies of a draft_refine phase ("draft" or "refine")"""
+        with self._lock:
+            self.draft_refine[phase] = dict(stats)
+
+    def record_orchestration(self, stats: Dict[str, int]):
+        """Add the context cache counters of an HRM decomposition"""
+        with self._lock:
+            for name, count in stats.items():
+                self.orchestration[name] = self.orchestration.get(name, 0) + count
+
+    def routing_stats(self) -> Dict:
+        """Request statistics merged into routing_info"""
+        stats = {**self.cache_stats(), **self.prompt_stats()}
+        if self.conversation:
+            stats["conversation"] = dict(self.conversation)
+        if self.draft_refine:
+            stats["draft_refine"] = {phase: dict(info) for phase, info in self.draft_refine.items()}
+        if self.orchestration:
+            stats["subtask_context"] = dict(self.orchestration)
+        if self.timeouts:
+            stats["timeouts"] = [dict(info) for info in self.timeouts]
+            if any(info.get("fallback_model") for info in self.timeouts):
+                stats["fallback_used"] = True
+        if self.queue_wait:
+            stats["queue_wait_ms"] = round(self.queue_wait * 1000, 1)
+        stats["telemetry"] = self.trace.to_dict()
+        return stats
+
+
+_current_request: ContextVar[Optional[RequestContext]] = ContextVar(
+    "current_request", default=None
+)
+
+
+def current_request() -> RequestContext:
+    """Get the active request context (a throwaway default outside a request)"""
+    request = _current_request.get()
+    return request if request is not None else RequestContext()
+
+
+@contextmanager
+def request_scope(request: RequestContext):
+    """Make ``request`` the active context for the enclosed block"""
+    token = _current_request.set(request)
+    try:
+        yield request
+    finally:
+        _current_request.reset(token)
+
+
+def bind_request(request: RequestContext, iterator) -> Iterator:
+    """Advance a lazy iterator with ``request`` active on every step"""
+    iterator = iter(iterator)
+    while True:
+        with request_scope(request):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
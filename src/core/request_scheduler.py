@@ -0,0 +1,276 @@
+"""
+Request Scheduler for the shared MultiModelGLMSystem
+Admits model generations from all browser sessions through per-model
+queues with a global in-flight limit and fairness across sessions
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, List, Optional
+
+WAITING = "waiting"
+RUNNING = "running"
+DONE = "done"
+
+
+class SlotWithdrawn(RuntimeError):
+    """A waiting ticket was released before it got a slot"""
+
+
+class SchedulerTicket:
+    """One generation waiting for, or holding, a scheduler slot"""
+
+    def __init__(self,
+                 seq: int,
+                 model_name: str,
+                 session_id: str,
+                 on_wait: Optional[Callable[[int], None]] = None):
+        self.seq = seq
+        self.model_name = model_name
+        self.session_id = session_id
+        self.on_wait = on_wait
+        self.state = WAITING
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+    @property
+    def wait_seconds(self) -> float:
+        end = self.started_at if self.started_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+    def notify(self, position: int):
+        if self.on_wait is None:
+            return
+        try:
+            self.on_wait(position)
+        except Exception as e:
+            print(f"⚠️ Queue position callback failed: {e}")
+
+
+class RequestScheduler:
+    """Per-model queues in front of Ollama, shared by every session
+
+    A waiting generation is started once its model is below its own
+    concurrency limit and fewer than ``max_in_flight`` generations run in
+    total. Among the waiting generations, the session with the fewest
+    running generations goes first, then the one served least recently,
+    then arrival order, so one session submitting a burst of requests
+    can't starve the others.
+    """
+
+    def __init__(self,
+                 model_limits: Optional[Dict[str, int]] = None,
+                 max_in_flight: int = 2,
+                 default_limit: int = 1,
+                 poll_interval: float = 0.5):
+        """
+        Args:
+            model_limits: Maximum concurrent generations per model name
+            max_in_flight: Maximum concurrent generations across all models
+            default_limit: Limit for models not listed in model_limits
+            poll_interval: Seconds between queue position checks while waiting
+        """
+        self.model_limits = dict(model_limits or {})
+        self.max_in_flight = max(1, max_in_flight)
+        self.default_limit = max(1, default_limit)
+        self.poll_interval = poll_interval
+
+        self._waiting: Dict[str, List[SchedulerTicket]] = {}
+        self._running: Dict[str, int] = {}
+        self._session_running: Dict[str, int] = {}
+        self._last_served: Dict[str, int] = {}
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def _model_limit(self, model_name: str) -> int:
+        return max(1, self.model_limits.get(model_name, self.default_limit))
+
+    def _priority(self, ticket: SchedulerTicket):
+        return (
+            self._session_running.get(ticket.session_id, 0),
+            self._last_served.get(ticket.session_id, -1),
+            ticket.seq,
+        )
+
+    def _dispatch(self):
+        """Start waiting tickets while there is capacity (lock held)"""
+        while self._in_flight < self.max_in_flight:
+            candidates = [
+                min(queue, key=self._priority)
+                for model_name, queue in self._waiting.items()
+                if queue and self._running.get(model_name, 0) < self._model_limit(model_name)
+            ]
+            if not candidates:
+                return
+
+            ticket = min(candidates, key=self._priority)
+            self._waiting[ticket.model_name].remove(ticket)
+            ticket.state = RUNNING
+            ticket.started_at = time.monotonic()
+            self._running[ticket.model_name] = self._running.get(ticket.model_name, 0) + 1
+            self._session_running[ticket.session_id] = self._session_running.get(ticket.session_id, 0) + 1
+            self._last_served[ticket.session_id] = ticket.seq
+            self._in_flight += 1
+            self._cond.notify_all()
+
+    def _position(self, ticket: SchedulerTicket) -> int:
+        """1-based position in the model's queue (lock held)"""
+        key = self._priority(ticket)
+        return 1 + sum(
+            1 for other in self._waiting.get(ticket.model_name, [])
+            if other is not ticket and self._priority(other) < key
+        )
+
+    def submit(self,
+               model_name: str,
+               session_id: str = "default",
+               on_wait: Optional[Callable[[int], None]] = None) -> SchedulerTicket:
+        """Queue a generation; started immediately when there is capacity"""
+        ticket = SchedulerTicket(next(self._seq), model_name, session_id, on_wait)
+        with self._cond:
+            self._waiting.setdefault(model_name, []).append(ticket)
+            self._dispatch()
+        return ticket
+
+    def wait(self, ticket: SchedulerTicket, timeout: Optional[float] = None) -> bool:
+        """
+        Block until ``ticket`` may run, reporting queue positions to its callback
+
+        Returns:
+            True once running, False if the ticket was released while waiting
+
+        Raises:
+            TimeoutError: When ``timeout`` elapses first (the ticket is withdrawn)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        reported = None
+        while True:
+            with self._cond:
+                if ticket.state == WAITING and deadline is not None and time.monotonic() >= deadline:
+                    self._withdraw(ticket)
+                    raise TimeoutError(f"Timed out waiting for a {ticket.model_name} slot")
+                if ticket.state != WAITING:
+                    break
+                position = self._position(ticket)
+                if position == reported:
+                    remaining = self.poll_interval
+                    if deadline is not None:
+                        remaining = max(0.0, min(remaining, deadline - time.monotonic()))
+                    self._cond.wait(remaining)
+                    continue
+
+            # Callbacks may update the UI; never call them with the lock held
+            reported = position
+            ticket.notify(position)
+
+        if ticket.state == RUNNING and reported is not None:
+            ticket.notify(0)
+        return ticket.state == RUNNING
+
+    def release(self, ticket: SchedulerTicket):
+        """Free the ticket's slot, or withdraw it from its queue"""
+        with self._cond:
+            if ticket.state == RUNNING:
+                self._running[ticket.model_name] -= 1
+                self._session_running[ticket.session_id] -= 1
+                if not self._session_running[ticket.session_id]:
+                    del self._session_running[ticket.session_id]
+                self._in_flight -= 1
+                ticket.state = DONE
+                self._dispatch()
+                self._forget_idle_session(ticket.session_id)
+            elif ticket.state == WAITING:
+                self._withdraw(ticket)
+            self._cond.notify_all()
+
+    def _withdraw(self, ticket: SchedulerTicket):
+        self._waiting[ticket.model_name].remove(ticket)
+        ticket.state = DONE
+        self._forget_idle_session(ticket.session_id)
+        self._cond.notify_all()
+
+    def set_limits(self,
+                   model_limits: Optional[Dict[str, int]] = None,
+                   max_in_flight: Optional[int] = None):
+        """Change per-model and global limits; queued tickets start if there is new room"""
+        with self._cond:
+            if model_limits:
+                self.model_limits.update(model_limits)
+            if max_in_flight is not None:
+                self.max_in_flight = max(1, max_in_flight)
+            self._dispatch()
+
+    def _forget_idle_session(self, session_id: str):
+        """Drop fairness history of a session with nothing running or queued (lock held)"""
+        if session_id in self._session_running:
+            return
+        if any(ticket.session_id == session_id for queue in self._waiting.values() for ticket in queue):
+            return
+        self._last_served.pop(session_id, None)
+
+    # ------------------------------------------------------------------
+    # Slots
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def slot(self,
+             model_name: str,
+             session_id: str = "default",
+             on_wait: Optional[Callable[[int], None]] = None,
+             timeout: Optional[float] = None):
+        """Hold a generation slot for the enclosed block; yields the running ticket
+
+        Raises:
+            TimeoutError: When ``timeout`` elapses before a slot is free
+            SlotWithdrawn: When the ticket is released while still waiting
+        """
+        ticket = self.submit(model_name, session_id, on_wait)
+        try:
+            if not self.wait(ticket, timeout):
+                raise SlotWithdrawn(f"{model_name} generation was withdrawn before it got a slot")
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def aslot(self,
+                    model_name: str,
+                    session_id: str = "default",
+                    on_wait: Optional[Callable[[int], None]] = None,
+                    timeout: Optional[float] = None):
+        """Async counterpart of slot; waiting happens off the event loop"""
+        ticket = self.submit(model_name, session_id, on_wait)
+        try:
+            # A cancelled wait releases the ticket, which wakes the worker thread
+            if not await asyncio.to_thread(self.wait, ticket, timeout):
+                raise SlotWithdrawn(f"{model_name} generation was withdrawn before it got a slot")
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    # ------------------------------------------------------------------
+    # Status
+    # ------------------------------------------------------------------
+
+    def queue_position(self, ticket: SchedulerTicket) -> int:
+        """Current position of a waiting ticket (0 once running)"""
+        with self._cond:
+            return self._position(ticket) if ticket.state == WAITING else 0
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "running": {name: count for name, count in self._running.items() if count},
+                "queued": {name: len(queue) for name, queue in self._waiting.items() if queue},
+                "sessions": len(self._session_running),
+            }
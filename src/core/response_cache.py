@@ -0,0 +1,147 @@
+"""
+Persistent LLM Response Cache
+SQLite-backed cache of model responses with LRU eviction and TTL expiry
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class ResponseCache:
+    """On-disk response cache keyed on model, system prompt, temperature and prompt hash"""
+
+    def __init__(self,
+                 db_path: str = "./cache/response_cache.db",
+                 max_entries: int = 2000,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        """
+        Args:
+            db_path: SQLite file holding cached responses
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached response text
+            ttl_seconds: Entries older than this are treated as misses
+        """
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_id: str, system_prompt: str, temperature: float, prompt: str) -> str:
+        """Build a cache key from everything that determines the model output"""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        material = json.dumps(
+            [model_id, system_prompt or "", float(temperature or 0.0), prompt_hash]
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached response or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created = row
+            if self.ttl_seconds and now - created > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return response
+
+    def put(self, key: str, model: str, response: str):
+        """Store a response and evict least recently used entries over budget"""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO responses
+                   (key, model, response, size, created, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (key, model, response, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then LRU entries until within budget"""
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,)
+            )
+
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+        while count > self.max_entries or total_bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            count -= 1
+            total_bytes -= row[1]
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            count, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,49 @@
+"""
+Per-request Retrieval Context
+Holds the query embedding computed once per request and the by-vector
+Chroma results derived from it, so the enhanced retrieval, the fallback
+search and every HRM subtask reuse the same vector
+"""
+
+import threading
+from typing import List
+
+from .request_context import current_request
+
+
+class RetrievalContext:
+    """Query embedding plus cached top-k documents for one request"""
+
+    def __init__(self, query: str, embedding: List[float]):
+        """
+        Args:
+            query: Text the embedding was computed from
+            embedding: Query embedding from the vectorstore's embedding model
+        """
+        self.query = query
+        self.embedding = embedding
+        self._docs: List = []
+        self._k = 0
+        self._lock = threading.Lock()
+        self.searches = 0
+
+    def search(self, vectorstore, k: int) -> List:
+        """Top-k documents for the query; larger earlier searches are sliced"""
+        with self._lock:
+            if k <= self._k:
+                return self._docs[:k]
+
+            with current_request().trace.span("chroma_query", k=k):
+                docs = vectorstore.similarity_search_by_vector(self.embedding, k=k)
+            self.searches += 1
+            self._docs = docs
+            # Fewer results than requested means the collection is exhausted
+            self._k = k if len(docs) >= k else float("inf")
+            return docs[:k]
+
+    def prime(self, docs: List, k: int):
+        """Adopt top-k results found by another search with the same embedding"""
+        with self._lock:
+            if k > self._k:
+                self._docs = list(docs)
+                self._k = k if len(docs) >= k else float("inf")
@@ -0,0 +1,263 @@
+"""
+Shared Routing Engine
+Precompiled domain, task-type, complexity and keyword tables scanned once
+per prompt; the system router, HRM wrapper and context enhancer all read the
+same analysis instead of running their own regex loops
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Routing complexity indicators (weights on a 0-1 scale)
+ROUTING_COMPLEXITY_INDICATORS = [
+    (r"(create|build|implement|develop).*(complete|full|entire|comprehensive)", 0.3),
+    (r"(multiple|several|many|various).*(component|module|class|function)", 0.2),
+    (r"(integrate|combine|merge|connect).*(with|and|plus)", 0.2),
+    (r"(optimize|refactor|redesign|restructure)", 0.15),
+    (r"(real.time|thread.safe|high.performance|low.latency)", 0.2),
+    (r"(test|debug|profile|benchmark)", 0.1),
+    (r"(documentation|comment|explain|describe)", -0.1),
+    (r"(simple|basic|quick|small)", -0.2)
+]
+
+# Task complexity indicators (1-10 scale), shared by HRM and context enhancement
+TASK_COMPLEXITY_INDICATORS = {
+    r'simple|basic|quick|easy': 2,
+    r'example|demo|tutorial': 3,
+    r'implement|create|build': 5,
+    r'complex|advanced|sophisticated': 7,
+    r'complete|full|entire|comprehensive': 8,
+    r'system|framework|architecture|engine': 9,
+    r'from scratch|ground up|production|enterprise': 10
+}
+
+# HRM task classification patterns
+TASK_TYPE_PATTERNS = {
+    'faust': [
+        r'faust\s+(?:code|program|script)',
+        r'dsp\s+(?:algorithm|effect|filter)',
+        r'audio\s+(?:effect|processing|synthesis)',
+        r'(?:create|build|implement).*(?:oscillator|filter|delay|reverb)',
+        r'signal\s+processing',
+        r'frequency\s+(?:domain|analysis)',
+        r'\.dsp\s+file',
+        r'faust\s+library'
+    ],
+    'juce': [
+        r'juce\s+(?:application|plugin|project)',
+        r'(?:vst|au|aax)\s+plugin',
+        r'audio\s+plugin',
+        r'juce\s+(?:component|processor)',
+        r'(?:create|build).*juce.*(?:gui|interface)',
+        r'audio\s+buffer',
+        r'parameter\s+(?:control|automation)',
+        r'plugin\s+wrapper'
+    ],
+    'complex': [
+        r'(?:create|build|develop).*(?:complete|full|entire).*(?:system|application)',
+        r'from\s+scratch',
+        r'(?:design|architect|implement).*(?:framework|engine)',
+        r'integrate.*(?:multiple|various|different)',
+        r'(?:real-time|realtime)\s+(?:audio|processing)',
+        r'(?:end-to-end|full-stack)',
+        r'production\s+ready'
+    ],
+    'analysis': [
+        r'(?:analyze|examine|study|review)',
+        r'(?:compare|evaluate|assess)',
+        r'(?:explain|describe|document)',
+        r'(?:optimize|improve|enhance)',
+        r'(?:debug|troubleshoot|fix)'
+    ]
+}
+
+# Plain substring keyword groups used for retrieval task type and term extraction
+KEYWORD_GROUPS = {
+    "retrieval_faust": ["faust", "dsp", "signal processing", "audio effect"],
+    "retrieval_juce": ["juce", "plugin", "vst", "au", "processor"],
+    "dsp": [
+        "oscillator", "filter", "reverb", "delay", "echo", "chorus", "flanger",
+        "compressor", "limiter", "distortion", "envelope", "adsr", "lfo",
+        "synthesis", "frequency", "amplitude", "resonance", "cutoff", "feedback"
+    ],
+    "plugin": ["vst", "au", "aax", "plugin", "processor", "component"],
+    "audio": [
+        "sample rate", "buffer size", "latency", "real-time", "dsp",
+        "signal processing", "frequency domain", "time domain", "fft",
+        "convolution", "filtering", "modulation", "synthesis", "analysis"
+    ],
+    "programming": [
+        "class", "function", "method", "template", "algorithm", "optimization",
+        "performance", "memory", "threading", "concurrency", "simd"
+    ],
+}
+
+# FAUST syntax markers, matched case-sensitively against the raw prompt
+FAUST_SYNTAX_PATTERNS = [
+    r"process\s*=", r"import\([\"']", r"with\s*{", r"library\(",
+    r"~", r":", r"<:", r":>", r"\|", r",", r"\+"
+]
+
+
+@dataclass
+class RoutingAnalysis:
+    """Everything the routing consumers need from one scan of a prompt"""
+    domain: str
+    domain_confidence: float
+    domain_scores: Dict[str, int]  # matched pattern count per routing domain
+    complexity: float  # 0-1 routing complexity
+    task_complexity: int  # 1-10 indicator score before task-type adjustments
+    task_types: List[str]
+    keyword_hits: Dict[str, List[str]] = field(default_factory=dict)
+    has_faust_syntax: bool = False
+
+    @property
+    def retrieval_task_type(self) -> str:
+        """Task type used to pick the retrieval strategy"""
+        if self.keyword_hits.get("retrieval_faust"):
+            return "faust"
+        if self.keyword_hits.get("retrieval_juce"):
+            return "juce"
+        return "general"
+
+
+class RoutingEngine:
+    """Precompiled single-pass prompt classifier with a small LRU of recent analyses
+
+    All pattern tables are compiled once at construction. Groups where only
+    "any pattern matched" matters (task types, FAUST syntax) are merged into
+    one alternation, and the 1-10 complexity table is scanned highest score
+    first so it stops at the first hit.
+    """
+
+    def __init__(self,
+                 domain_patterns: Optional[Dict[str, List[str]]] = None,
+                 task_type_patterns: Optional[Dict[str, List[str]]] = None,
+                 cache_size: int = 256):
+        """
+        Args:
+            domain_patterns: Routing domain -> regex patterns
+            task_type_patterns: HRM task type -> regex patterns
+            cache_size: Number of recent prompt analyses kept
+        """
+        self._domains = [
+            (domain, [re.compile(pattern) for pattern in patterns])
+            for domain, patterns in (domain_patterns or {}).items()
+        ]
+        self._task_types = [
+            (task_type, self._compile_any(patterns))
+            for task_type, patterns in (task_type_patterns or TASK_TYPE_PATTERNS).items()
+        ]
+        self._routing_indicators = [
+            (re.compile(pattern), weight) for pattern, weight in ROUTING_COMPLEXITY_INDICATORS
+        ]
+        # Highest score first so the scan stops at the first hit
+        self._task_indicators = sorted(
+            ((re.compile(pattern), score) for pattern, score in TASK_COMPLEXITY_INDICATORS.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        self._keyword_groups = {
+            group: tuple(terms) for group, terms in KEYWORD_GROUPS.items()
+        }
+        self._faust_syntax = self._compile_any(FAUST_SYNTAX_PATTERNS)
+
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, RoutingAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _compile_any(patterns: List[str]) -> "re.Pattern":
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+    def analyze(self, prompt: str) -> RoutingAnalysis:
+        """Analyze a prompt, reusing the result for repeated prompts"""
+        with self._lock:
+            cached = self._cache.get(prompt)
+            if cached is not None:
+                self._cache.move_to_end(prompt)
+                return cached
+
+        analysis = self._scan(prompt)
+
+        with self._lock:
+            self._cache[prompt] = analysis
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return analysis
+
+    def _scan(self, prompt: str) -> RoutingAnalysis:
+        prompt_lower = prompt.lower()
+
+        # Routing domains: 20% confidence per matched pattern
+        domain_scores = {}
+        best_domain = "general"
+        best_confidence = 0.0
+        for domain, patterns in self._domains:
+            matches = sum(1 for pattern in patterns if pattern.search(prompt_lower))
+            domain_scores[domain] = matches
+            confidence = min(0.2 * matches, 1.0)
+            if matches and confidence > best_confidence:
+                best_confidence = confidence
+                best_domain = domain
+
+        # Routing complexity (0-1)
+        complexity = 0.3
+        for pattern, weight in self._routing_indicators:
+            if pattern.search(prompt_lower):
+                complexity += weight
+        word_count = len(prompt.split())
+        if word_count > 50:
+            complexity += 0.2
+        elif word_count > 100:
+            complexity += 0.3
+        complexity = max(0.0, min(1.0, complexity))
+
+        # Task complexity (1-10)
+        task_complexity = 1
+        for pattern, score in self._task_indicators:
+            if pattern.search(prompt_lower):
+                task_complexity = max(task_complexity, score)
+                break
+
+        task_types = [
+            task_type for task_type, pattern in self._task_types
+            if pattern.search(prompt_lower)
+        ]
+
+        keyword_hits = {
+            group: [term for term in terms if term in prompt_lower]
+            for group, terms in self._keyword_groups.items()
+        }
+
+        return RoutingAnalysis(
+            domain=best_domain,
+            domain_confidence=best_confidence,
+            domain_scores=domain_scores,
+            complexity=complexity,
+            task_complexity=min(10, task_complexity),
+            task_types=task_types,
+            keyword_hits=keyword_hits,
+            has_faust_syntax=bool(self._faust_syntax.search(prompt)),
+        )
+
+    def clear_cache(self):
+        """Drop memoized analyses"""
+        with self._lock:
+            self._cache.clear()
+
+
+_default_engine: Optional[RoutingEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_routing_engine() -> RoutingEngine:
+    """Process-wide engine for consumers constructed without one (task types, complexity, keywords)"""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = RoutingEngine()
+        return _default_engine
@@ -0,0 +1,82 @@
+"""
+Streaming response helpers for MultiModelGLMSystem
+Wraps token generators so the UI can render text as Ollama produces it
+"""
+
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+
+class StreamReset:
+    """Marker chunk: the text streamed so far was a draft the following chunks replace"""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+
+
+class StreamKeepAlive:
+    """Marker chunk: no new text yet, the source is still working"""
+
+
+class ResponseStream:
+    """Iterable stream of response tokens with routing metadata
+
+    Iterating yields text chunks as they arrive. Once the stream is
+    exhausted ``text`` holds the complete response and the optional
+    ``on_complete`` callback has been called with it. A ``StreamReset``
+    from the source moves the text so far into ``drafts`` and starts over,
+    and a ``StreamKeepAlive`` is yielded as an empty chunk so the consumer
+    gets control back (e.g. to update other UI) while the source is busy.
+    """
+
+    def __init__(self,
+                 chunks: Iterable[Union[str, StreamReset, StreamKeepAlive]],
+                 routing: Optional[Dict] = None,
+                 on_complete: Optional[Callable[[str], None]] = None):
+        self._chunks = chunks
+        self._parts: List[str] = []
+        self.drafts: List[str] = []
+        self._on_complete = on_complete
+        self.routing = routing if routing is not None else {}
+        self.completed = False
+
+    def __iter__(self) -> Iterator[str]:
+        if self.completed:
+            yield self.text
+            return
+
+        for chunk in self._chunks:
+            if isinstance(chunk, StreamReset):
+                if self._parts:
+                    self.drafts.append(self.text)
+                    self._parts = []
+                continue
+            if isinstance(chunk, StreamKeepAlive):
+                yield ""
+                continue
+            if not chunk:
+                continue
+            self._parts.append(chunk)
+            yield chunk
+
+        self.completed = True
+        if self._on_complete:
+            try:
+                self._on_complete(self.text)
+            except Exception as e:
+                print(f"⚠️ Stream completion callback failed: {e}")
+
+    @property
+    def text(self) -> str:
+        """Text received so far (the full response once completed)"""
+        return "".join(self._parts)
+
+    @property
+    def draft(self) -> Optional[str]:
+        """Most recent replaced draft, if the response was refined"""
+        return self.drafts[-1] if self.drafts else None
+
+    def consume(self) -> str:
+        """Drain the stream and return the full response text"""
+        for _ in self:
+            pass
+        return self.text
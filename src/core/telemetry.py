@@ -0,0 +1,265 @@
+"""
+Request Telemetry
+Per-stage latency spans collected for each request, a rotating JSONL
+metrics log and an optional Prometheus text endpoint with per-model and
+per-stage quantiles
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class Span:
+    """Timing of one stage of a request"""
+
+    def __init__(self, stage: str, model: Optional[str], offset_ms: float, attrs: Dict):
+        self.stage = stage
+        self.model = model
+        self.offset_ms = offset_ms
+        self.attrs = attrs
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+
+    def first_token(self):
+        """Mark the first streamed token (time-to-first-token)"""
+        if "ttft_ms" not in self.attrs:
+            self.attrs["ttft_ms"] = round((time.perf_counter() - self._start) * 1000, 1)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 1)
+        output_tokens = self.attrs.get("output_tokens")
+        if output_tokens:
+            # Decode rate excludes the prefill before the first token
+            decode_ms = self.duration_ms - self.attrs.get("ttft_ms", 0.0)
+            if decode_ms > 0:
+                self.attrs["tokens_per_s"] = round(output_tokens / (decode_ms / 1000), 1)
+
+    def to_dict(self) -> Dict:
+        entry = {"stage": self.stage, "offset_ms": self.offset_ms, "duration_ms": self.duration_ms}
+        if self.model:
+            entry["model"] = self.model
+        entry.update(self.attrs)
+        return entry
+
+
+class RequestTrace:
+    """Spans recorded while serving one request (shared by its threads and tasks)"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, model: Optional[str] = None, **attrs):
+        """Time the enclosed block as ``stage``; yields the span for annotations"""
+        span = Span(stage, model, round((time.perf_counter() - self._start) * 1000, 1), attrs)
+        try:
+            yield span
+        finally:
+            span.finish()
+            with self._lock:
+                self.spans.append(span)
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self._start) * 1000, 1)
+
+    def to_dict(self) -> Dict:
+        """Per-stage breakdown plus the individual spans"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.offset_ms)
+        stages: Dict[str, Dict] = {}
+        for span in spans:
+            stage = stages.setdefault(span.stage, {"count": 0, "total_ms": 0.0})
+            stage["count"] += 1
+            stage["total_ms"] = round(stage["total_ms"] + span.duration_ms, 1)
+        return {
+            "total_ms": self.elapsed_ms(),
+            "stages": stages,
+            "spans": [span.to_dict() for span in spans],
+        }
+
+
+class TelemetryRecorder:
+    """Process-wide sink for finished request traces
+
+    Every trace is appended to a size-rotated JSONL file and its spans feed
+    bounded per-(metric, stage, model) reservoirs that the Prometheus
+    endpoint summarizes as quantiles. Generation timeouts and the fallbacks
+    that handled them are exported as counters.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self,
+                 path: Optional[str] = "./logs/metrics.jsonl",
+                 max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 5,
+                 reservoir_size: int = 1024):
+        """
+        Args:
+            path: JSONL metrics file (None disables the file log)
+            max_bytes: Rotate the file once it reaches this size
+            backup_count: Rotated files kept (metrics.jsonl.1 ... .N)
+            reservoir_size: Most recent observations kept per series for quantiles
+        """
+        self.path = path
+        self.reservoir_size = reservoir_size
+        self._series: Dict[Tuple[str, str, str], Deque[float]] = {}
+        self._totals: Dict[Tuple[str, str, str], List[float]] = {}  # [count, sum]
+        self._counters: Dict[Tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+        self._logger: Optional[logging.Logger] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger = logging.getLogger(f"glm.metrics.{id(self)}")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(handler)
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def _observe(self, metric: str, stage: str, model: str, value: float):
+        key = (metric, stage, model or "")
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = deque(maxlen=self.reservoir_size)
+                self._totals[key] = [0, 0.0]
+            series.append(value)
+            self._totals[key][0] += 1
+            self._totals[key][1] += value
+
+    def _count(self, metric: str, stage: str, model: str):
+        key = (metric, stage, model or "")
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def record(self, trace: Dict, routing_info: Optional[Dict] = None):
+        """Log a finished trace (RequestTrace.to_dict()) with its routing metadata"""
+        routing_info = routing_info or {}
+        model = routing_info.get("selected_model", "")
+
+        self._observe("request_duration_ms", "request", model, trace["total_ms"])
+        for span in trace["spans"]:
+            span_model = span.get("model", "")
+            self._observe("stage_duration_ms", span["stage"], span_model, span["duration_ms"])
+            if "ttft_ms" in span:
+                self._observe("time_to_first_token_ms", span["stage"], span_model, span["ttft_ms"])
+            if "tokens_per_s" in span:
+                self._observe("tokens_per_second", span["stage"], span_model, span["tokens_per_s"])
+        for timeout in routing_info.get("timeouts", []):
+            self._count("timeouts_total", timeout.get("stage", "generation"), timeout.get("model", ""))
+            if timeout.get("fallback_model"):
+                self._count("timeout_fallbacks_total", "retry", timeout["fallback_model"])
+
+        if self._logger is not None:
+            entry = {
+                "timestamp": time.time(),
+                "model": model,
+                "mode": routing_info.get("mode"),
+                "domain": routing_info.get("domain"),
+                "subtasks": routing_info.get("subtasks", 0),
+                "fallback_used": routing_info.get("fallback_used", False),
+                "timeouts": routing_info.get("timeouts", []),
+                **trace,
+            }
+            try:
+                self._logger.info(json.dumps(entry, default=str))
+            except Exception as e:
+                print(f"⚠️ Metrics log write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Prometheus export
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _quantile(values: List[float], q: float) -> float:
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def render_prometheus(self) -> str:
+        """Current metrics in the Prometheus text exposition format"""
+        with self._lock:
+            snapshot = {key: (list(series), list(self._totals[key])) for key, series in self._series.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        for metric in sorted({key[0] for key in snapshot}):
+            name = f"glm_{metric}"
+            lines.append(f"# HELP {name} {metric.replace('_', ' ')} per stage and model")
+            lines.append(f"# TYPE {name} summary")
+            for (series_metric, stage, model), (values, (count, total)) in sorted(snapshot.items()):
+                if series_metric != metric:
+                    continue
+                labels = f'stage="{stage}",model="{model}"'
+                for q in self.QUANTILES:
+                    lines.append(f'{name}{{{labels},quantile="{q}"}} {self._quantile(values, q):.3f}')
+                lines.append(f"{name}_sum{{{labels}}} {total:.3f}")
+                lines.append(f"{name}_count{{{labels}}} {int(count)}")
+        for metric in sorted({key[0] for key in counters}):
+            name = f"glm_{metric}"
+            lines.append(f"# HELP {name} {metric.replace('_', ' ')} per stage and model")
+            lines.append(f"# TYPE {name} counter")
+            for (counter_metric, stage, model), value in sorted(counters.items()):
+                if counter_metric == metric:
+                    lines.append(f'{name}{{stage="{stage}",model="{model}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def start_prometheus_server(self, port: int, host: str = "127.0.0.1") -> int:
+        """Serve /metrics on a daemon thread; returns the bound port
+
+        Args:
+            port: Port to listen on (0 picks a free one)
+            host: Interface to bind; the default keeps model names, project
+                request counts and latencies off the network
+        """
+        if self._server is not None:
+            return self._server.server_address[1]
+
+        recorder = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = recorder.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="glm-metrics", daemon=True).start()
+        print(f"📈 Prometheus metrics on http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server.server_address[1]
+
+    def stop_prometheus_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
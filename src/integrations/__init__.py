@@ -1,3 +1,14 @@
-from .hrm_local_wrapper import HRMLocalWrapper, HRMDecomposition, SubTask
+# Exports are resolved on first access (PEP 562) so the orchestrator can be
+# imported without loading torch for the HRM wrapper
+from ..core.lazy_loading import lazy_exports
 
-__all__ = ['HRMLocalWrapper', 'HRMDecomposition', 'SubTask']
\ No newline at end of file
+_EXPORTS = {
+    'HRMLocalWrapper': '.hrm_local_wrapper',
+    'HRMDecomposition': '.hrm_local_wrapper',
+    'SubTask': '.hrm_local_wrapper',
+    'UnifiedCodingAssistant': '.main_orchestrator',
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = list(_EXPORTS)
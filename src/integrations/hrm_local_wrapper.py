@@ -4,7 +4,6 @@ Provides offline hierarchical reasoning for complex audio development tasks
 """
 
 import os
-import re
 import torch
 import logging
 from typing import Dict, List, Optional, Tuple, Union
@@ -63,7 +62,8 @@ class HRMLocalWrapper:
     def __init__(self, 
                  device: str = "auto",
                  model_path: Optional[str] = None,
-                 enable_caching: bool = True):
+                 enable_caching: bool = True,
+                 routing_engine=None):
         """
         Initialize HRM wrapper with MPS optimization for M4 Max
         
@@ -71,6 +71,7 @@ class HRMLocalWrapper:
             device: 'auto', 'mps', 'cpu', or 'cuda'
             model_path: Path to pre-trained HRM model (if available)
             enable_caching: Cache decomposition results
+            routing_engine: Shared RoutingEngine (defaults to the process-wide one)
         """
         self.device = self._setup_device(device)
         self.model = None
@@ -81,6 +82,12 @@ class HRMLocalWrapper:
         # Task classification patterns
         self.patterns = self._initialize_patterns()
         
+        # Precompiled task-type and complexity scan shared with the router
+        if routing_engine is None:
+            from ..core.routing_engine import get_routing_engine
+            routing_engine = get_routing_engine()
+        self.routing_engine = routing_engine
+        
         # Model preferences for different task types
         self.model_preferences = {
             'faust': 'Code Llama (FAUST Specialist)',
@@ -114,44 +121,8 @@ class HRMLocalWrapper:
     
     def _initialize_patterns(self) -> Dict[str, List[str]]:
         """Initialize regex patterns for task classification"""
-        return {
-            'faust': [
-                r'faust\s+(?:code|program|script)',
-                r'dsp\s+(?:algorithm|effect|filter)',
-                r'audio\s+(?:effect|processing|synthesis)',
-                r'(?:create|build|implement).*(?:oscillator|filter|delay|reverb)',
-                r'signal\s+processing',
-                r'frequency\s+(?:domain|analysis)',
-                r'\.dsp\s+file',
-                r'faust\s+library'
-            ],
-            'juce': [
-                r'juce\s+(?:application|plugin|project)',
-                r'(?:vst|au|aax)\s+plugin',
-                r'audio\s+plugin',
-                r'juce\s+(?:component|processor)',
-                r'(?:create|build).*juce.*(?:gui|interface)',
-                r'audio\s+buffer',
-                r'parameter\s+(?:control|automation)',
-                r'plugin\s+wrapper'
-            ],
-            'complex': [
-                r'(?:create|build|develop).*(?:complete|full|entire).*(?:system|application)',
-                r'from\s+scratch',
-                r'(?:design|architect|implement).*(?:framework|engine)',
-                r'integrate.*(?:multiple|various|different)',
-                r'(?:real-time|realtime)\s+(?:audio|processing)',
-                r'(?:end-to-end|full-stack)',
-                r'production\s+ready'
-            ],
-            'analysis': [
-                r'(?:analyze|examine|study|review)',
-                r'(?:compare|evaluate|assess)',
-                r'(?:explain|describe|document)',
-                r'(?:optimize|improve|enhance)',
-                r'(?:debug|troubleshoot|fix)'
-            ]
-        }
+        from ..core.routing_engine import TASK_TYPE_PATTERNS
+        return {task_type: list(patterns) for task_type, patterns in TASK_TYPE_PATTERNS.items()}
     
     def _load_hrm_model(self, model_path: Optional[str] = None):
         """Load HRM model for hierarchical reasoning"""
@@ -259,33 +230,14 @@ class HRMLocalWrapper:
     
     def _analyze_task(self, query: str, context: Optional[Dict] = None) -> Dict:
         """Analyze task complexity and requirements"""
-        query_lower = query.lower()
+        analysis = self.routing_engine.analyze(query)
         
         # Determine primary task type
-        task_types = []
-        for task_type, patterns in self.patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, query_lower):
-                    task_types.append(task_type)
-                    break
-        
+        task_types = list(analysis.task_types)
         primary_type = task_types[0] if task_types else 'general'
         
         # Calculate complexity (1-10 scale)
-        complexity = 1
-        complexity_indicators = {
-            r'simple|basic|quick|easy': 2,
-            r'example|demo|tutorial': 3,
-            r'implement|create|build': 5,
-            r'complex|advanced|sophisticated': 7,
-            r'complete|full|entire|comprehensive': 8,
-            r'system|framework|architecture|engine': 9,
-            r'from scratch|ground up|production|enterprise': 10
-        }
-        
-        for pattern, score in complexity_indicators.items():
-            if re.search(pattern, query_lower):
-                complexity = max(complexity, score)
+        complexity = analysis.task_complexity
         
         # Additional complexity from task type combinations
         if len(task_types) > 1:
@@ -1,52 +1,554 @@
-import ollama
-from chromadb import Client
-from .hrm_integration import HRMOrchestrator
+"""
+Asyncio Orchestration Engine for the Multi-Model Assistant
+Runs routing, retrieval, HRM decomposition and Ollama calls on a single
+event loop so one process can serve many sessions concurrently
+"""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..core.deadlines import Deadline, GenerationTimeout, deadline_scope
+from ..core.orchestration_context import OrchestrationContext
+from ..core.request_context import RequestContext, current_request, request_scope
+
+# Returned by the chunk reader once an async stream is exhausted
+_END_OF_STREAM = object()
 
 
 class UnifiedCodingAssistant:
-    def __init__(self):
-        # HRM for hierarchical reasoning
-        self.hrm = HRMOrchestrator()
+    """
+    Asyncio-native engine behind MultiModelGLMSystem.generate_response
+
+    Blocking work (routing, health checks, model client construction,
+    Chroma retrieval, the SQLite response cache, project file I/O) is
+    pushed to worker threads while Ollama generations use LangChain's
+    aiohttp-based async client. Decomposed HRM subtasks run as asyncio
+    tasks; every generation is admitted by the system's shared request
+    scheduler, which enforces the per-model concurrency limits.
+    """
 
-        # Your existing models via Ollama
-        self.glm_z1 = "JollyLlama/GLM-Z1-32B-0414-Q4_K_M:latest"
-        self.codellama = "codellama:latest"
-        self.deepseek = "deepseek-coder:latest"
+    def __init__(self, system):
+        """
+        Args:
+            system: MultiModelGLMSystem providing models, routing and retrieval
+        """
+        self.system = system
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
 
-        # Knowledge base
-        self.chromadb = Client()
-        self.faust_collection = self.chromadb.get_collection("faust_docs")
-        self.juce_collection = self.chromadb.get_collection("juce_docs")
+    # ------------------------------------------------------------------
+    # Event loop management
+    # ------------------------------------------------------------------
 
-    async def process_request(self, user_request):
-        # Step 1: Analyze with Claude Code agent
-        analysis = await self.analyze_requirements(user_request)
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop thread on first use"""
+        with self._start_lock:
+            if self._loop is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
 
-        # Step 2: HRM hierarchical planning
-        plan = self.hrm.decompose_task(analysis)
+                def run_loop():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
 
-        # Step 3: Route to specialized models
-        results = await self.execute_plan(plan)
+                self._thread = threading.Thread(
+                    target=run_loop, name="orchestrator-loop", daemon=True
+                )
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+        return self._loop
 
-        # Step 4: Validate and test
-        validated = await self.validate_results(results)
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the engine loop and block until it finishes"""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        return future.result(timeout)
 
-        return validated
+    def shutdown(self):
+        """Stop the background event loop"""
+        with self._start_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=5)
+                self._loop = None
+                self._thread = None
 
-    async def execute_plan(self, plan):
-        results = []
-        for subtask in plan.subtasks:
-            if subtask.requires_deep_reasoning:
-                # Use GLM-Z1 for rumination
-                result = ollama.generate(model=self.glm_z1, prompt=subtask.prompt)
-            elif subtask.is_faust_code:
-                # Use CodeLlama with FAUST context
-                context = self.faust_collection.query(subtask.query)
-                result = ollama.generate(
-                    model=self.codellama, prompt=f"{context}\n{subtask.prompt}"
+    def stream_sync(
+        self,
+        chunks: AsyncIterator[str],
+        model_name: str,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[str]:
+        """
+        Iterate an async token stream from a synchronous caller
+
+        Each chunk is awaited on the engine loop. When ``deadline`` expires
+        the pending read is cancelled and the stream closed, which drops the
+        HTTP connection and stops the generation in Ollama; abandoning the
+        iterator closes the stream the same way.
+
+        Raises:
+            GenerationTimeout: When the deadline expires before the stream ends
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("stream_sync would block the engine loop it runs on")
+        loop = self._ensure_loop()
+        iterator = chunks.__aiter__()
+
+        async def next_chunk():
+            timeout = None if deadline is None else deadline.remaining()
+            try:
+                return await asyncio.wait_for(iterator.__anext__(), timeout)
+            except StopAsyncIteration:
+                return _END_OF_STREAM
+
+        try:
+            while True:
+                try:
+                    chunk = asyncio.run_coroutine_threadsafe(next_chunk(), loop).result()
+                except asyncio.TimeoutError:
+                    raise GenerationTimeout(model_name, deadline) from None
+                if chunk is _END_OF_STREAM:
+                    return
+                yield chunk
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                try:
+                    asyncio.run_coroutine_threadsafe(aclose(), loop).result(timeout=5)
+                except Exception as e:
+                    print(f"⚠️ Could not close model stream: {e}")
+
+    @asynccontextmanager
+    async def _model_slot(self, model_name: str, deadline: Optional[Deadline] = None):
+        """Hold a slot of the system's shared request scheduler for one generation
+
+        Raises:
+            GenerationTimeout: When ``deadline`` expires while still queued
+        """
+        request = current_request()
+        timeout = None if deadline is None else deadline.remaining()
+        admitted = False
+        try:
+            async with self.system.scheduler.aslot(
+                model_name, request.session_id, request.on_queue, timeout
+            ) as ticket:
+                admitted = True
+                request.record_queue_wait(ticket.wait_seconds)
+                yield ticket
+        except TimeoutError:
+            if admitted:
+                raise
+            raise GenerationTimeout(model_name, deadline, "queue") from None
+
+    # ------------------------------------------------------------------
+    # Request processing
+    # ------------------------------------------------------------------
+
+    async def process_request(
+        self,
+        prompt: str,
+        selected_model: str = "auto",
+        routing_mode: str = "auto",
+        context: str = "",
+        use_context: bool = True,
+        project_name: str = "Default",
+        chat_history: Optional[List[Tuple[str, str]]] = None,
+        use_hrm_decomposition: bool = True,
+        use_cache: bool = True,
+        conversation_mode: Optional[bool] = None,
+        session_id: str = "default",
+        on_queue: Optional[Callable[[int], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict:
+        """Route and execute a request; same contract as generate_response"""
+        # Tasks and worker threads spawned below inherit this request scope
+        request = RequestContext(
+            use_cache=use_cache, session_id=session_id, on_queue=on_queue,
+            deadline=self.system._request_deadline(timeout),
+        )
+        with request_scope(request):
+            result = await self._process_request(
+                prompt, selected_model, routing_mode, context,
+                use_context, project_name, chat_history, conversation_mode
+            )
+        # Appends to the JSONL log (and may rotate it); keep file I/O off the loop
+        await asyncio.to_thread(self.system._record_telemetry, result["routing"])
+        return result
+
+    async def _process_request(
+        self,
+        prompt: str,
+        selected_model: str,
+        routing_mode: str,
+        context: str,
+        use_context: bool,
+        project_name: str,
+        chat_history: Optional[List[Tuple[str, str]]],
+        conversation_mode: Optional[bool] = None,
+    ) -> Dict:
+        system = self.system
+        try:
+            # Complexity is a cheap regex score; it tells us up front whether
+            # the direct path will run so its retrieval can start immediately
+            will_orchestrate = (
+                routing_mode == "auto" and system._estimate_complexity(prompt) > 0.7
+            )
+
+            # Step 1: HRM analysis, overlapped with context gathering for the direct path
+            analysis_task = asyncio.to_thread(system._analyze_with_hrm, prompt, context)
+            if will_orchestrate:
+                hrm_analysis = await analysis_task
+                prompt_task = None
+            else:
+                prompt_task = asyncio.ensure_future(asyncio.to_thread(
+                    system._gather_prompt_sections, prompt, use_context, project_name, chat_history
+                ))
+                hrm_analysis = await analysis_task
+
+            # Step 2: Determine final model based on routing mode (reads the
+            # health cache and may run the embedding router)
+            final_model, routing_decision = await asyncio.to_thread(
+                system._determine_final_model, prompt, selected_model, routing_mode, hrm_analysis
+            )
+            # Load the routed model while retrieval is still assembling the prompt
+            system._preload_routed_model(final_model, hrm_analysis, routing_mode)
+
+            # Step 3: Execute with chosen model
+            draft_model = (
+                system._draft_model_for(final_model) if routing_mode == "draft_refine" else None
+            )
+            draft = None
+            if system._should_orchestrate(hrm_analysis, routing_mode):
+                if prompt_task is not None:
+                    prompt_task.cancel()
+                response_text = await self.execute_complex(
+                    prompt, hrm_analysis, use_context, project_name, chat_history
+                )
+            elif draft_model:
+                sections = await prompt_task
+                draft, response_text = await self.draft_refine(
+                    prompt, draft_model, final_model, project_name, sections
                 )
             else:
-                # Use DeepSeek for general coding
-                result = ollama.generate(model=self.deepseek, prompt=subtask.prompt)
-            results.append(result)
-        return results
+                sections = await prompt_task if prompt_task is not None else None
+                response_text = await self.achat_with_model(
+                    prompt, final_model, use_context, project_name, chat_history,
+                    sections=sections, conversation_mode=conversation_mode
+                )
+
+            # Step 4: Compile routing metadata
+            routing_info = system._compile_routing_info(
+                routing_mode, final_model, hrm_analysis, routing_decision
+            )
+            if draft_model:
+                routing_info["draft_model"] = draft_model
+            routing_info.update(current_request().routing_stats())
+            result = {
+                "response": response_text,
+                "routing": routing_info,
+            }
+            if draft is not None:
+                result["draft"] = draft
+            return result
+
+        except Exception as e:
+            # Fallback to basic chat
+            fallback_model = await asyncio.to_thread(system._get_fallback_model, selected_model)
+            response_text = await self.achat_with_model(
+                prompt, fallback_model, use_context, project_name, chat_history
+            )
+
+            return {
+                "response": response_text,
+                "routing": {
+                    "mode": "fallback",
+                    "selected_model": fallback_model,
+                    "error": str(e),
+                    "fallback_used": True,
+                    **current_request().routing_stats()
+                }
+            }
+
+    async def achat_with_model(
+        self,
+        question: str,
+        model_name: str,
+        use_context: bool = True,
+        project_name: str = "Default",
+        chat_history: Optional[List[Tuple[str, str]]] = None,
+        sections: Optional[List] = None,
+        retrieval=None,
+        conversation_mode: Optional[bool] = False,
+        template: Optional[str] = None,
+        track_usage: bool = True,
+        raise_errors: bool = False,
+    ) -> str:
+        """Async counterpart of MultiModelGLMSystem.chat_with_model
+        
+        Args:
+            template: Prompt template (defaults to CHAT_PROMPT_TEMPLATE)
+            track_usage: Record the model in the project metadata
+            raise_errors: Raise failures instead of returning them as a
+                "❌ Error" response text
+        """
+        system = self.system
+        try:
+            # The first call imports LangChain and builds the client
+            llm = await asyncio.to_thread(system.get_model_instance, model_name)
+            if not llm:
+                if raise_errors:
+                    raise RuntimeError(f"Model {model_name} is not available")
+                return f"❌ Model {model_name} is not available. Please check if it's installed with 'ollama pull {system.models[model_name]}'"
+
+            if sections is None:
+                sections = await asyncio.to_thread(
+                    system._gather_prompt_sections, question, use_context, project_name,
+                    chat_history, retrieval
+                )
+
+            try:
+                response = await self._generate(
+                    question, model_name, llm, sections, project_name, chat_history,
+                    conversation_mode, template
+                )
+            except GenerationTimeout as e:
+                # The retry streams on the engine loop; drive it from a worker thread
+                response = await asyncio.to_thread(
+                    lambda: "".join(system._stream_timeout_retry(e, question, sections))
+                )
+
+            if track_usage:
+                await asyncio.to_thread(system._track_model_usage, project_name, model_name)
+            return response
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"❌ Async chat error: {e}")
+            return f"❌ Error: {str(e)}\n\nMake sure the model is installed with:\nollama pull {system.models[model_name]}"
+
+    async def _generate(
+        self,
+        question: str,
+        model_name: str,
+        llm,
+        sections: List,
+        project_name: str,
+        chat_history: Optional[List[Tuple[str, str]]],
+        conversation_mode: Optional[bool],
+        template: Optional[str],
+    ) -> str:
+        """One generation under the active request's deadline
+
+        Raises:
+            GenerationTimeout: When the deadline expires; the pending
+                generation is cancelled, closing its connection to Ollama
+        """
+        system = self.system
+        if system._use_conversation_mode(conversation_mode):
+            # /api/chat session turns stream over requests and take their
+            # scheduler slot themselves; run one in a worker thread
+            chunks = await asyncio.to_thread(lambda: list(system._stream_session_chat(
+                question, model_name, sections, project_name, chat_history
+            )))
+            return "".join(chunks)
+        enhanced_prompt, budget = system._assemble_chat_prompt(question, sections, model_name, template)
+
+        cache_key, cached = await asyncio.to_thread(
+            system._lookup_cached_response, model_name, llm, enhanced_prompt
+        )
+        if cached is not None:
+            print(f"⚡ Response cache hit for {model_name}")
+            return cached
+
+        deadline = current_request().generation_deadline()
+        async with self._model_slot(model_name, deadline):
+            with system._model_call_span(model_name, budget) as span:
+                try:
+                    response = await asyncio.wait_for(
+                        llm.ainvoke(enhanced_prompt, **system._model_call_options(model_name, budget)),
+                        None if deadline is None else deadline.remaining(),
+                    )
+                except asyncio.TimeoutError:
+                    raise GenerationTimeout(model_name, deadline) from None
+                span.set(output_tokens=system.prompt_assembler.count_tokens(response, model_name))
+        await asyncio.to_thread(system._store_cached_response, cache_key, model_name, response)
+        return response
+
+    async def draft_refine(
+        self,
+        question: str,
+        draft_model: str,
+        refine_model: str,
+        project_name: str,
+        sections: List,
+    ) -> Tuple[Optional[str], str]:
+        """Async counterpart of _stream_draft_refine; returns (draft, final answer)
+
+        A failed draft is dropped and the refine model answers the plain
+        prompt; a failed refinement leaves the draft as the answer. The draft
+        is None when it failed.
+        """
+        from ..core.multi_model_system import REFINE_PROMPT_TEMPLATE
+
+        system = self.system
+        request = current_request()
+
+        draft_stats = {"model": draft_model, "start_ms": request.trace.elapsed_ms()}
+        try:
+            draft = await self.achat_with_model(
+                question, draft_model, project_name=project_name, sections=sections,
+                track_usage=False, raise_errors=True,
+            )
+            draft_stats["complete_ms"] = request.trace.elapsed_ms()
+            request.record_draft_refine("draft", draft_stats)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Draft with {draft_model} failed, refining from scratch: {e}")
+            draft = None
+
+        refine_sections = sections + [system._draft_section(draft)] if draft else sections
+        refine_stats = {"model": refine_model, "start_ms": request.trace.elapsed_ms()}
+        try:
+            refined = await self.achat_with_model(
+                question, refine_model, project_name=project_name,
+                sections=refine_sections, template=REFINE_PROMPT_TEMPLATE,
+                raise_errors=bool(draft),
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Refinement with {refine_model} failed: {e}")
+            await asyncio.to_thread(system._track_model_usage, project_name, draft_model)
+            return draft, f"{draft}\n\n⚠️ Refinement with {refine_model} failed - this is the {draft_model} draft ({e})"
+        refine_stats["complete_ms"] = request.trace.elapsed_ms()
+        request.record_draft_refine("refine", refine_stats)
+        return draft, refined
+
+    async def execute_complex(
+        self,
+        prompt: str,
+        hrm_analysis: Dict,
+        use_context: bool,
+        project_name: str,
+        chat_history: Optional[List[Tuple[str, str]]],
+    ) -> str:
+        """Async counterpart of _execute_complex_orchestration"""
+        if "hrm_decomposition" in hrm_analysis:
+            return await self.execute_plan(
+                hrm_analysis["hrm_decomposition"], use_context, project_name, chat_history
+            )
+
+        # No decomposition available - the enhanced chat path decides itself
+        return await asyncio.to_thread(
+            self.system.chat_with_model_enhanced,
+            prompt,
+            hrm_analysis.get("recommended_model", "GLM-Z1 (Reasoning & General)"),
+            use_context,
+            project_name,
+            chat_history,
+            True,
+        )
+
+    async def execute_plan(
+        self,
+        hrm_decomposition,
+        use_context: bool,
+        project_name: str,
+        chat_history: Optional[List[Tuple[str, str]]],
+    ) -> str:
+        """Execute an HRM decomposition phase by phase with subtasks as asyncio tasks"""
+        system = self.system
+        results = []
+        context_accumulator = []
+
+        execution_order = system.hrm_wrapper.get_execution_order(hrm_decomposition)
+        subtasks_by_id = {st.id: st for st in hrm_decomposition.subtasks}
+
+        print(f"📋 Processing {len(hrm_decomposition.subtasks)} HRM subtasks (async)")
+
+        # Project context and retrieval shared by the subtasks
+        orchestration = OrchestrationContext(hrm_decomposition.original_query, project_name)
+
+        for phase, task_ids in enumerate(execution_order, 1):
+            tasks = []
+            for task_id in task_ids:
+                subtask = subtasks_by_id[task_id]
+                enhanced_prompt = system._build_hrm_prompt(
+                    subtask, hrm_decomposition, context_accumulator
+                )
+                tasks.append(asyncio.ensure_future(self._run_subtask(
+                    subtask, enhanced_prompt, phase, use_context, project_name,
+                    chat_history, orchestration
+                )))
+
+            # gather preserves task order, so merging stays deterministic
+            phase_results = await asyncio.gather(*tasks)
+
+            for result_entry in phase_results:
+                results.append(result_entry)
+                if result_entry.get('error'):
+                    continue
+                subtask_result = result_entry['result']
+                context_accumulator.append(f"Subtask {result_entry['subtask_id']}: {result_entry['description']}")
+                context_accumulator.append(f"Result: {subtask_result[:300]}{'...' if len(subtask_result) > 300 else ''}")
+
+            print(f"✅ Phase {phase} completed ({len([r for r in phase_results if not r.get('error')])}/{len(task_ids)} successful)")
+
+        await asyncio.to_thread(system._finish_orchestration, orchestration)
+
+        with current_request().trace.span("synthesis"):
+            return system._synthesize_hrm_results(hrm_decomposition, results)
+
+    async def _run_subtask(
+        self,
+        subtask,
+        enhanced_prompt: str,
+        phase: int,
+        use_context: bool,
+        project_name: str,
+        chat_history: Optional[List[Tuple[str, str]]],
+        orchestration: OrchestrationContext,
+    ) -> Dict:
+        """Run one subtask and package its result entry"""
+        result_entry = {
+            'subtask_id': subtask.id,
+            'description': subtask.description,
+            'model': subtask.model_preference,
+            'complexity': subtask.complexity,
+            'phase': phase
+        }
+
+        try:
+            with deadline_scope(self.system.subtask_timeout, "subtask"):
+                sections = await asyncio.to_thread(
+                    self.system._subtask_prompt_sections, subtask, orchestration, use_context, chat_history
+                )
+                result_entry['result'] = await self.achat_with_model(
+                    enhanced_prompt,
+                    subtask.model_preference,
+                    use_context,
+                    project_name,
+                    chat_history,
+                    sections=sections,
+                    track_usage=False
+                )
+            if not result_entry['result'].startswith("❌"):
+                orchestration.record_model_usage(subtask.model_preference)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"     ❌ {subtask.id} failed: {e}")
+            result_entry['result'] = f"Error processing subtask: {e}"
+            result_entry['error'] = True
+
+        return result_entry
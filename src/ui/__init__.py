@@ -1,19 +1,16 @@
-from .editor_ui import EditorUI
-from .file_editor import FileEditor
-from .file_browser import FileBrowser
-from .ui_components import (
-    render_project_management,
-    render_model_selection,
-    render_sidebar,
-    render_chat_interface,
-)
+# Exports are resolved on first access (PEP 562)
+from ..core.lazy_loading import lazy_exports
 
-__all__ = [
-    'EditorUI',
-    'FileEditor', 
-    'FileBrowser',
-    'render_project_management',
-    'render_model_selection',
-    'render_sidebar',
-    'render_chat_interface'
-]
\ No newline at end of file
+_EXPORTS = {
+    'EditorUI': '.editor_ui',
+    'FileEditor': '.file_editor',
+    'FileBrowser': '.file_browser',
+    'render_project_management': '.ui_components',
+    'render_model_selection': '.ui_components',
+    'render_sidebar': '.ui_components',
+    'render_chat_interface': '.ui_components',
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = list(_EXPORTS)
@@ -365,9 +365,18 @@ Please provide the complete modified file content. Only return the code/content,
 
         with st.spinner(f"🤖 {model_name} is analyzing and modifying your file..."):
             try:
-                response = self.multi_glm_system.chat_with_model_enhanced(
+                # Stream the model output so progress is visible while it generates
+                preview = st.empty()
+                response_parts = []
+                for chunk in self.multi_glm_system.stream_chat_with_model_enhanced(
                     enhanced_prompt, model_name, use_context, project_name, use_hrm_decomposition=True
-                )
+                ):
+                    response_parts.append(chunk)
+                    preview.code(
+                        "".join(response_parts), language=file_data["language"]
+                    )
+                response = "".join(response_parts)
+                preview.empty()
 
                 # Extract code from response (remove markdown code blocks if present)
                 ai_content = self.extract_code_from_response(
@@ -1,4 +1,6 @@
 import streamlit as st
+import queue
+import threading
 from pathlib import Path
 from ..core.prompts import MODEL_INFO, FAUST_QUICK_PROMPTS
 import re
@@ -281,7 +283,8 @@ def render_model_selection(glm_system):
         with col1:
             routing_mode = st.radio(
                 "Routing Mode",
-                ["🚀 Auto (HRM Decides)", "🎯 Manual Selection", "💡 Assisted (See Recommendations)"],
+                ["🚀 Auto (HRM Decides)", "🎯 Manual Selection", "💡 Assisted (See Recommendations)",
+                 "⚡ Draft + Refine (Fast Preview)"],
                 index=0,
                 help="Choose how models are selected for your tasks"
             )
@@ -294,22 +297,27 @@ def render_model_selection(glm_system):
             )
             
             # HRM Debug Mode
-            hrm_wrapper = getattr(glm_system, 'hrm_wrapper', None)
-            if hrm_wrapper:
-                debug_hrm = st.checkbox(
-                    "🔍 HRM Debug Mode",
-                    value=False,
-                    help="Show HRM task decomposition details in responses",
-                    key="hrm_debug_mode"
-                )
-            else:
-                debug_hrm = False
+            debug_hrm = st.checkbox(
+                "🔍 HRM Debug Mode",
+                value=False,
+                help="Show HRM task decomposition details in responses",
+                key="hrm_debug_mode"
+            )
+            
+            # Conversation session mode - Ollama reuses the cached conversation prefix
+            st.checkbox(
+                "💬 Conversation Session",
+                value=getattr(glm_system, 'conversation_mode', False),
+                help="Continue one chat session per project and model so earlier turns aren't re-processed",
+                key="conversation_session_mode"
+            )
         
         # Convert routing mode to simple string
         routing_mode_map = {
             "🚀 Auto (HRM Decides)": "auto",
             "🎯 Manual Selection": "manual", 
-            "💡 Assisted (See Recommendations)": "assisted"
+            "💡 Assisted (See Recommendations)": "assisted",
+            "⚡ Draft + Refine (Fast Preview)": "draft_refine"
         }
         routing_mode_key = routing_mode_map[routing_mode]
         
@@ -330,13 +338,20 @@ def render_model_selection(glm_system):
             selected_model = "auto"
             if routing_mode == "🚀 Auto (HRM Decides)":
                 hrm_status = "🧠 HRM will analyze your request and route to the optimal model automatically"
-                if getattr(glm_system, 'hrm_wrapper', None):
-                    device = getattr(glm_system.hrm_wrapper, 'device', 'unknown')
+                # Only report the device once the HRM model has been loaded
+                hrm_wrapper = glm_system.loaded_component('hrm_wrapper')
+                if hrm_wrapper:
+                    device = getattr(hrm_wrapper, 'device', 'unknown')
                     if device == 'mps':
                         hrm_status += " ⚡ (M4 Max MPS acceleration)"
                     elif device == 'cuda':
                         hrm_status += " 🚀 (CUDA acceleration)"
                 st.info(hrm_status)
+            elif routing_mode == "⚡ Draft + Refine (Fast Preview)":
+                st.info(
+                    f"⚡ {getattr(glm_system, 'draft_model', 'A fast model')} drafts an answer within seconds, "
+                    "then the routed large model refines it and replaces the draft"
+                )
             else:  # Assisted mode
                 st.info("💡 HRM will analyze your request and show recommendations, but you can override")
         
@@ -502,7 +517,8 @@ def render_model_status(glm_system):
     
     # HRM Status Section
     st.write("**🧠 HRM Integration:**")
-    hrm_wrapper = getattr(glm_system, 'hrm_wrapper', None)
+    # Status rendering never triggers loading the HRM model
+    hrm_wrapper = glm_system.loaded_component('hrm_wrapper')
     if hrm_wrapper:
         # Display HRM device status
         device = getattr(hrm_wrapper, 'device', 'unknown')
@@ -532,23 +548,53 @@ def render_model_status(glm_system):
             st.write("**Device:** " + device.upper())
             st.write("**Caching:** Enabled" if getattr(hrm_wrapper, 'enable_caching', False) else "Disabled")
     else:
-        st.error("❌ HRM not initialized")
+        st.info("⏳ HRM model loading in the background")
     
     st.write("---")
     
     # Ollama Model Status
     st.write("**🤖 Ollama Models:**")
+    residency = getattr(glm_system, 'residency_manager', None)
+    pinned = residency.pinned_models() if residency else []
+    # Cached tags/ps probe - rendering never generates test completions
+    health_status = glm_system.check_model_availability()
     for model_name, model_id in glm_system.models.items():
         try:
-            if model_name in glm_system._model_instances:
-                st.success(f"✅ {model_name}")
+            if "❌" in health_status.get(model_name, ""):
+                st.error(f"❌ {model_name} (not installed)")
+            elif residency and residency.is_hot(model_name):
+                pin_label = " 📌 pinned" if model_name in pinned else ""
+                st.success(f"🔥 {model_name} (loaded){pin_label}")
+            elif model_name in glm_system._model_instances:
+                st.info(f"✅ {model_name} (idle)")
             else:
                 st.info(f"💤 {model_name} (not loaded)")
         except:
             st.error(f"❌ {model_name}")
 
+    if residency:
+        residency_status = residency.get_status()
+        st.caption(
+            f"💾 Resident: {residency_status['resident_gb']:.1f} / "
+            f"{residency_status['ram_budget_gb']:.0f} GB budget"
+        )
+
+    health_monitor = getattr(glm_system, 'health_monitor', None)
+    refresh_age = health_monitor.last_refresh_age() if health_monitor else None
+    if refresh_age is not None:
+        st.caption(f"🩺 Ollama status checked {refresh_age:.0f}s ago")
+
+    scheduler = getattr(glm_system, 'scheduler', None)
+    if scheduler:
+        scheduler_stats = scheduler.get_stats()
+        queued = sum(scheduler_stats['queued'].values())
+        st.caption(
+            f"🚦 Generations: {scheduler_stats['in_flight']} / {scheduler_stats['max_in_flight']} running, "
+            f"{queued} queued across {scheduler_stats['sessions']} active session(s)"
+        )
+
     if st.button("🔍 Check Model Availability"):
-        status = glm_system.check_model_availability()
+        status = glm_system.check_model_availability(force_refresh=True)
         for model_name, status_text in status.items():
             if "✅" in status_text:
                 st.success(f"{status_text} {model_name}")
@@ -638,6 +684,8 @@ def render_chat_input(
                 st.success(f"📚 KB: {kb_status['document_count']} docs")
             elif kb_status["status"] == "⚠️ Empty":
                 st.warning("📚 KB: Empty")
+            elif kb_status["status"] == "⏳ Loading":
+                st.info("📚 KB: Loading...")
             else:
                 st.error("📚 KB: Error")
 
@@ -740,19 +788,26 @@ def render_chat_input(
                                     f"  {i}. {prev_q[:80]}{'...' if len(prev_q) > 80 else ''}"
                                 )
 
-                # Call model with hybrid routing system
-                response_data = glm_system.generate_response(
+                # Route the request; tokens are streamed below as they arrive
+                queue_feedback = QueuePositionFeedback(st.empty())
+                response_stream = glm_system.stream_response(
                     prompt=question,
                     selected_model=selected_model,
                     routing_mode=routing_mode,
                     use_context=use_context,
                     project_name=selected_project,
                     chat_history=current_history,  # PASS CHAT HISTORY
-                    use_hrm_decomposition=True
+                    use_hrm_decomposition=True,
+                    conversation_mode=st.session_state.get("conversation_session_mode", False),
+                    session_id=st.session_state.get("scheduler_session_id", "default"),
+                    on_queue=queue_feedback
                 )
-                
-                response = response_data["response"]
-                routing_info = response_data.get("routing", {})
+                routing_info = response_stream.routing
+
+            model_label = routing_info.get("selected_model", selected_model)
+            if routing_info.get("draft_model"):
+                model_label += f" (draft: {routing_info['draft_model']})"
+            response = render_response_stream(response_stream, model_label, queue_feedback)
 
             # Add to chat history
             st.session_state[chat_key].append((question, response))
@@ -784,12 +839,67 @@ def render_chat_input(
                                 "mode": routing_info.get('mode', ''),
                             })
                     
-                    if routing_info.get('fallback_used'):
+                    timeouts = routing_info.get('timeouts', [])
+                    if routing_info.get('fallback_used') and not timeouts:
                         st.warning(f"⚠️ Fallback used: {routing_info.get('routing_reason')}")
-                        
+                    for timeout in timeouts:
+                        handled = (
+                            f"{timeout.get('strategy')} on {timeout['fallback_model']}"
+                            if timeout.get('fallback_model') else "no fallback left"
+                        )
+                        st.warning(
+                            f"⏱️ {timeout.get('model')} hit its {timeout.get('deadline')} deadline "
+                            f"({timeout.get('deadline_s', 0):.0f}s, {timeout.get('stage')}) - {handled}"
+                        )
+                    
+                    if routing_info.get('cache_hits') or routing_info.get('cache_misses'):
+                        st.caption(
+                            f"⚡ Response cache: {routing_info.get('cache_hits', 0)} hit(s), "
+                            f"{routing_info.get('cache_misses', 0)} miss(es)"
+                        )
+
+                    prompt_tokens = routing_info.get('prompt_tokens')
+                    if prompt_tokens:
+                        breakdown = ", ".join(
+                            f"{name} {tokens}" for name, tokens in prompt_tokens.get('sections', {}).items()
+                        )
+                        st.caption(
+                            f"🧮 Prompt: {prompt_tokens.get('total', 0)} tokens "
+                            f"(num_ctx {prompt_tokens.get('num_ctx', '?')}) - {breakdown}"
+                        )
+
+                    conversation = routing_info.get('conversation')
+                    if conversation:
+                        st.caption(
+                            f"💬 Session turn {conversation.get('turns', 0)}: "
+                            f"{conversation.get('prefilled_tokens', 0)} token(s) prefilled, "
+                            f"{conversation.get('session_tokens', 0)} from the cached conversation"
+                        )
+
+                    draft_refine = routing_info.get('draft_refine')
+                    if draft_refine:
+                        phases = []
+                        for phase, label in (("draft", "Draft"), ("refine", "Refined")):
+                            info = draft_refine.get(phase)
+                            if info:
+                                first = info.get('first_token_ms')
+                                first_text = f"first token {first / 1000:.1f}s, " if first is not None else ""
+                                phases.append(
+                                    f"{label} by {info.get('model')}: {first_text}"
+                                    f"done {info.get('complete_ms', 0) / 1000:.1f}s"
+                                )
+                        st.caption("⚡ " + " | ".join(phases))
+
+                    telemetry = routing_info.get('telemetry')
+                    if telemetry and telemetry.get('stages'):
+                        stages = ", ".join(
+                            f"{name} {stage['total_ms']:.0f}ms" for name, stage in telemetry['stages'].items()
+                        )
+                        st.caption(f"⏱️ Timing: {telemetry.get('total_ms', 0):.0f}ms total - {stages}")
+
                     # HRM device status in debug mode
                     if debug_hrm:
-                        hrm_wrapper = getattr(glm_system, 'hrm_wrapper', None)
+                        hrm_wrapper = glm_system.loaded_component('hrm_wrapper')
                         if hrm_wrapper:
                             device = getattr(hrm_wrapper, 'device', 'unknown')
                             st.write(f"**🖥️ HRM Device:** {device.upper()}")
@@ -798,13 +908,86 @@ def render_chat_input(
 
             # Save to project file  
             actual_model_used = routing_info.get('selected_model', selected_model) if routing_info else selected_model
-            glm_system.project_manager.save_chat_to_project(
+            glm_system.save_exchange(
                 selected_project, actual_model_used, question, response
             )
 
             st.rerun()
 
 
+class QueuePositionFeedback:
+    """on_queue callback showing a request's position in the shared model queue
+
+    Streamed generations wait for their slot on the script thread and are
+    shown right away. HRM subtasks wait on phase executor threads, which have
+    no Streamlit script context (Streamlit drops calls made from them), so
+    their updates are queued and shown when the render loop calls drain() on
+    the stream's keep-alive chunks.
+    """
+
+    def __init__(self, placeholder):
+        self.placeholder = placeholder
+        self._script_thread = threading.current_thread()
+        self._updates = queue.SimpleQueue()
+
+    def __call__(self, position):
+        if threading.current_thread() is self._script_thread:
+            self._show(position)
+        else:
+            self._updates.put(position)
+
+    def drain(self):
+        """Show the latest position reported from another thread (script thread only)"""
+        latest = None
+        while True:
+            try:
+                latest = self._updates.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None:
+            self._show(latest)
+
+    def _show(self, position):
+        if position:
+            self.placeholder.info(f"🚦 Other sessions are using the model - you are #{position} in the queue")
+        else:
+            self.placeholder.empty()
+
+
+def render_response_stream(response_stream, model_label, queue_feedback=None):
+    """Render streamed model output incrementally and return the full text
+
+    Args:
+        queue_feedback: QueuePositionFeedback passed as the request's on_queue,
+            drained on every chunk, including empty keep-alive chunks
+    """
+    st.markdown(f"**🤖 {model_label}:**")
+    draft_area = st.empty()
+    placeholder = st.empty()
+    placeholder.info(f"⏳ Waiting for {model_label}...")
+
+    drafts_shown = 0
+    for chunk in response_stream:
+        if queue_feedback is not None:
+            queue_feedback.drain()
+        if not chunk:
+            continue  # keep-alive, no new text
+        if len(response_stream.drafts) > drafts_shown:
+            # A refined answer replaces the draft; keep the draft collapsed above it
+            drafts_shown = len(response_stream.drafts)
+            with draft_area.container():
+                with st.expander("⚡ Quick draft (replaced by the refined answer)"):
+                    st.markdown(response_stream.draft)
+        placeholder.markdown(response_stream.text + "▌")
+
+    response = response_stream.text
+    placeholder.markdown(response)
+    if queue_feedback is not None:
+        queue_feedback.drain()
+        queue_feedback(0)
+    return response
+
+
 def render_recent_conversations(chat_history, selected_model):
     """Render recent conversations section"""
     # Display recent chat (last 5 exchanges) - collapsible
@@ -967,20 +1150,27 @@ def render_faust_quick_actions(
         for i, (button_text, question) in enumerate(faust_actions):
             with [col1, col2, col3][i]:
                 if st.button(button_text):
-                    with st.spinner("Generating code..."):
+                    with st.spinner("Routing request..."):
                         # Use hybrid routing for FAUST actions - favor Code Llama for FAUST tasks
-                        response_data = glm_system.generate_response(
+                        queue_feedback = QueuePositionFeedback(st.empty())
+                        response_stream = glm_system.stream_response(
                             prompt=question,
                             selected_model="Code Llama (FAUST Specialist)" if routing_mode == "auto" else selected_model,
                             routing_mode="auto",  # Always use auto for FAUST quick actions
                             use_context=use_context,
                             project_name=selected_project,
                             chat_history=st.session_state.get(chat_key, []),
-                            use_hrm_decomposition=True
+                            use_hrm_decomposition=True,
+                            session_id=st.session_state.get("scheduler_session_id", "default"),
+                            on_queue=queue_feedback
                         )
-                        
-                        response = response_data["response"]
-                        routing_info = response_data.get("routing", {})
+                        routing_info = response_stream.routing
+
+                    response = render_response_stream(
+                        response_stream,
+                        routing_info.get("selected_model", selected_model),
+                        queue_feedback,
+                    )
 
                     st.session_state[chat_key].append((question, response))
                     
@@ -989,7 +1179,7 @@ def render_faust_quick_actions(
                         st.success(f"🎵 FAUST specialist routing: {routing_info.get('selected_model')}")
                     
                     actual_model_used = routing_info.get('selected_model', selected_model) if routing_info else selected_model
-                    glm_system.project_manager.save_chat_to_project(
+                    glm_system.save_exchange(
                         selected_project, actual_model_used, question, response
                     )
                     st.rerun()
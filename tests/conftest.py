@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Shared test helpers
+Plain functions rather than fixtures, so the script-style runners
+(``python tests/test_x.py``) can use them as well as pytest
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def in_tmp_dir(test):
+    """Run ``test`` with a temporary working directory (./projects, ./cache ...)"""
+    def wrapper():
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                test()
+            finally:
+                os.chdir(cwd)
+    wrapper.__name__ = test.__name__
+    return wrapper
+
+
+def make_system(tmp: str = ".", models: Optional[Dict] = None, track_usage: bool = False):
+    """
+    MultiModelGLMSystem serving fake models, without Ollama
+
+    Args:
+        tmp: Directory the system creates its working directories in
+        models: Display name -> fake LLM returned by get_model_instance
+        track_usage: Keep recording model usage in the project metadata
+
+    Returns:
+        The system; background health probing is stopped and every model
+        counts as available
+    """
+    from src.core.multi_model_system import MultiModelGLMSystem
+
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    try:
+        system = MultiModelGLMSystem()
+    finally:
+        os.chdir(cwd)
+    system.health_monitor.stop_background_refresh()
+    system.health_monitor.is_available = lambda model_name: True
+    system._model_instances = dict(models or {})
+    if not track_usage:
+        system._track_model_usage = lambda project_name, model_name: None
+    return system
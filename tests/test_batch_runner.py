@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for the headless batch runner
+A fake system stands in for MultiModelGLMSystem; no Ollama needed
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.cli.batch import BatchRunner, completed_ids, load_prompts, resolve_model_name
+from src.cli.__main__ import build_parser
+
+MODELS = {
+    "GLM-Z1 (Reasoning & General)": {},
+    "DeepSeek Coder (Fast DSP)": {},
+    "Qwen 2.5 Coder (Balanced)": {},
+}
+
+
+class FakeSystem:
+    """generate_response that records calls and tracks concurrency"""
+
+    def __init__(self, fail=(), delay=0.0):
+        self.fail = set(fail)
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate_response(self, question, **options):
+        with self._lock:
+            self.calls.append((question, options))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if question in self.fail:
+                return {"response": "❌ Error with model: connection refused", "routing": {}}
+            return {
+                "response": f"answer to {question}",
+                "routing": {
+                    "selected_model": "DeepSeek Coder (Fast DSP)",
+                    "queue_wait_ms": 2.0,
+                    "telemetry": {"total_ms": 12.0, "stages": {"retrieval": {"count": 1, "total_ms": 4.0}}},
+                },
+            }
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def write_lines(path, lines):
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def read_records(path):
+    return [json.loads(line) for line in Path(path).read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def test_load_prompts():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "prompts.jsonl"
+        write_lines(path, [
+            "# comment",
+            json.dumps({"id": "reverb", "prompt": "FAUST reverb", "model": "glm", "project": "Synth", "tag": "dsp"}),
+            "",
+            "plain text prompt",
+        ])
+        items = load_prompts(str(path), {"routing_mode": "auto", "use_cache": False})
+
+        assert [item.id for item in items][0] == "reverb"
+        assert items[0].options == {
+            "routing_mode": "auto", "use_cache": False, "selected_model": "glm", "project_name": "Synth",
+        }
+        assert items[0].metadata == {"tag": "dsp"}
+        assert items[1].prompt == "plain text prompt"
+        # Generated ids are stable between loads
+        assert items[1].id == load_prompts(str(path))[1].id
+
+        write_lines(path, [json.dumps({"id": "a", "prompt": "x"}), json.dumps({"id": "a", "prompt": "y"})])
+        try:
+            load_prompts(str(path))
+            raise AssertionError("duplicate ids should be rejected")
+        except ValueError as e:
+            assert "duplicate" in str(e)
+
+
+def test_run_and_resume():
+    with tempfile.TemporaryDirectory() as tmp:
+        prompts = Path(tmp) / "prompts.txt"
+        output = Path(tmp) / "out" / "results.jsonl"
+        write_lines(prompts, ["one", "two", "broken", "three"])
+        items = load_prompts(str(prompts), {"routing_mode": "auto"})
+
+        system = FakeSystem(fail={"broken"})
+        summary = BatchRunner(system, str(output), concurrency=2).run(items, progress=None)
+        assert summary["ok"] == 3 and summary["errors"] == 1 and summary["skipped"] == 0
+        assert summary["models"] == {"DeepSeek Coder (Fast DSP)": 3}
+
+        records = {record["id"]: record for record in read_records(output)}
+        ok = records[items[0].id]
+        assert ok["status"] == "ok" and ok["response"] == "answer to one"
+        assert "telemetry" not in ok["routing"]
+        assert ok["timings"]["stages"] == {"retrieval": 4.0}
+        assert ok["timings"]["queue_wait_ms"] == 2.0
+        assert records[items[2].id]["status"] == "error"
+        assert all(options["session_id"] == "batch" for _, options in system.calls)
+
+        # A rerun skips everything already recorded
+        system = FakeSystem()
+        summary = BatchRunner(system, str(output)).run(items, progress=None)
+        assert summary["skipped"] == 4 and not system.calls
+
+        # --retry-errors reruns only the failed prompt
+        summary = BatchRunner(system, str(output), retry_errors=True).run(items, progress=None)
+        assert [question for question, _ in system.calls] == ["broken"]
+        assert completed_ids(str(output), retry_errors=True) == {item.id for item in items}
+
+
+def test_partial_line_from_interrupted_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        prompts = Path(tmp) / "prompts.txt"
+        output = Path(tmp) / "results.jsonl"
+        write_lines(prompts, ["one", "two"])
+        items = load_prompts(str(prompts))
+
+        # The first record made it to disk; the second was cut off mid-write
+        first = {"id": items[0].id, "status": "ok", "response": "done"}
+        output.write_text(json.dumps(first) + "\n" + '{"id": "' + items[1].id + '", "sta', encoding="utf-8")
+
+        system = FakeSystem()
+        summary = BatchRunner(system, str(output)).run(items, progress=None)
+        assert summary["skipped"] == 1 and [q for q, _ in system.calls] == ["two"]
+
+        lines = output.read_text(encoding="utf-8").splitlines()
+        assert json.loads(lines[-1])["id"] == items[1].id
+        assert completed_ids(str(output)) == {items[0].id, items[1].id}
+
+
+def test_concurrency_cap():
+    with tempfile.TemporaryDirectory() as tmp:
+        prompts = Path(tmp) / "prompts.txt"
+        write_lines(prompts, [f"prompt {i}" for i in range(8)])
+        system = FakeSystem(delay=0.05)
+        BatchRunner(system, str(Path(tmp) / "results.jsonl"), concurrency=3).run(
+            load_prompts(str(prompts)), progress=None
+        )
+        assert len(system.calls) == 8
+        assert 1 < system.peak <= 3
+
+
+def test_resolve_model_name():
+    assert resolve_model_name(MODELS, "GLM-Z1 (Reasoning & General)") == "GLM-Z1 (Reasoning & General)"
+    assert resolve_model_name(MODELS, "deepseek") == "DeepSeek Coder (Fast DSP)"
+    for name in ("coder", "llama"):
+        try:
+            resolve_model_name(MODELS, name)
+            raise AssertionError(f"{name!r} should be ambiguous or unknown")
+        except ValueError:
+            pass
+
+
+def test_cli_arguments():
+    args = build_parser().parse_args([
+        "batch", "prompts.jsonl", "--model-limit", "glm=1", "--model-limit", "deepseek=2",
+        "--max-in-flight", "3", "--no-warm-up", "--timeout", "120",
+    ])
+    assert args.model_limit == ["glm=1", "deepseek=2"]
+    assert args.max_in_flight == 3 and args.timeout == 120.0
+    assert not args.warm_up and args.concurrency == 2
+
+
+if __name__ == "__main__":
+    test_load_prompts()
+    test_run_and_resume()
+    test_partial_line_from_interrupted_run()
+    test_concurrency_cap()
+    test_resolve_model_name()
+    test_cli_arguments()
+    print("✅ Batch runner tests passed")
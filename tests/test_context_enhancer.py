@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Tests for batched multi-query retrieval in ContextEnhancer
+Fake embeddings and Chroma collection; no langchain or Chroma needed
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.context_enhancer import (
+    FAUST_EXPANSION_TERMS,
+    MMR_FETCH_FACTOR,
+    ContextEnhancer,
+    RetrievedChunk,
+    enhance_vectorstore_retrieval,
+    fuse_ranked_results,
+)
+from src.core.index_generation import IndexGeneration
+from src.core.lexical_index import LexicalIndex
+from src.core.request_context import RequestContext, request_scope
+from src.core.retrieval_context import RetrievalContext
+
+QUERY = "Create a FAUST reverb with early reflections"
+
+# Each text embeds to a fixed point; documents sit near the texts they answer
+VECTORS = {
+    QUERY: [1.0, 0.0],
+    "faust": [0.0, 1.0],
+    "dsp": [0.0, 1.0],
+    "signal processing": [0.0, 1.0],
+    "audio effect": [0.0, 1.0],
+    "juce": [0.0, 1.0],
+    "audio processor": [0.0, 1.0],
+    "plugin development": [0.0, 1.0],
+}
+DOCS = {
+    "reverb docs": [1.0, 0.1],
+    "early reflections": [0.9, 0.3],
+    "faust basics": [0.1, 1.0],
+    "unrelated": [-5.0, -5.0],
+}
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return VECTORS[text]
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [VECTORS[text] for text in texts]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.queries = []
+
+    def query(self, query_embeddings, n_results, include):
+        self.queries.append(len(query_embeddings))
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": []}
+        for embedding in query_embeddings:
+            hits = sorted(
+                (sum((a - b) ** 2 for a, b in zip(embedding, vector)), content)
+                for content, vector in DOCS.items()
+            )[:n_results]
+            # Chunk ids are their texts here
+            results["ids"].append([content for _, content in hits])
+            results["documents"].append([content for _, content in hits])
+            results["metadatas"].append([{"source": content} for _, content in hits])
+            results["distances"].append([distance for distance, _ in hits])
+            results["embeddings"].append([DOCS[content] for _, content in hits])
+        return results
+
+    def get(self, ids, include):
+        found = [doc_id for doc_id in ids if doc_id in DOCS]
+        return {
+            "ids": found,
+            "documents": found,
+            "metadatas": [{"source": doc_id} for doc_id in found],
+            "embeddings": [DOCS[doc_id] for doc_id in found],
+        }
+
+
+class FakeVectorstore:
+    def __init__(self, with_collection=True):
+        self.embeddings = FakeEmbeddings()
+        self.searches = []
+        if with_collection:
+            self._collection = FakeCollection()
+
+    def similarity_search_by_vector(self, embedding, k):
+        self.searches.append(k)
+        return [SimpleNamespace(page_content=content, metadata={}) for content in DOCS][:k]
+
+
+class Enhancer(ContextEnhancer):
+    """Ranks by relevance only unless a test is about diversity"""
+
+    def __init__(self, vectorstore, mmr_lambda=1.0, **kwargs):
+        super().__init__(vectorstore, mmr_lambda=mmr_lambda, **kwargs)
+
+    @staticmethod
+    def _to_document(content, metadata):
+        return SimpleNamespace(page_content=content, metadata=metadata or {})
+
+
+def test_one_chroma_query_per_retrieval():
+    vectorstore = FakeVectorstore()
+    enhancer = Enhancer(vectorstore)
+
+    for _ in range(3):
+        with request_scope(RequestContext(use_cache=False)):
+            docs = enhancer._retrieve_faust_context(QUERY, 3)
+        assert [doc.page_content for doc in docs] == ["reverb docs", "early reflections", "faust basics"]
+
+    # Every retrieval is a single query with 1 + 4 embeddings and no per-term searches
+    assert vectorstore._collection.queries == [5, 5, 5]
+    assert vectorstore.searches == []
+    # Expansion terms are embedded once, as one batch; the query once per request
+    term_batches = [call for call in vectorstore.embeddings.calls if call != [QUERY]]
+    assert term_batches == [list(FAUST_EXPANSION_TERMS)]
+    assert vectorstore.embeddings.calls.count([QUERY]) == 3
+
+
+def test_overlapping_chunks_are_reranked_for_diversity():
+    DOCS["reverb docs, overlapping chunk"] = [1.0, 0.1]
+    try:
+        vectorstore = FakeVectorstore()
+        with request_scope(RequestContext(use_cache=False)) as request:
+            relevance_only = Enhancer(vectorstore)._retrieve_faust_context(QUERY, 2)
+            diverse = Enhancer(vectorstore, mmr_lambda=0.5)._retrieve_faust_context(QUERY, 2)
+        # The same text under two ids would take both slots on relevance alone
+        assert [doc.page_content for doc in relevance_only] == ["reverb docs", "reverb docs, overlapping chunk"]
+        assert [doc.page_content for doc in diverse] == ["reverb docs", "faust basics"]
+        # Candidates were fetched with their embeddings: max_docs * 3 per query vector, one call each
+        assert vectorstore._collection.queries == [5, 5]
+        assert any(span.stage == "mmr" and span.attrs["candidates"] == 5 for span in request.trace.spans)
+    finally:
+        del DOCS["reverb docs, overlapping chunk"]
+
+
+def test_term_hits_are_cached_per_index_generation():
+    vectorstore = FakeVectorstore()
+    generation = IndexGeneration()
+    enhancer = Enhancer(vectorstore, index_generation=generation)
+
+    def retrieve():
+        with request_scope(RequestContext(use_cache=False)):
+            return [doc.page_content for doc in enhancer._retrieve_faust_context(QUERY, 3)]
+
+    assert retrieve() == retrieve() == retrieve()
+    # Only the user's query is searched live once the term hits are cached
+    assert vectorstore._collection.queries == [5, 1, 1]
+
+    # A new document invalidates the cached hits
+    DOCS["faust tutorial"] = [0.0, 1.0]
+    try:
+        generation.bump()
+        retrieve()
+        assert vectorstore._collection.queries == [5, 1, 1, 5]
+        _, hits = enhancer._term_hits[("faust", 3 * MMR_FETCH_FACTOR)]
+        assert hits[0].id == "faust tutorial"
+    finally:
+        del DOCS["faust tutorial"]
+
+    # A different k is a different result set
+    with request_scope(RequestContext(use_cache=False)):
+        enhancer._retrieve_faust_context(QUERY, 2)
+    assert vectorstore._collection.queries[-1] == 5
+    # The term embeddings were still computed only once
+    assert sum(1 for call in vectorstore.embeddings.calls if call != [QUERY]) == 1
+
+
+def test_lexical_hits_are_fused_with_vector_results():
+    identifier_query = "How do I call fi.resonlp?"
+    VECTORS[identifier_query] = [1.0, 0.0]
+    DOCS["fi.resonlp(fc, q, gain) reference"] = [-4.0, -4.0]  # far from every query vector
+    try:
+        lexical_index = LexicalIndex()
+        lexical_index.add(list(DOCS), [SimpleNamespace(page_content=text, metadata={}) for text in DOCS])
+        vectorstore = FakeVectorstore()
+        enhancer = Enhancer(vectorstore, lexical_index=lexical_index)
+
+        with request_scope(RequestContext(use_cache=False)) as request:
+            context = enhancer.enhance_context_for_query(identifier_query, "faust", max_docs=3)
+        docs = [doc.page_content for doc in context["documents"]]
+        # The vector search alone ranks it last; BM25 lifts it to the top
+        assert docs == ["fi.resonlp(fc, q, gain) reference", "reverb docs", "early reflections"], docs
+        stages = [span.stage for span in request.trace.spans]
+        assert "lexical_search" in stages and "chroma_get" not in stages
+
+        # Lexical hits outside the vector candidates are fetched by id
+        with request_scope(RequestContext(use_cache=False)) as request:
+            context = enhancer.enhance_context_for_query(identifier_query, "faust", max_docs=1)
+        assert [doc.page_content for doc in context["documents"]] == ["reverb docs"]
+        assert "chroma_get" in [span.stage for span in request.trace.spans]
+
+        # Without the index the vector results are returned as before
+        with request_scope(RequestContext(use_cache=False)):
+            context = Enhancer(vectorstore).enhance_context_for_query(identifier_query, "faust", max_docs=3)
+        assert "fi.resonlp(fc, q, gain) reference" not in [doc.page_content for doc in context["documents"]]
+    finally:
+        del VECTORS[identifier_query]
+        del DOCS["fi.resonlp(fc, q, gain) reference"]
+
+
+def test_batch_primes_retrieval_context():
+    vectorstore = FakeVectorstore()
+    enhancer = Enhancer(vectorstore)
+    retrieval = RetrievalContext(QUERY, VECTORS[QUERY])
+    with request_scope(RequestContext(use_cache=False)):
+        enhancer._retrieve_juce_context(QUERY, 4, retrieval)
+        docs = retrieval.search(vectorstore, 3)
+    assert [doc.page_content for doc in docs] == ["reverb docs", "early reflections", "faust basics"]
+    assert vectorstore.searches == [] and retrieval.searches == 0
+    assert [QUERY] not in vectorstore.embeddings.calls
+
+
+def test_fusion_prefers_documents_matching_several_queries():
+    def hit(doc_id, distance):
+        return RetrievedChunk(doc_id, f"text of {doc_id}", None, distance, None)
+
+    query_hits = [hit("a", 0.0), hit("b", 0.1)]
+    term_hits = [hit("b", 0.0), hit("c", 0.0)]
+    fused = fuse_ranked_results([query_hits, term_hits], [1.0, 0.5])
+    assert [chunk.id for chunk, _ in fused] == ["b", "a", "c"]
+    assert fused[1][1] == 1.0
+
+    # A strong query hit still beats a document only the expansion terms found
+    fused = fuse_ranked_results([[hit("a", 0.0)], [hit("c", 0.0)]], [1.0, 0.25])
+    assert [chunk.id for chunk, _ in fused] == ["a", "c"]
+
+    # Chunks are told apart by id, not by their text
+    twins = [RetrievedChunk("x", "same text", None, 0.0, None), RetrievedChunk("y", "same text", None, 0.0, None)]
+    assert len(fuse_ranked_results([twins], [1.0])) == 2
+
+
+def test_falls_back_to_sequential_search():
+    vectorstore = FakeVectorstore(with_collection=False)
+    enhancer = Enhancer(vectorstore)
+    with request_scope(RequestContext(use_cache=False)):
+        docs = enhancer._retrieve_faust_context(QUERY, 8)
+    # k = 8 // 5 + 1 per term, duplicates dropped
+    assert vectorstore.searches == [2] * 5
+    assert [doc.page_content for doc in docs] == ["reverb docs", "early reflections"]
+
+    # A failing batched query degrades to the same path
+    vectorstore = FakeVectorstore()
+    vectorstore._collection.query = lambda **kwargs: (_ for _ in ()).throw(RuntimeError("chroma down"))
+    with request_scope(RequestContext(use_cache=False)):
+        docs = Enhancer(vectorstore)._retrieve_juce_context(QUERY, 8)
+    assert len(vectorstore.searches) == 4 and docs
+
+
+def test_reuses_given_enhancer():
+    vectorstore = FakeVectorstore()
+    enhancer = Enhancer(vectorstore)
+    with request_scope(RequestContext(use_cache=False)):
+        for _ in range(2):
+            context = enhance_vectorstore_retrieval(vectorstore, QUERY, "faust", enhancer=enhancer)
+            assert "reverb docs" in context
+    assert len(enhancer._term_vectors) == len(FAUST_EXPANSION_TERMS)
+    assert sum(1 for call in vectorstore.embeddings.calls if call != [QUERY]) == 1
+
+
+if __name__ == "__main__":
+    test_one_chroma_query_per_retrieval()
+    test_overlapping_chunks_are_reranked_for_diversity()
+    test_term_hits_are_cached_per_index_generation()
+    test_lexical_hits_are_fused_with_vector_results()
+    test_batch_primes_retrieval_context()
+    test_fusion_prefers_documents_matching_several_queries()
+    test_falls_back_to_sequential_search()
+    test_reuses_given_enhancer()
+    print("✅ Context enhancer tests passed")
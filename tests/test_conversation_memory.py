@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for the rolling conversation summary
+Summaries come from a fake generator or fake fast model; no Ollama needed
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.conversation_memory import ConversationMemory, turn_fingerprint
+from src.core.project_manager import ProjectManager
+from tests.conftest import in_tmp_dir, make_system
+
+MODEL = "GLM-Z1 (Reasoning & General)"
+FAST = "DeepSeek Coder (Fast DSP)"
+
+
+class FakeSummarizer:
+    """Summary = list of the questions seen so far; records every prompt"""
+
+    def __init__(self):
+        self.prompts = []
+        self.questions = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        self.questions.extend(line[len("Developer: "):] for line in prompt.splitlines()
+                              if line.startswith("Developer: "))
+        return "- " + "\n- ".join(self.questions)
+
+
+def chat(manager, memory, n, start=0):
+    history = []
+    for i in range(start, start + n):
+        question, answer = f"question {i}", f"answer {i} " + "x" * 50
+        manager.save_chat_to_project("Synth", MODEL, question, answer)
+        memory.schedule_update("Synth", MODEL).result()
+        history.append((question, answer))
+    return history
+
+
+@in_tmp_dir
+def test_summary_is_folded_incrementally():
+    manager = ProjectManager()
+    summarizer = FakeSummarizer()
+    memory = ConversationMemory(manager, summarizer, verbatim_turns=3)
+
+    history = chat(manager, memory, 10)
+
+    record = memory.load("Synth", MODEL)
+    assert record["summarized_turns"] == 7
+    assert record["last_turn"] == turn_fingerprint(*history[6])
+    assert memory.summary_path("Synth", MODEL).exists()
+    assert memory.summary_path("Synth", MODEL).name.endswith("_summary.json")
+
+    # One fold per exchange once the verbatim window is full, each seeing only the new turn
+    assert len(summarizer.prompts) == 7
+    assert all(prompt.count("Developer: ") == 1 for prompt in summarizer.prompts)
+    assert "- question 5" in summarizer.prompts[-1]  # the previous summary is carried forward
+
+    summary, recent = memory.prompt_history("Synth", history)
+    assert "question 0" in summary and "question 6" in summary
+    assert recent == history[7:]
+
+
+@in_tmp_dir
+def test_prompt_size_stays_flat():
+    manager = ProjectManager()
+    memory = ConversationMemory(manager, lambda prompt: "- short summary", verbatim_turns=3)
+
+    history = chat(manager, memory, 8)
+    _, recent_short = memory.prompt_history("Synth", history)
+    history += chat(manager, memory, 60, start=8)  # past the 50 exchanges a chat file keeps
+    summary, recent_long = memory.prompt_history("Synth", history)
+    assert summary == "- short summary"
+    assert len(recent_short) == len(recent_long) == 3
+
+
+@in_tmp_dir
+def test_missing_summary_falls_back_to_recent_turns():
+    manager = ProjectManager()
+    memory = ConversationMemory(manager, FakeSummarizer())
+    history = [(f"q{i}", f"a{i}") for i in range(9)]
+    assert memory.prompt_history("Synth", history) == ("", history[-5:])
+
+    # A long chat saved before summaries existed is caught up in batches
+    for question, answer in history:
+        manager.save_chat_to_project("Synth", MODEL, question, answer)
+    memory.max_fold_turns = 4
+    record = memory.update("Synth", MODEL)
+    assert record["summarized_turns"] == 6
+
+
+@in_tmp_dir
+def test_failed_update_keeps_previous_summary():
+    manager = ProjectManager()
+    calls = []
+
+    def flaky(prompt):
+        calls.append(prompt)
+        if len(calls) > 1:
+            raise ConnectionError("ollama down")
+        return "- first"
+
+    memory = ConversationMemory(manager, flaky, verbatim_turns=1)
+    history = chat(manager, memory, 3)
+    assert memory.load("Synth", MODEL)["summary"] == "- first"
+    summary, recent = memory.prompt_history("Synth", history)
+    assert summary == "- first" and recent == history[1:]
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    async def astream(self, prompt, **options):
+        with self._lock:
+            self.prompts.append(prompt)
+        yield "- decided on a "
+        yield "FAUST lowpass"
+
+
+@in_tmp_dir
+def test_system_includes_summary_section():
+    fast = FakeLLM()
+    system = make_system(models={FAST: fast}, track_usage=True)
+
+    history = []
+    for i in range(6):
+        history.append((f"question {i}", f"answer {i}"))
+        system.save_exchange("Synth", MODEL, *history[-1])
+    system.conversation_memory.wait()
+    assert fast.prompts
+
+    summary, recent = system._history_sections("Synth", history)
+    assert summary.name == "summary" and summary.items == ["- decided on a FAUST lowpass"]
+    assert recent.name == "history" and len(recent.items) == 3
+    system.engine.shutdown()
+
+
+if __name__ == "__main__":
+    test_summary_is_folded_incrementally()
+    test_prompt_size_stays_flat()
+    test_missing_summary_falls_back_to_recent_turns()
+    test_failed_update_keeps_previous_summary()
+    test_system_includes_summary_section()
+    print("✅ Conversation memory tests passed")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for conversation sessions and the /api/chat client
+Runs against a fake Ollama server streaming /api/chat responses
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.conversation_session import (
+    ConversationSession, ConversationSessionStore, OllamaChatClient
+)
+
+
+def count_words(text):
+    return len(text.split())
+
+
+class FakeChatHandler(BaseHTTPRequestHandler):
+    payloads = []
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeChatHandler.payloads.append(payload)
+
+        lines = [{"message": {"role": "assistant", "content": part}, "done": False}
+                 for part in ["Hello", " there"]]
+        lines.append({"message": {"role": "assistant", "content": ""}, "done": True,
+                      "prompt_eval_count": 7, "eval_count": 2, "prompt_eval_duration": 3_000_000})
+        body = "".join(json.dumps(line) + "\n" for line in lines).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_session_keeps_a_stable_prefix():
+    session = ConversationSession("system prompt")
+    session.add_turn("q1", "docs\n\nq1", "a1")
+
+    first = session.messages("docs2\n\nq2")
+    session.add_turn("q2", "docs2\n\nq2", "a2")
+    second = session.messages("q3")
+
+    # Earlier turns are replayed exactly as sent, retrieved documents included
+    assert second[:len(first)] == first
+    assert second[0] == {"role": "system", "content": "system prompt"}
+    assert session.follows([("q1", "a1"), ("q2", "a2")])
+    assert not session.follows([("q1", "a1")])
+
+
+def test_compact_drops_oldest_turns():
+    session = ConversationSession("system")
+    for i in range(5):
+        session.add_turn(f"q{i}", f"question number {i}", f"answer number {i}")
+
+    dropped = session.compact(20, count_words)
+    assert dropped > 0
+    assert session.token_count(count_words) <= 20
+    assert session.turns[-1] == ("q4", "answer number 4")
+
+
+def test_store_restarts_diverged_sessions():
+    store = ConversationSessionStore()
+    factory_calls = []
+
+    def factory():
+        factory_calls.append(1)
+        return "system"
+
+    session = store.get("Default", "GLM", [], factory)
+    session.add_turn("q1", "q1", "a1")
+    assert store.get("Default", "GLM", [("q1", "a1")], factory) is session
+    assert len(factory_calls) == 1
+
+    # A cleared or edited chat starts over with a fresh system snapshot
+    restarted = store.get("Default", "GLM", [("other", "history")], factory)
+    assert restarted is not session
+    assert restarted.turns == [("other", "history")]
+    assert len(factory_calls) == 2
+
+
+def test_store_reuses_a_compacted_session():
+    store = ConversationSessionStore()
+    history = [(f"q{i}", f"answer number {i}") for i in range(10)]
+    session = store.get("Default", "GLM", history, lambda: "system")
+    session.compact(20, count_words)
+    assert 0 < len(session.turns) < len(history)
+
+    # The UI still sends its full history, plus the turn just answered
+    session.add_turn("q10", "docs\n\nq10", "answer number 10")
+    history.append(("q10", "answer number 10"))
+    assert store.get("Default", "GLM", history, lambda: "system") is session
+    assert session.messages()[-2]["content"] == "docs\n\nq10"
+
+    # A cleared chat doesn't match the compacted session
+    assert store.get("Default", "GLM", [], lambda: "system") is not session
+
+
+def test_stream_chat_collects_stats():
+    FakeChatHandler.payloads = []
+    server = HTTPServer(("127.0.0.1", 0), FakeChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = OllamaChatClient(f"http://127.0.0.1:{server.server_port}")
+        stats = {}
+        messages = ConversationSession("system").messages("hi")
+        chunks = list(client.stream_chat("model:latest", messages, {"num_ctx": 4096}, "10m", stats))
+    finally:
+        server.shutdown()
+
+    assert chunks == ["Hello", " there"]
+    assert stats["prompt_eval_count"] == 7
+    assert stats["prompt_eval_duration_ms"] == 3.0
+    payload = FakeChatHandler.payloads[0]
+    assert payload["messages"] == messages
+    assert payload["keep_alive"] == "10m"
+    assert payload["options"] == {"num_ctx": 4096}
+
+
+if __name__ == "__main__":
+    test_session_keeps_a_stable_prefix()
+    test_compact_drops_oldest_turns()
+    test_store_restarts_diverged_sessions()
+    test_store_reuses_a_compacted_session()
+    test_stream_chat_collects_stats()
+    print("✅ Conversation session tests passed")
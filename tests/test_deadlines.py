@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Tests for generation deadlines, cancellation and the timeout fallback
+Fake models stream through the orchestration engine; no Ollama needed
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.deadlines import Deadline, GenerationTimeout, deadline_scope, scoped_deadline
+from src.core.request_context import RequestContext, request_scope
+from src.core.telemetry import TelemetryRecorder
+from tests.conftest import make_system
+
+LARGE = "GLM-Z1 (Reasoning & General)"
+FAST = "DeepSeek Coder (Fast DSP)"
+
+
+class FakeLLM:
+    """Streams ``chunks``, then hangs when ``hang`` is set; records cancellation"""
+
+    def __init__(self, chunks, hang=False):
+        self.chunks = chunks
+        self.hang = hang
+        self.calls = []
+        self.closed = False
+
+    async def astream(self, prompt, **options):
+        self.calls.append((prompt, options))
+        try:
+            for chunk in self.chunks:
+                yield chunk
+            if self.hang:
+                await asyncio.sleep(3600)
+        finally:
+            # Where the real client closes its HTTP response
+            self.closed = True
+
+
+def test_deadline_scopes_nest():
+    assert scoped_deadline() is None
+    with deadline_scope(10, "subtask") as outer:
+        with deadline_scope(60, "inner") as inner:
+            # A nested scope can't extend the enclosing deadline
+            assert inner is outer
+        with deadline_scope(1, "inner") as tighter:
+            assert tighter.label == "inner" and tighter.remaining() <= 1
+    assert scoped_deadline() is None
+
+    request = RequestContext(deadline=Deadline(5, "request"))
+    with deadline_scope(1):
+        assert request.generation_deadline().label == "subtask"
+    assert request.generation_deadline().label == "request"
+    assert Deadline.earliest(None, None) is None
+
+
+def test_stream_is_cancelled_at_deadline():
+    with tempfile.TemporaryDirectory() as tmp:
+        system = make_system(tmp, {})
+    llm = FakeLLM(["partial "], hang=True)
+
+    chunks = []
+    start = time.monotonic()
+    try:
+        for chunk in system.engine.stream_sync(llm.astream("prompt"), LARGE, Deadline(0.3)):
+            chunks.append(chunk)
+        raise AssertionError("the hung stream should time out")
+    except GenerationTimeout as e:
+        assert e.model_name == LARGE and e.stage == "generation"
+    assert chunks == ["partial "]
+    assert time.monotonic() - start < 2
+    assert llm.closed
+    system.engine.shutdown()
+
+
+def test_timeout_retries_on_fallback_model():
+    large = FakeLLM(["thinking..."], hang=True)
+    fast = FakeLLM(["process = ", "fi.lowpass(1, 500);"])
+    with tempfile.TemporaryDirectory() as tmp:
+        system = make_system(tmp, {LARGE: large, FAST: fast})
+
+    request = RequestContext(use_cache=False, deadline=Deadline(0.3, "request"))
+    with request_scope(request):
+        text = "".join(system.stream_chat_with_model(
+            "write a faust lowpass", LARGE, use_context=False, conversation_mode=False
+        ))
+
+    assert text.startswith("thinking...")
+    assert "timed out" in text
+    assert text.endswith("fi.lowpass(1, 500);")
+    assert large.closed
+
+    # The matrix's timeout strategy: fallback model, capped answer
+    policy = system.fallback_matrix[LARGE]["timeout"]
+    assert fast.calls[0][1]["num_predict"] == policy["num_predict"]
+
+    stats = request.routing_stats()
+    assert stats["fallback_used"]
+    timeout = stats["timeouts"][0]
+    assert timeout["model"] == LARGE and timeout["fallback_model"] == FAST
+    assert timeout["strategy"] == policy["strategy"]
+    model_calls = [span for span in stats["telemetry"]["spans"] if span["stage"] == "model_call"]
+    assert model_calls[0]["timed_out"]
+    assert "timeout_fallback" in stats["telemetry"]["stages"]
+    system.engine.shutdown()
+
+
+def test_queue_timeout_falls_back():
+    fast = FakeLLM(["quick answer"])
+    with tempfile.TemporaryDirectory() as tmp:
+        system = make_system(tmp, {LARGE: FakeLLM(["never"]), FAST: fast})
+
+    # Another session holds the only GLM-Z1 slot
+    busy = system.scheduler.submit(LARGE, "other-session")
+    try:
+        request = RequestContext(use_cache=False, deadline=Deadline(0.2, "request"))
+        with request_scope(request):
+            response = system.chat_with_model("hello", LARGE, use_context=False, conversation_mode=False)
+    finally:
+        system.scheduler.release(busy)
+
+    assert response.endswith("quick answer")
+    assert request.timeouts[0]["stage"] == "queue"
+    system.engine.shutdown()
+
+
+def test_retries_stay_within_the_request_budget():
+    request = RequestContext(deadline=Deadline(5, "request"))
+    capped = request.retry_deadline(120)
+    assert capped.label == "request" and capped.remaining() <= 5
+
+    # Past the request deadline, all retries share one window
+    request = RequestContext(deadline=Deadline(0, "request"))
+    first = request.retry_deadline(0.2)
+    assert first.label == "retry"
+    time.sleep(0.1)
+    assert request.retry_deadline(0.2).expires_at == first.expires_at
+    time.sleep(0.15)
+    assert request.retry_deadline(0.2) is None
+    assert RequestContext().retry_deadline(60).seconds == 60
+
+
+def test_expired_request_skips_further_retries():
+    """HRM subtasks timing out after the request deadline don't each get a full retry"""
+    large = FakeLLM(["thinking..."], hang=True)
+    fast = FakeLLM(["slow fallback"], hang=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        system = make_system(tmp, {LARGE: large, FAST: fast})
+    system.fallback_matrix[LARGE]["timeout"]["retry_seconds"] = 0.3
+
+    request = RequestContext(use_cache=False, deadline=Deadline(0.2, "request"))
+    start = time.monotonic()
+    with request_scope(request):
+        texts = ["".join(system.stream_chat_with_model(
+            f"subtask {i}", LARGE, use_context=False, conversation_mode=False
+        )) for i in range(3)]
+    elapsed = time.monotonic() - start
+
+    assert "also timed out" in texts[0]
+    assert all("no time left" in text for text in texts[1:])
+    assert len(fast.calls) == 1
+    # Request deadline plus one retry window, not one per subtask
+    assert elapsed < 1.0, elapsed
+    assert [timeout["fallback_model"] for timeout in request.timeouts].count(None) == 3
+    system.engine.shutdown()
+
+
+def test_timeouts_exported_as_counters():
+    recorder = TelemetryRecorder(path=None)
+    recorder.record({"total_ms": 10.0, "spans": []}, {
+        "selected_model": LARGE,
+        "timeouts": [{"model": LARGE, "stage": "generation", "fallback_model": FAST}],
+    })
+    text = recorder.render_prometheus()
+    assert "# TYPE glm_timeouts_total counter" in text
+    assert f'glm_timeouts_total{{stage="generation",model="{LARGE}"}} 1' in text
+    assert f'glm_timeout_fallbacks_total{{stage="retry",model="{FAST}"}} 1' in text
+
+
+if __name__ == "__main__":
+    test_deadline_scopes_nest()
+    test_stream_is_cancelled_at_deadline()
+    test_timeout_retries_on_fallback_model()
+    test_queue_timeout_falls_back()
+    test_retries_stay_within_the_request_budget()
+    test_expired_request_skips_further_retries()
+    test_timeouts_exported_as_counters()
+    print("✅ Deadline tests passed")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for maximal marginal relevance reranking
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.diversity import mmr_select
+
+
+def reference_mmr(relevance, embeddings, k, lambda_mult):
+    """Textbook MMR recomputing every similarity each step"""
+    vectors = [np.asarray(vector, dtype=float) / (np.linalg.norm(vector) or 1.0) for vector in embeddings]
+    selected = []
+    while len(selected) < min(k, len(relevance)):
+        def score(index):
+            redundancy = max((max(float(vectors[index] @ vectors[other]), 0.0) for other in selected), default=0.0)
+            return lambda_mult * relevance[index] - (1 - lambda_mult) * redundancy
+        candidates = [index for index in range(len(relevance)) if index not in selected]
+        selected.append(max(candidates, key=score))
+    return selected
+
+
+def test_skips_near_duplicates():
+    relevance = [1.0, 0.98, 0.7, 0.2]
+    embeddings = [[1.0, 0.0, 0.0], [0.99, 0.05, 0.0], [0.1, 1.0, 0.0], [0.0, 0.0, 1.0]]
+    assert mmr_select(relevance, embeddings, 2) == [0, 2]
+    # Relevance only keeps the overlapping chunk
+    assert mmr_select(relevance, embeddings, 2, lambda_mult=1.0) == [0, 1]
+
+
+def test_matches_reference_implementation():
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        count = int(rng.integers(1, 12))
+        relevance = rng.random(count).tolist()
+        embeddings = rng.normal(size=(count, 4)).tolist()
+        k = int(rng.integers(1, 14))
+        lambda_mult = float(rng.random())
+        assert mmr_select(relevance, embeddings, k, lambda_mult) == reference_mmr(relevance, embeddings, k, lambda_mult)
+
+
+def test_edge_cases():
+    assert mmr_select([], [], 3) == []
+    assert mmr_select([0.5], [[1.0, 0.0]], 0) == []
+    assert sorted(mmr_select([0.1, 0.9], [[1.0, 0.0], [0.0, 1.0]], 5)) == [0, 1]
+    # Zero vectors don't divide by zero
+    assert mmr_select([0.2, 0.9], [[0.0, 0.0], [1.0, 0.0]], 2) == [1, 0]
+
+
+if __name__ == "__main__":
+    test_skips_near_duplicates()
+    test_matches_reference_implementation()
+    test_edge_cases()
+    print("✅ Diversity tests passed")
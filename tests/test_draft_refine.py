@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for draft_refine routing mode
+A fake fast model drafts, a fake large model refines; no Ollama needed
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.request_context import RequestContext, request_scope
+from src.core.streaming import ResponseStream, StreamReset
+from tests.conftest import in_tmp_dir, make_system
+
+DRAFT = "DeepSeek Coder (Fast DSP)"
+LARGE = "GLM-Z1 (Reasoning & General)"
+
+
+class FakeLLM:
+    def __init__(self, chunks, fail=False):
+        self.chunks = chunks
+        self.fail = fail
+        self.prompts = []
+
+    async def astream(self, prompt, **options):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise ConnectionError("model crashed")
+        for chunk in self.chunks:
+            yield chunk
+
+    async def ainvoke(self, prompt, **options):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise ConnectionError("model crashed")
+        return "".join(self.chunks)
+
+
+def run_stream(system, draft_llm_name=DRAFT, refine_name=LARGE):
+    request = RequestContext(use_cache=False)
+    with request_scope(request):
+        stream = ResponseStream(system._stream_draft_refine(
+            "write a faust lowpass", draft_llm_name, refine_name, use_context=False
+        ))
+        text = stream.consume()
+    return stream, text, request
+
+
+def test_reset_moves_text_into_drafts():
+    stream = ResponseStream(iter(["quick ", "draft", StreamReset("large"), "final ", "answer"]))
+    seen = []
+    for _ in stream:
+        seen.append(stream.text)
+    assert seen == ["quick ", "quick draft", "final ", "final answer"]
+    assert stream.draft == "quick draft"
+    assert stream.text == "final answer"
+
+
+@in_tmp_dir
+def test_draft_is_replaced_by_refinement():
+    draft_llm = FakeLLM(["process = ", "fi.lowpass(1, 500);"])
+    large_llm = FakeLLM(["import(\"stdfaust.lib\");\n", "process = fi.lowpass(2, 500);"])
+    system = make_system(models={DRAFT: draft_llm, LARGE: large_llm})
+    stream, text, request = run_stream(system)
+
+    assert stream.draft == "process = fi.lowpass(1, 500);"
+    assert text.startswith("import(")
+    # The large model is seeded with the draft
+    assert "=== DRAFT ANSWER (fast model) ===" in large_llm.prompts[0]
+    assert "fi.lowpass(1, 500)" in large_llm.prompts[0]
+
+    stats = request.routing_stats()["draft_refine"]
+    assert stats["draft"]["model"] == DRAFT
+    assert stats["refine"]["model"] == LARGE
+    assert stats["draft"]["first_token_ms"] <= stats["refine"]["first_token_ms"]
+    assert stats["refine"]["complete_ms"] >= stats["draft"]["complete_ms"]
+
+
+@in_tmp_dir
+def test_failed_refinement_keeps_the_draft():
+    system = make_system(models={DRAFT: FakeLLM(["draft answer"]), LARGE: FakeLLM([], fail=True)})
+    stream, text, request = run_stream(system)
+
+    assert stream.drafts == []
+    assert text.startswith("draft answer")
+    assert "Refinement with" in text
+    assert "refine" not in request.routing_stats()["draft_refine"]
+
+
+def run_engine(system):
+    request = RequestContext(use_cache=False)
+
+    async def refine():
+        with request_scope(request):
+            return await system.engine.draft_refine("write a faust lowpass", DRAFT, LARGE, "Default", [])
+
+    try:
+        draft, answer = system.engine.run(refine())
+    finally:
+        system.engine.shutdown()
+    return draft, answer, request
+
+
+@in_tmp_dir
+def test_engine_refines_without_a_failed_draft():
+    large_llm = FakeLLM(["process = fi.lowpass(2, 500);"])
+    system = make_system(models={DRAFT: FakeLLM([], fail=True), LARGE: large_llm})
+    draft, answer, request = run_engine(system)
+
+    assert draft is None
+    assert answer == "process = fi.lowpass(2, 500);"
+    # The large model answers the plain prompt, not an error message dressed up as a draft
+    assert "DRAFT ANSWER" not in large_llm.prompts[0]
+    assert "model crashed" not in large_llm.prompts[0]
+    assert list(request.routing_stats()["draft_refine"]) == ["refine"]
+
+
+@in_tmp_dir
+def test_engine_keeps_the_draft_when_refinement_fails():
+    system = make_system(models={DRAFT: FakeLLM(["draft answer"]), LARGE: FakeLLM([], fail=True)})
+    draft, answer, request = run_engine(system)
+
+    assert draft == "draft answer"
+    assert answer.startswith("draft answer") and "Refinement with" in answer
+    assert list(request.routing_stats()["draft_refine"]) == ["draft"]
+
+
+@in_tmp_dir
+def test_routing_picks_large_model_for_refinement():
+    system = make_system(models={DRAFT: FakeLLM([]), LARGE: FakeLLM([])})
+    model, decision = system._determine_final_model(
+        "optimize this", "auto", "draft_refine", {"recommended_model": DRAFT}
+    )
+    assert model == LARGE
+    assert DRAFT in decision["reason"]
+    assert system._draft_model_for(LARGE) == DRAFT
+    assert system._draft_model_for(DRAFT) is None
+
+
+if __name__ == "__main__":
+    test_reset_moves_text_into_drafts()
+    test_draft_is_replaced_by_refinement()
+    test_failed_refinement_keeps_the_draft()
+    test_engine_refines_without_a_failed_draft()
+    test_engine_keeps_the_draft_when_refinement_fails()
+    test_routing_picks_large_model_for_refinement()
+    print("✅ Draft/refine tests passed")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for the embedding router
+Uses a bag-of-words embedding so prototypes and routing are deterministic
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.embedding_router import EmbeddingRouter
+from src.core.request_context import RequestContext, request_scope
+from tests.conftest import in_tmp_dir, make_system
+
+VOCABULARY = ["filter", "reverb", "oscillator", "plugin", "juce", "gui", "slow", "faster", "cpu"]
+
+ROUTING_PATTERNS = {
+    "faust_synthesis": {"patterns": [r"(filter|reverb|oscillator)"]},
+    "juce_integration": {"patterns": [r"(juce|plugin|gui)"]},
+    "optimization_performance": {"patterns": [r"(slow|faster|cpu)"]},
+}
+
+
+class BagOfWordsEmbeddings:
+    model_name = "bag-of-words"
+
+    def __init__(self):
+        self.documents_embedded = 0
+
+    def embed_query(self, text):
+        words = text.lower().replace(":", " ").split()
+        return [float(words.count(term)) + 0.01 for term in VOCABULARY]
+
+    def embed_documents(self, texts):
+        self.documents_embedded += len(texts)
+        return [self.embed_query(text) for text in texts]
+
+
+def _make_router(embeddings, cache_dir, **kwargs):
+    return EmbeddingRouter(
+        embeddings, ROUTING_PATTERNS,
+        cache_path=str(Path(cache_dir) / "prototypes.npz"), **kwargs
+    )
+
+
+def test_routes_to_nearest_prototype():
+    embeddings = BagOfWordsEmbeddings()
+    router = _make_router(embeddings, tempfile.mkdtemp())
+
+    domain, confidence = router.route(embeddings.embed_query("make the juce gui"), mode="embedding")
+    assert domain == "juce_integration"
+    assert confidence > 0
+
+    domain, _ = router.route(embeddings.embed_query("this is slow, make it faster"), mode="embedding")
+    assert domain == "optimization_performance"
+
+
+def test_prototypes_are_persisted():
+    cache_dir = tempfile.mkdtemp()
+    first = BagOfWordsEmbeddings()
+    prototypes = _make_router(first, cache_dir).prototypes
+    assert first.documents_embedded == 3
+
+    second = BagOfWordsEmbeddings()
+    reloaded = _make_router(second, cache_dir).prototypes
+    assert second.documents_embedded == 0
+    assert np.allclose(prototypes, reloaded)
+
+
+def test_blended_mode_uses_regex_scores():
+    embeddings = BagOfWordsEmbeddings()
+    router = _make_router(embeddings, tempfile.mkdtemp(), regex_weight=0.9)
+    query = embeddings.embed_query("reverb plugin")
+
+    domain, _ = router.route(query, {"optimization_performance": 1.0}, mode="blended")
+    assert domain == "optimization_performance"
+
+
+@in_tmp_dir
+def test_system_routes_by_regex_unless_opted_in():
+    system = make_system()
+    prompt = "Implement a FAUST reverb with a lowpass filter"
+    with request_scope(RequestContext(use_cache=False)):
+        domain, _ = system._detect_domain_patterns(prompt)
+    assert system.routing_classifier == "regex"
+    assert domain == "faust_synthesis"
+    # Regex routing never loads the embedding model
+    assert system.loaded_component("embeddings") is None
+    assert system.loaded_component("embedding_router") is None
+
+    embeddings = BagOfWordsEmbeddings()
+    system.embeddings = embeddings
+    system.routing_classifier = "blended"
+    with request_scope(RequestContext(use_cache=False)):
+        system._detect_domain_patterns(prompt)
+    assert system.loaded_component("embedding_router") is not None
+    assert embeddings.documents_embedded > 0
+
+
+if __name__ == "__main__":
+    test_routes_to_nearest_prototype()
+    test_prototypes_are_persisted()
+    test_blended_mode_uses_regex_scores()
+    test_system_routes_by_regex_unless_opted_in()
+    print("✅ Embedding router tests passed")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the Aho-Corasick keyword automaton and the registries built on it
+"""
+
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.context_enhancer import ContextEnhancer, load_faust_registry, load_juce_registry
+from src.core.keyword_automaton import KeywordAutomaton
+
+
+def naive_scan(groups, text):
+    """The substring loops the automaton replaces"""
+    return {
+        group: [term for term in terms if (term in text if case_sensitive else term.lower() in text.lower())]
+        for group, (terms, case_sensitive) in groups.items()
+    }
+
+
+def test_matches_substring_semantics():
+    rng = random.Random(7)
+    alphabet = "abAB.:"
+    for _ in range(2000):
+        groups = {
+            "plain": (list(dict.fromkeys(
+                "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(0, 6))
+            )), False),
+            "exact": (list(dict.fromkeys(
+                "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(0, 6))
+            )), True),
+        }
+        automaton = KeywordAutomaton()
+        for group, (terms, case_sensitive) in groups.items():
+            automaton.add_group(group)
+            for term in terms:
+                automaton.add(group, term, case_sensitive)
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+        assert automaton.scan(text) == naive_scan(groups, text), (groups, text)
+
+
+def test_overlapping_terms_and_case():
+    automaton = KeywordAutomaton.from_groups({"dsp": ["filter", "filtering", "ring", "fir"]})
+    automaton.add("faust", "os.osc", case_sensitive=True)
+    hits = automaton.scan("FIR Filtering with os.oscsin, not OS.OSC")
+    assert hits == {"dsp": ["filter", "filtering", "ring", "fir"], "faust": ["os.osc"]}
+    assert automaton.scan("") == {"dsp": [], "faust": []}
+    assert automaton.scan("OS.OSC")["faust"] == []
+
+
+def test_registries_load_from_documentation():
+    with tempfile.TemporaryDirectory() as tmp:
+        faust_dir = Path(tmp) / "faust"
+        juce_dir = Path(tmp) / "juce"
+        faust_dir.mkdir()
+        juce_dir.mkdir()
+        (faust_dir / "faustlibraries.grame.fr_libs_filters.txt").write_text(
+            "Filters library\n(fi.)resonlp\nResonant lowpass\n(fi.)lowpass\n(fi.)svf.bp\n"
+        )
+        (faust_dir / "faustlibraries.grame.fr_libs_reverbs.txt").write_text("(re.)zita_rev1_stereo\n")
+        (faust_dir / "faustdoc.grame.fr_manual_syntax.txt").write_text("(xx.)not_a_library\n")
+        (juce_dir / "juce_group__juce__dsp.txt").write_text(
+            "Use juce::dsp::LadderFilter or dsp::IIR::Filter with a ProcessSpec.\nClasses for audio\n"
+        )
+
+        assert load_faust_registry(str(faust_dir)) == {
+            "filters": ["fi.lowpass", "fi.resonlp", "fi.svf"],
+            "reverbs": ["re.zita_rev1_stereo"],
+        }
+        assert load_juce_registry(str(juce_dir)) == {
+            "juce_group__juce__dsp": ["ProcessSpec", "dsp::IIR::Filter", "dsp::LadderFilter"],
+        }
+
+        enhancer = ContextEnhancer(None)
+        before = len(enhancer._registry)
+        query = "Port fi.resonlp and re.zita_rev1_stereo to a dsp::LadderFilter"
+        assert enhancer._extract_faust_functions(query) == ["fi.resonlp", "re.zita_rev1"]
+        assert enhancer._extract_juce_classes(query) == []
+
+        total = enhancer.load_registries(str(faust_dir), str(juce_dir))
+        # fi.lowpass, fi.resonlp, fi.svf and dsp::IIR::Filter were already registered
+        assert total == before + 3
+        assert enhancer._extract_faust_functions(query) == ["fi.resonlp", "re.zita_rev1", "re.zita_rev1_stereo"]
+        assert enhancer._extract_juce_classes(query) == ["dsp::LadderFilter"]
+        assert enhancer.load_registries(None, None) == total
+
+
+if __name__ == "__main__":
+    test_matches_substring_semantics()
+    test_overlapping_terms_and_case()
+    test_registries_load_from_documentation()
+    print("✅ Keyword automaton tests passed")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for lazy components and lazy package exports
+"""
+
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.lazy_loading import lazy_component
+
+
+class Service:
+    builds = 0
+
+    @lazy_component
+    def model(self):
+        Service.builds += 1
+        time.sleep(0.05)
+        return object()
+
+
+def test_component_is_built_once_under_concurrency():
+    Service.builds = 0
+    service = Service()
+    assert lazy_component.loaded(service, "model") is None
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.model)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Service.builds == 1
+    assert all(result is results[0] for result in results)
+    assert lazy_component.loaded(service, "model") is results[0]
+
+
+def test_component_can_be_replaced():
+    service = Service()
+    replacement = object()
+    service.model = replacement
+    assert service.model is replacement
+
+
+def test_package_exports_are_lazy():
+    # A fresh interpreter: other tests in this process may already have imported the modules
+    check = (
+        "import sys, src.core\n"
+        "assert 'src.core.request_scheduler' not in sys.modules\n"
+        "assert 'src.core.multi_model_system' not in sys.modules\n"
+        "src.core.RequestScheduler\n"
+        "assert 'src.core.request_scheduler' in sys.modules\n"
+    )
+    result = subprocess.run([sys.executable, "-c", check], cwd=Path(__file__).parent.parent,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+    import src.core
+    scheduler_class = src.core.RequestScheduler
+    assert scheduler_class.__name__ == "RequestScheduler"
+    assert "RequestScheduler" in dir(src.core)
+    try:
+        src.core.DoesNotExist
+        raise AssertionError("unknown export should raise AttributeError")
+    except AttributeError:
+        pass
+
+
+if __name__ == "__main__":
+    test_component_is_built_once_under_concurrency()
+    test_component_can_be_replaced()
+    test_package_exports_are_lazy()
+    print("✅ Lazy loading tests passed")
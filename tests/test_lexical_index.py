@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the BM25 lexical index and reciprocal rank fusion
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+CHUNKS = {
+    "c1": ("resonant lowpass: fi.resonlp(fc, q, gain) is a second order filter", "filters.txt"),
+    "c2": ("lowpass and highpass filters shape the spectrum of a signal", "filters.txt"),
+    "c3": ("re.zita_rev1_stereo is a high quality reverb by Fons Adriaensen", "reverbs.txt"),
+    "c4": ("Use dsp::IIR::Filter with AudioProcessorValueTreeState parameters", "juce.txt"),
+    "c5": ("A reverb adds space and depth to a dry signal", "reverbs.txt"),
+}
+
+
+def chunk(doc_id):
+    text, source = CHUNKS[doc_id]
+    return SimpleNamespace(page_content=text, metadata={"source": source})
+
+
+def build(path=None):
+    index = LexicalIndex(path)
+    index.add(list(CHUNKS), [chunk(doc_id) for doc_id in CHUNKS])
+    return index
+
+
+class FakeCollection:
+    def count(self):
+        return len(CHUNKS)
+
+    def get(self, include, limit, offset):
+        ids = list(CHUNKS)[offset:offset + limit]
+        return {
+            "ids": ids,
+            "documents": [CHUNKS[doc_id][0] for doc_id in ids],
+            "metadatas": [{"source": CHUNKS[doc_id][1]} for doc_id in ids],
+        }
+
+
+def test_tokenize_keeps_identifiers():
+    tokens = tokenize("Use fi.resonlp or dsp::IIR::Filter in the AudioProcessor")
+    assert "fi.resonlp" in tokens and "resonlp" in tokens
+    assert "dsp::iir::filter" in tokens and "iir" in tokens
+    assert "audioprocessor" in tokens
+    assert "the" not in tokens and "in" not in tokens
+
+
+def test_identifier_queries_find_their_chunk():
+    index = build()
+    assert index.search("how do I call fi.resonlp?", k=3)[0][0] == "c1"
+    assert index.search("re.zita_rev1_stereo settings", k=3)[0][0] == "c3"
+    assert index.search("AudioProcessorValueTreeState example", k=3)[0][0] == "c4"
+    assert index.search("dsp::IIR::Filter", k=3)[0][0] == "c4"
+    assert index.search("the of and", k=3) == []
+    assert len(index.search("reverb signal", k=2)) == 2
+
+
+def test_persistence_and_removal():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "lexical_index.json")
+        index = build(path)
+        assert index.save()
+        assert Path(path).exists() and not list(Path(tmp).glob("*.tmp"))
+
+        reloaded = LexicalIndex(path)
+        assert len(reloaded) == len(CHUNKS)
+        assert reloaded.search("fi.resonlp") == index.search("fi.resonlp")
+
+        assert reloaded.remove_source("filters.txt") == 2
+        assert reloaded.search("fi.resonlp") == []
+        reloaded.save()
+        assert len(LexicalIndex(path)) == 3
+
+        # Re-adding an id replaces its chunk
+        reloaded.add(["c3"], [SimpleNamespace(page_content="fi.resonlp moved here", metadata={})])
+        assert reloaded.search("fi.resonlp")[0][0] == "c3"
+        assert reloaded.search("zita_rev1_stereo") == []
+
+
+def test_built_from_existing_collection():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LexicalIndex.from_persist_directory(tmp, collection=FakeCollection())
+        assert len(index) == len(CHUNKS)
+        assert (Path(tmp) / "lexical_index.json").exists()
+        assert index.search("fi.resonlp")[0][0] == "c1"
+
+        # Small pages still cover the whole collection
+        assert LexicalIndex().rebuild(FakeCollection(), batch_size=2) == len(CHUNKS)
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]])
+    assert [key for key, _ in fused] == ["c", "a", "b", "d"]
+    # Ties keep the first ranking's order
+    assert [key for key, _ in reciprocal_rank_fusion([["a"], ["b"]])] == ["a", "b"]
+
+
+if __name__ == "__main__":
+    test_tokenize_keeps_identifiers()
+    test_identifier_queries_find_their_chunk()
+    test_persistence_and_removal()
+    test_built_from_existing_collection()
+    test_reciprocal_rank_fusion()
+    print("✅ Lexical index tests passed")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached Ollama model health monitor
+Runs against a fake Ollama server serving /api/tags and /api/ps
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.model_health import ModelHealthMonitor
+
+MODELS = {
+    "GLM-Z1 (Reasoning & General)": "JollyLlama/GLM-Z1-32B-0414-Q4_K_M:latest",
+    "Code Llama (FAUST Specialist)": "codellama:13b",
+    "DeepSeek Coder (Fast DSP)": "deepseek-coder:6.7b",
+}
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    installed = ["JollyLlama/GLM-Z1-32B-0414-Q4_K_M:latest", "codellama:13b"]
+    running = ["codellama:13b"]
+    request_log = []
+
+    def do_GET(self):
+        FakeOllamaHandler.request_log.append(self.path)
+        if self.path == "/api/tags":
+            names = self.installed
+        elif self.path == "/api/ps":
+            names = self.running
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = json.dumps({"models": [{"name": name, "model": name} for name in names]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        # Any generation request means the monitor fell back to test completions
+        FakeOllamaHandler.request_log.append(self.path)
+        self.send_response(500)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server() -> HTTPServer:
+    FakeOllamaHandler.request_log = []
+    server = HTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_status_from_tags_and_ps():
+    server = _start_server()
+    try:
+        running_seen = []
+        monitor = ModelHealthMonitor(
+            MODELS,
+            base_url=f"http://127.0.0.1:{server.server_port}",
+            on_refresh=running_seen.append,
+        )
+        status = monitor.get_status(refresh=True)
+
+        assert status["GLM-Z1 (Reasoning & General)"] == "✅ Available"
+        assert status["Code Llama (FAUST Specialist)"] == "✅ Available"
+        assert status["DeepSeek Coder (Fast DSP)"] == "❌ Not installed"
+        assert not monitor.is_available("DeepSeek Coder (Fast DSP)")
+        assert monitor.is_running("Code Llama (FAUST Specialist)")
+        assert running_seen == [["Code Llama (FAUST Specialist)"]]
+        assert "/api/generate" not in FakeOllamaHandler.request_log
+    finally:
+        server.shutdown()
+
+
+def test_queries_only_read_the_cached_status():
+    server = _start_server()
+    try:
+        monitor = ModelHealthMonitor(MODELS, base_url=f"http://127.0.0.1:{server.server_port}", ttl_seconds=30)
+        # Nothing probed yet: routing must not block, and the UI shows a pending check
+        assert monitor.is_available("DeepSeek Coder (Fast DSP)")
+        assert set(monitor.get_status().values()) == {"⏳ Checking..."}
+        assert FakeOllamaHandler.request_log == []
+
+        monitor.refresh()
+        for _ in range(5):
+            monitor.get_status()
+            monitor.is_available("Code Llama (FAUST Specialist)")
+            monitor.is_running("Code Llama (FAUST Specialist)")
+        assert FakeOllamaHandler.request_log == ["/api/tags", "/api/ps"]
+        assert not monitor.is_available("DeepSeek Coder (Fast DSP)")
+
+        # Past twice the TTL the snapshot is too old to rule a model out
+        monitor._last_refresh -= 61
+        assert monitor.is_available("DeepSeek Coder (Fast DSP)")
+        assert len(FakeOllamaHandler.request_log) == 2
+    finally:
+        server.shutdown()
+
+
+def test_background_thread_refreshes():
+    server = _start_server()
+    try:
+        monitor = ModelHealthMonitor(MODELS, base_url=f"http://127.0.0.1:{server.server_port}", ttl_seconds=0.05)
+        monitor.start_background_refresh()
+        try:
+            deadline = time.time() + 5
+            while len(FakeOllamaHandler.request_log) < 4 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            monitor.stop_background_refresh()
+        assert len(FakeOllamaHandler.request_log) >= 4
+        assert monitor.get_status()["Code Llama (FAUST Specialist)"] == "✅ Available"
+    finally:
+        server.shutdown()
+
+
+def test_unreachable_server():
+    monitor = ModelHealthMonitor(MODELS, base_url="http://127.0.0.1:9", request_timeout=0.5)
+    status = monitor.get_status(refresh=True)
+    assert all(text.startswith("⚠️ Error") for text in status.values())
+    # Unknown health must not block routing
+    assert monitor.is_available("DeepSeek Coder (Fast DSP)")
+    assert not monitor.server_reachable()
+
+
+if __name__ == "__main__":
+    test_status_from_tags_and_ps()
+    test_queries_only_read_the_cached_status()
+    test_background_thread_refreshes()
+    test_unreachable_server()
+    print("✅ Model health tests passed")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for the Ollama model residency manager
+Runs against a fake Ollama server recording load/unload requests
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.model_residency import ModelResidencyManager
+
+GLM = "GLM-Z1 (Reasoning & General)"
+CODELLAMA = "Code Llama (FAUST Specialist)"
+DEEPSEEK = "DeepSeek Coder (Fast DSP)"
+
+MODELS = {
+    GLM: "JollyLlama/GLM-Z1-32B-0414-Q4_K_M:latest",
+    CODELLAMA: "codellama:13b",
+    DEEPSEEK: "deepseek-coder:6.7b",
+}
+FOOTPRINTS = {GLM: 20.0, CODELLAMA: 7.5, DEEPSEEK: 4.0}
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeOllamaHandler.requests_seen.append((self.path, body))
+        payload = json.dumps({"done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server() -> HTTPServer:
+    FakeOllamaHandler.requests_seen = []
+    server = HTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _make_manager(server, tmp, usage=None) -> ModelResidencyManager:
+    usage_file = Path(tmp) / "model_usage.json"
+    if usage is not None:
+        usage_file.write_text(json.dumps(usage))
+    return ModelResidencyManager(
+        MODELS, FOOTPRINTS, ram_budget_gb=24.0,
+        base_url=f"http://127.0.0.1:{server.server_port}",
+        usage_file=str(usage_file),
+    )
+
+
+def _wait_for_requests(count: int, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while len(FakeOllamaHandler.requests_seen) < count and time.time() < deadline:
+        time.sleep(0.01)
+    return FakeOllamaHandler.requests_seen
+
+
+def test_most_used_models_are_pinned_within_budget():
+    server = _start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = _make_manager(server, tmp, {GLM: 5, CODELLAMA: 3, DEEPSEEK: 1})
+            # GLM (20 GB) + Code Llama (7.5 GB) would overflow 24 GB; DeepSeek (4 GB) still fits
+            assert manager.pinned_models() == [GLM, DEEPSEEK]
+            assert manager.keep_alive_for(GLM) == "30m"
+            assert manager.keep_alive_for(DEEPSEEK) == "30m"
+            assert manager.keep_alive_for(CODELLAMA) == "5m"
+
+            # Unused models are never pinned
+            fresh = _make_manager(server, tmp, {})
+            assert fresh.pinned_models() == []
+            assert fresh.keep_alive_for(GLM) == "5m"
+    finally:
+        server.shutdown()
+
+
+def test_preload_sends_keep_alive_for_pinned_and_transient_models():
+    server = _start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = _make_manager(server, tmp, {DEEPSEEK: 4})
+            manager.preload(DEEPSEEK)
+            manager.preload(DEEPSEEK)  # already loading - no second request
+            _wait_for_requests(1)
+            deadline = time.time() + 5
+            while not manager.is_hot(DEEPSEEK) and time.time() < deadline:
+                time.sleep(0.01)
+            manager.preload(CODELLAMA)
+            seen = _wait_for_requests(2)
+
+            assert seen == [
+                ("/api/generate", {"model": "deepseek-coder:6.7b", "keep_alive": "30m"}),
+                ("/api/generate", {"model": "codellama:13b", "keep_alive": "5m"}),
+            ]
+            assert manager.is_hot(DEEPSEEK)
+            manager.preload("Unknown model")
+            time.sleep(0.05)
+            assert len(FakeOllamaHandler.requests_seen) == 2
+    finally:
+        server.shutdown()
+
+
+def test_unpinned_models_are_unloaded_when_over_budget():
+    server = _start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = _make_manager(server, tmp, {GLM: 5})
+            manager.mark_resident([GLM, CODELLAMA])
+            manager._resident[CODELLAMA] -= 10  # least recently used
+
+            # 20 + 7.5 + 4 GB is over budget: Code Llama goes, the pinned GLM stays
+            manager.record_use(DEEPSEEK)
+            assert FakeOllamaHandler.requests_seen == [
+                ("/api/generate", {"model": "codellama:13b", "keep_alive": 0}),
+            ]
+            assert manager.hot_models() == [DEEPSEEK, GLM]
+            assert manager.get_status()["resident_gb"] == 24.0
+
+            # Within budget nothing else is unloaded
+            manager.record_use(DEEPSEEK)
+            assert len(FakeOllamaHandler.requests_seen) == 1
+    finally:
+        server.shutdown()
+
+
+def test_usage_counts_persist():
+    server = _start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = _make_manager(server, tmp, {})
+            for _ in range(10):
+                manager.record_use(CODELLAMA)
+            reloaded = _make_manager(server, tmp)
+            assert reloaded.usage_counts[CODELLAMA] == 10
+            assert reloaded.pinned_models() == [CODELLAMA]
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_most_used_models_are_pinned_within_budget()
+    test_preload_sends_keep_alive_for_pinned_and_transient_models()
+    test_unpinned_models_are_unloaded_when_over_budget()
+    test_usage_counts_persist()
+    print("✅ Model residency tests passed")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-decomposition context cache of HRM orchestration
+Fake models, project manager and HRM plan; no Ollama, Chroma or torch needed
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.orchestration_context import OrchestrationContext
+from src.core.prompt_assembler import PromptSection
+from src.core.request_context import RequestContext, bind_request, current_request, request_scope
+from src.core.streaming import ResponseStream
+from tests.conftest import make_system
+
+LARGE = "GLM-Z1 (Reasoning & General)"
+FAST = "DeepSeek Coder (Fast DSP)"
+
+
+def subtask(id, task_type, requirements, model, dependencies=()):
+    return SimpleNamespace(
+        id=id, description=f"do {id}", task_type=task_type, complexity=5, priority=1,
+        model_preference=model, context_requirements=list(requirements),
+        dependencies=list(dependencies), estimated_tokens=300, domain_expertise_required=False,
+    )
+
+
+# analysis and faust_impl share docs; testing needs its own query
+PLAN = SimpleNamespace(
+    original_query="Build a FAUST reverb",
+    subtasks=[
+        subtask("analysis", "faust", ["faust_documentation", "dsp_theory"], LARGE),
+        subtask("faust_impl", "faust", ["dsp_theory", "faust_documentation"], FAST),
+        subtask("testing", "python", ["faust_testing"], FAST, dependencies=["analysis", "faust_impl"]),
+    ],
+    execution_strategy="mixed",
+    total_complexity=6,
+    confidence_score=0.8,
+    reasoning_chain=[],
+    metadata={},
+)
+
+
+class FakeHRM:
+    def get_execution_order(self, decomposition):
+        return [["analysis", "faust_impl"], ["testing"]]
+
+
+class FakeLLM:
+    async def astream(self, prompt, **options):
+        yield "answer"
+
+    async def ainvoke(self, prompt, **options):
+        return "answer"
+
+
+class CountingProjectManager:
+    def __init__(self):
+        self.calls = {"context": 0, "metadata_reads": 0, "metadata_writes": 0}
+        self.metadata = {"models_used": []}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def get_project_context(self, project_name):
+        self._count("context")
+        return f"Project: {project_name}"
+
+    def get_project_metadata(self, project_name):
+        self._count("metadata_reads")
+        return {"models_used": list(self.metadata["models_used"])}
+
+    def update_project_metadata(self, project_name, metadata):
+        self._count("metadata_writes")
+        self.metadata = metadata
+        return True
+
+
+def make_orchestration_system(tmp):
+    """System with a fake HRM plan, counting project manager and recorded retrievals"""
+    system = make_system(tmp, {LARGE: FakeLLM(), FAST: FakeLLM()}, track_usage=True)
+    system.hrm_wrapper = FakeHRM()
+    system.project_manager = CountingProjectManager()
+
+    system.retrieval_queries = []
+    lock = threading.Lock()
+
+    def knowledge_base_section(query, task_type, retrieval=None):
+        with lock:
+            system.retrieval_queries.append((query, task_type))
+        return PromptSection("knowledge_base", [f"docs for {task_type}"], 1)
+
+    system._knowledge_base_section = knowledge_base_section
+    return system
+
+
+def check_shared_context(system, request):
+    # Two distinct (task type, requirements) keys -> two retrievals
+    queries = sorted(system.retrieval_queries)
+    assert len(queries) == 2, queries
+    assert ("Build a FAUST reverb\ndsp theory, faust documentation", "faust") in queries
+    assert ("Build a FAUST reverb\nfaust testing", "general") in queries
+
+    calls = system.project_manager.calls
+    assert calls["context"] == 1
+    # Model usage is written once, after the last phase
+    assert calls["metadata_reads"] == 1 and calls["metadata_writes"] == 1
+    assert set(system.project_manager.metadata["models_used"]) == {LARGE, FAST}
+
+    stats = request.routing_stats()["subtask_context"]
+    assert stats == {"context_computed": 3, "context_reused": 3}
+
+
+def test_memo_computes_once():
+    context = OrchestrationContext("query", "Synth")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "value"
+
+    threads = [threading.Thread(target=context.memo, args=(("key",), compute)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert context.stats() == {"context_computed": 1, "context_reused": 7}
+
+    assert context.retrieval_key(PLAN.subtasks[0]) == context.retrieval_key(PLAN.subtasks[1])
+    assert context.retrieval_key(PLAN.subtasks[2]) == ("general", ("faust_testing",))
+    assert context.retrieval_query(()) == "query"
+
+
+def test_sync_decomposition_shares_context():
+    with tempfile.TemporaryDirectory() as tmp:
+        system = make_orchestration_system(tmp)
+    request = RequestContext(use_cache=False)
+    with request_scope(request):
+        result = system._process_hrm_decomposition(PLAN, True, "Synth", None)
+    assert "Subtasks Processed:** 3/3" in result
+    check_shared_context(system, request)
+    system.engine.shutdown()
+
+
+def test_async_plan_shares_context():
+    with tempfile.TemporaryDirectory() as tmp:
+        system = make_orchestration_system(tmp)
+    request = RequestContext(use_cache=False)
+    with request_scope(request):
+        result = system.engine.run(system.engine.execute_plan(PLAN, True, "Synth", None))
+    assert "Subtasks Processed:** 3/3" in result
+    check_shared_context(system, request)
+    system.engine.shutdown()
+
+
+
+def test_streamed_decomposition_sends_keep_alives():
+    """The render loop gets control back while subtasks run, to show queue positions"""
+    with tempfile.TemporaryDirectory() as tmp:
+        system = make_orchestration_system(tmp)
+    system.stream_keep_alive_interval = 0.02
+    process = system._process_hrm_decomposition
+    seen = []
+
+    def slow_process(*args):
+        time.sleep(0.2)
+        seen.append((current_request(), threading.current_thread().name))
+        return process(*args)
+
+    system._process_hrm_decomposition = slow_process
+    request = RequestContext(use_cache=False)
+    stream = ResponseStream(bind_request(request, system._stream_complex_orchestration(
+        PLAN.original_query, {"hrm_decomposition": PLAN}, True, "Synth", None
+    )))
+    chunks = list(stream)
+    system.engine.shutdown()
+
+    assert chunks[:-1] and set(chunks[:-1]) == {""}
+    assert chunks[-1] == stream.text
+    assert "Subtasks Processed:** 3/3" in stream.text
+    # The orchestration ran off the consuming thread, in the stream's request
+    assert seen == [(request, "hrm-stream_0")]
+
+
+if __name__ == "__main__":
+    test_memo_computes_once()
+    test_sync_decomposition_shares_context()
+    test_async_plan_shares_context()
+    test_streamed_decomposition_sends_keep_alives()
+    print("✅ Orchestration context tests passed")
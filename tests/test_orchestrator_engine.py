@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio orchestration engine behind generate_response
+Fake models run on the engine loop; no Ollama needed
+"""
+
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.deadlines import Deadline, GenerationTimeout
+from src.integrations.main_orchestrator import UnifiedCodingAssistant
+from tests.conftest import make_system
+
+FAST = "DeepSeek Coder (Fast DSP)"
+
+
+class SlowLLM:
+    """Answers after ``delay`` seconds; records the loop each call ran on and cancellations"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.loops = []
+        self.started = threading.Event()
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    async def ainvoke(self, prompt, **options):
+        with self._lock:
+            self.loops.append((asyncio.get_running_loop(), threading.current_thread().name))
+        self.started.set()
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        return f"answer after {self.delay}s"
+
+
+class TokenStream:
+    """Async token stream with a pause before each chunk; records closing"""
+
+    def __init__(self, chunks, pause):
+        self.chunks = chunks
+        self.pause = pause
+        self.closed = False
+
+    async def stream(self):
+        try:
+            for chunk in self.chunks:
+                await asyncio.sleep(self.pause)
+                yield chunk
+        finally:
+            # Where the real client closes its HTTP response
+            self.closed = True
+
+
+def test_stream_sync_relays_chunks_within_deadline():
+    engine = UnifiedCodingAssistant(system=None)
+    try:
+        tokens = TokenStream(["process", " = ", "_;"], pause=0.01)
+        assert list(engine.stream_sync(tokens.stream(), FAST, Deadline(5))) == ["process", " = ", "_;"]
+        assert tokens.closed
+
+        # No deadline: the stream runs to its end
+        tokens = TokenStream(["a", "b"], pause=0.01)
+        assert list(engine.stream_sync(tokens.stream(), FAST)) == ["a", "b"]
+    finally:
+        engine.shutdown()
+
+
+def test_stream_sync_deadline_cancels_between_chunks():
+    engine = UnifiedCodingAssistant(system=None)
+    try:
+        tokens = TokenStream(["first", "second", "third"], pause=0.2)
+        chunks = []
+        start = time.monotonic()
+        try:
+            for chunk in engine.stream_sync(tokens.stream(), FAST, Deadline(0.3, "request")):
+                chunks.append(chunk)
+            raise AssertionError("the deadline should expire mid-stream")
+        except GenerationTimeout as e:
+            assert e.model_name == FAST and e.deadline.label == "request"
+        # The deadline covers the whole stream, not each chunk
+        assert chunks == ["first"]
+        assert time.monotonic() - start < 1
+        assert tokens.closed
+    finally:
+        engine.shutdown()
+
+
+def test_abandoned_stream_is_closed():
+    engine = UnifiedCodingAssistant(system=None)
+    try:
+        tokens = TokenStream(["a", "b", "c"], pause=0.01)
+        stream = engine.stream_sync(tokens.stream(), FAST)
+        assert next(stream) == "a"
+        stream.close()
+        assert tokens.closed
+
+        # Blocking on the loop from the loop itself would deadlock
+        async def from_loop():
+            list(engine.stream_sync(TokenStream(["x"], 0).stream(), FAST))
+
+        try:
+            engine.run(from_loop())
+            raise AssertionError("stream_sync on the engine thread should be refused")
+        except RuntimeError as e:
+            assert "engine loop" in str(e)
+    finally:
+        engine.shutdown()
+
+
+def test_concurrent_requests_share_the_loop():
+    llm = SlowLLM(0.3)
+    with tempfile.TemporaryDirectory() as tmp:
+        system = make_system(tmp, {FAST: llm})
+    try:
+        results = []
+
+        def ask(i):
+            results.append(system.generate_response(
+                f"question {i}", selected_model=FAST, routing_mode="manual",
+                use_context=False, use_cache=False, session_id=f"session-{i}",
+            ))
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+
+        assert [result["response"] for result in results] == ["answer after 0.3s"] * 2
+        assert all(result["routing"]["selected_model"] == FAST for result in results)
+        # Both generations were awaited on the one engine loop, overlapping in time
+        assert len({loop for loop, _ in llm.loops}) == 1
+        assert {name for _, name in llm.loops} == {"orchestrator-loop"}
+        assert elapsed < 0.55, elapsed
+    finally:
+        system.engine.shutdown()
+
+
+def test_telemetry_is_written_off_the_loop():
+    with tempfile.TemporaryDirectory() as tmp:
+        system = make_system(tmp, {FAST: SlowLLM(0)})
+    writers = []
+    system.telemetry.record = lambda trace, routing_info: writers.append(threading.current_thread().name)
+    try:
+        system.generate_response("question", selected_model=FAST, routing_mode="manual",
+                                 use_context=False, use_cache=False)
+        assert len(writers) == 1
+        assert writers[0] != "orchestrator-loop"
+    finally:
+        system.engine.shutdown()
+
+
+def test_cancelled_request_cancels_generation_and_frees_its_slot():
+    llm = SlowLLM(3600)
+    with tempfile.TemporaryDirectory() as tmp:
+        system = make_system(tmp, {FAST: llm})
+    engine = system.engine
+    try:
+        future = asyncio.run_coroutine_threadsafe(
+            engine.process_request("hang", selected_model=FAST, routing_mode="manual",
+                                   use_context=False, use_cache=False),
+            engine._ensure_loop(),
+        )
+        assert llm.started.wait(5)
+        assert system.scheduler.get_stats()["in_flight"] == 1
+
+        future.cancel()
+        assert llm.cancelled.wait(5)
+        deadline = time.monotonic() + 5
+        while system.scheduler.get_stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert system.scheduler.get_stats()["in_flight"] == 0
+    finally:
+        engine.shutdown()
+
+
+if __name__ == "__main__":
+    test_stream_sync_relays_chunks_within_deadline()
+    test_stream_sync_deadline_cancels_between_chunks()
+    test_abandoned_stream_is_closed()
+    test_concurrent_requests_share_the_loop()
+    test_telemetry_is_written_off_the_loop()
+    test_cancelled_request_cancels_generation_and_frees_its_slot()
+    print("✅ Orchestrator engine tests passed")
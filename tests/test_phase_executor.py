@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent HRM phase executor
+Verifies concurrency, deterministic result ordering and that per-model
+limits come from the request scheduler
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.phase_executor import PhaseExecutor
+from src.core.request_scheduler import RequestScheduler
+
+
+def _sleeper(value, delay, tracker=None):
+    def job():
+        if tracker is not None:
+            tracker.enter()
+        time.sleep(delay)
+        if tracker is not None:
+            tracker.exit()
+        return value
+    return job
+
+
+class _ConcurrencyTracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def enter(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def exit(self):
+        with self.lock:
+            self.active -= 1
+
+
+def test_results_keep_submission_order():
+    """Slow first job must still come back first"""
+    executor = PhaseExecutor()
+    jobs = [
+        _sleeper("a", 0.2),
+        _sleeper("b", 0.0),
+        _sleeper("c", 0.1),
+    ]
+    assert executor.run_phase(jobs) == ["a", "b", "c"]
+
+
+def test_phase_takes_max_not_sum():
+    """Independent jobs overlap"""
+    executor = PhaseExecutor()
+    jobs = [_sleeper(i, 0.2) for i in range(3)]
+
+    start = time.time()
+    executor.run_phase(jobs)
+    elapsed = time.time() - start
+
+    assert elapsed < 0.45
+
+
+def test_per_model_limit_comes_from_the_scheduler():
+    """Jobs take scheduler slots; a model limited to one never runs two at once"""
+    scheduler = RequestScheduler({"big": 1, "fast": 2}, max_in_flight=4, poll_interval=0.01)
+    trackers = {"big": _ConcurrencyTracker(), "fast": _ConcurrencyTracker()}
+
+    def generation(model_name, value):
+        def job():
+            with scheduler.slot(model_name):
+                return _sleeper(value, 0.05, trackers[model_name])()
+        return job
+
+    jobs = [generation(model_name, i)
+            for i, model_name in enumerate(["big", "fast", "big", "fast", "big"])]
+    assert PhaseExecutor(max_workers=5).run_phase(jobs) == [0, 1, 2, 3, 4]
+    assert trackers["big"].peak == 1
+    assert trackers["fast"].peak == 2
+    assert scheduler.get_stats()["in_flight"] == 0
+
+
+def test_max_workers_bounds_a_phase():
+    tracker = _ConcurrencyTracker()
+    executor = PhaseExecutor(max_workers=2)
+    executor.run_phase([_sleeper(i, 0.05, tracker) for i in range(5)])
+    assert tracker.peak == 2
+
+
+def test_job_exception_is_reraised():
+    executor = PhaseExecutor()
+
+    def failing():
+        raise RuntimeError("boom")
+
+    try:
+        executor.run_phase([failing, _sleeper(1, 0)])
+    except RuntimeError as e:
+        assert "boom" in str(e)
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+if __name__ == "__main__":
+    test_results_keep_submission_order()
+    test_phase_takes_max_not_sum()
+    test_per_model_limit_comes_from_the_scheduler()
+    test_max_workers_bounds_a_phase()
+    test_job_exception_is_reraised()
+    print("✅ Phase executor tests passed")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for ProjectManager's in-memory metadata store and write-behind flushing
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.project_manager import ProjectManager
+
+
+def in_tmp_projects(test):
+    """Run ``test`` with ./projects inside a temporary directory"""
+    def wrapper():
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                test()
+            finally:
+                os.chdir(cwd)
+    wrapper.__name__ = test.__name__
+    return wrapper
+
+
+def read_file(manager, project_name):
+    with open(manager.projects_dir / project_name / "project_metadata.json") as f:
+        return json.load(f)
+
+
+@in_tmp_projects
+def test_updates_are_coalesced_and_written_behind():
+    manager = ProjectManager(flush_delay=60)
+    manager.create_project("Synth")
+    metadata_file = manager.projects_dir / "Synth" / "project_metadata.json"
+    written = metadata_file.stat().st_mtime_ns
+
+    for model in ("GLM", "DeepSeek", "GLM"):
+        metadata = manager.get_project_metadata("Synth")
+        if model not in metadata["models_used"]:
+            metadata["models_used"].append(model)
+            manager.update_project_metadata("Synth", metadata)
+
+    # Readers see the change at once; the file is untouched until the flush
+    assert manager.get_project_metadata("Synth")["models_used"] == ["GLM", "DeepSeek"]
+    assert metadata_file.stat().st_mtime_ns == written
+    assert read_file(manager, "Synth")["models_used"] == []
+
+    assert manager.flush()
+    assert read_file(manager, "Synth")["models_used"] == ["GLM", "DeepSeek"]
+    assert not list(metadata_file.parent.glob("*.tmp"))
+
+
+@in_tmp_projects
+def test_background_flush():
+    manager = ProjectManager(flush_delay=0.05)
+    manager.create_project("Synth")
+    manager.update_editor_settings("Synth", {"font_size": 18})
+    deadline = time.monotonic() + 2
+    while read_file(manager, "Synth")["editor_settings"]["font_size"] != 18:
+        assert time.monotonic() < deadline, "metadata was never flushed"
+        time.sleep(0.02)
+
+
+@in_tmp_projects
+def test_external_changes_invalidate_the_cache():
+    manager = ProjectManager(flush_delay=60)
+    manager.create_project("Synth")
+    assert manager.get_project_metadata("Synth")["description"] == ""
+
+    metadata_file = manager.projects_dir / "Synth" / "project_metadata.json"
+    metadata = read_file(manager, "Synth")
+    metadata["description"] = "edited by hand"
+    metadata_file.write_text(json.dumps(metadata))
+    stat = metadata_file.stat()
+    os.utime(metadata_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert manager.get_project_metadata("Synth")["description"] == "edited by hand"
+
+
+@in_tmp_projects
+def test_reads_return_copies():
+    manager = ProjectManager(flush_delay=60)
+    manager.create_project("Synth")
+    manager.get_project_metadata("Synth")["models_used"].append("not saved")
+    manager.get_project_files("Synth")["included"].append("not saved")
+    assert manager.get_project_metadata("Synth")["models_used"] == []
+    assert manager.get_project_files("Synth")["included"] == []
+
+
+@in_tmp_projects
+def test_default_project_stays_in_memory():
+    manager = ProjectManager(flush_delay=0)
+    metadata = manager.get_project_metadata("Default")
+    metadata["models_used"].append("GLM")
+    assert manager.update_project_metadata("Default", metadata)
+    assert manager.get_project_metadata("Default")["models_used"] == ["GLM"]
+    assert not (manager.projects_dir / "Default" / "project_metadata.json").exists()
+
+
+@in_tmp_projects
+def test_deleted_project_is_not_recreated():
+    manager = ProjectManager(flush_delay=60)
+    manager.create_project("Synth")
+    manager.add_included_file("Synth", "main.dsp")
+    ok, _ = manager.delete_project("Synth")
+    assert ok
+    manager.flush()
+    assert not (manager.projects_dir / "Synth").exists()
+
+
+if __name__ == "__main__":
+    test_updates_are_coalesced_and_written_behind()
+    test_background_flush()
+    test_external_changes_invalidate_the_cache()
+    test_reads_return_copies()
+    test_default_project_stays_in_memory()
+    test_deleted_project_is_not_recreated()
+    print("✅ Project manager tests passed")
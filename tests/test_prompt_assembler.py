@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-budgeted prompt assembler
+Covers priority filling, truncation, layout order and num_ctx selection
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.prompt_assembler import PromptAssembler, PromptSection
+
+TEMPLATE = "{context}\n\nQ: {question}"
+MODEL = "test-model"
+
+
+def _assembler(window, **kwargs):
+    # One character per token keeps the arithmetic readable
+    return PromptAssembler(
+        {MODEL: window}, chars_per_token={MODEL: 1.0},
+        output_reserve=100, min_num_ctx=256, num_ctx_step=256, min_section_tokens=10, **kwargs
+    )
+
+
+def test_everything_fits():
+    assembler = _assembler(4096)
+    sections = [
+        PromptSection("knowledge_base", ["kb doc"], 1, header="KB"),
+        PromptSection("history", ["new", "old"], 2, header="H", separator="\n", reverse_layout=True),
+    ]
+    prompt, budget = assembler.assemble(MODEL, "why?", sections, TEMPLATE)
+
+    assert prompt == "KB\nkb doc\n\nH\nold\nnew\n\nQ: why?"
+    assert budget.dropped == [] and budget.truncated == []
+    assert budget.sections["question"] == 4
+    assert budget.num_ctx == 256
+
+
+def test_priorities_decide_what_survives():
+    assembler = _assembler(400)  # 300 tokens for the prompt
+    sections = [
+        PromptSection("knowledge_base", ["k" * 200], 1),
+        PromptSection("history", ["h" * 60, "o" * 60], 2),
+        PromptSection("project", ["p" * 50], 3),
+    ]
+    prompt, budget = assembler.assemble(MODEL, "question", sections, TEMPLATE)
+
+    assert "k" * 200 in prompt
+    assert "h" * 60 in prompt
+    assert "o" * 60 not in prompt
+    assert "history" in budget.truncated
+    assert "project" in budget.dropped
+    assert budget.total <= budget.budget
+
+
+def test_no_sections_returns_bare_question():
+    prompt, budget = _assembler(4096).assemble(MODEL, "hello", [], TEMPLATE)
+    assert prompt == "hello"
+    assert budget.total == 5
+
+
+def test_num_ctx_never_shrinks_for_a_loaded_model():
+    assembler = _assembler(8192)
+    _, large = assembler.assemble(MODEL, "x" * 3000, [], TEMPLATE)
+    _, small = assembler.assemble(MODEL, "y", [], TEMPLATE)
+    assert large.num_ctx == 3328
+    assert small.num_ctx == large.num_ctx
+
+
+if __name__ == "__main__":
+    test_everything_fits()
+    test_priorities_decide_what_survives()
+    test_no_sections_returns_bare_question()
+    test_num_ctx_never_shrinks_for_a_loaded_model()
+    print("✅ Prompt assembler tests passed")
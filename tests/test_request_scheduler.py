@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared request scheduler
+Verifies per-model and global limits, fairness across sessions and queue positions
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.request_scheduler import RequestScheduler, SlotWithdrawn
+
+
+def test_limits_are_enforced():
+    scheduler = RequestScheduler({"glm": 1, "deepseek": 2}, max_in_flight=2)
+    glm_a = scheduler.submit("glm")
+    glm_b = scheduler.submit("glm")
+    fast = scheduler.submit("deepseek")
+    fast_b = scheduler.submit("deepseek")
+
+    assert glm_a.state == "running"
+    assert glm_b.state == "waiting"  # model limit
+    assert fast.state == "running"
+    assert fast_b.state == "waiting"  # global limit
+
+    scheduler.release(glm_a)
+    # The freed slot goes to the oldest waiting ticket whose model has room
+    assert glm_b.state == "running"
+    assert fast_b.state == "waiting"
+    assert scheduler.get_stats()["in_flight"] == 2
+
+
+def test_sessions_are_served_fairly():
+    scheduler = RequestScheduler({"glm": 1}, max_in_flight=1)
+    running = scheduler.submit("glm", session_id="alice")
+    alice_burst = [scheduler.submit("glm", session_id="alice") for _ in range(3)]
+    bob = scheduler.submit("glm", session_id="bob")
+
+    # Alice already holds the slot, so Bob goes ahead of her queued burst
+    assert scheduler.queue_position(bob) == 1
+    assert scheduler.queue_position(alice_burst[0]) == 2
+
+    scheduler.release(running)
+    assert bob.state == "running"
+    scheduler.release(bob)
+    assert alice_burst[0].state == "running"
+    assert [ticket.state for ticket in alice_burst[1:]] == ["waiting", "waiting"]
+
+
+def test_wait_reports_positions_and_times_out():
+    scheduler = RequestScheduler({"glm": 1}, max_in_flight=1, poll_interval=0.05)
+    holder = scheduler.submit("glm")
+    positions = []
+
+    releaser = threading.Timer(0.2, scheduler.release, args=(holder,))
+    releaser.start()
+    with scheduler.slot("glm", on_wait=positions.append) as ticket:
+        assert ticket.state == "running"
+        assert ticket.wait_seconds > 0.1
+    assert positions == [1, 0]
+
+    holder = scheduler.submit("glm")
+    try:
+        with scheduler.slot("glm", timeout=0.1):
+            raise AssertionError("slot should not be granted")
+    except TimeoutError:
+        pass
+    assert scheduler.get_stats()["queued"] == {}
+    scheduler.release(holder)
+    assert scheduler.get_stats()["in_flight"] == 0
+
+
+def test_withdrawn_ticket_does_not_enter_the_slot():
+    scheduler = RequestScheduler({"glm": 1}, max_in_flight=1, poll_interval=0.05)
+    holder = scheduler.submit("glm")
+    # Another thread gives up on the queued generation
+    withdraw = threading.Timer(0.1, lambda: scheduler.release(scheduler._waiting["glm"][0]))
+    withdraw.start()
+    try:
+        with scheduler.slot("glm"):
+            raise AssertionError("a withdrawn ticket should not get a slot")
+    except SlotWithdrawn:
+        pass
+    stats = scheduler.get_stats()
+    assert stats["in_flight"] == 1 and stats["queued"] == {}
+    scheduler.release(holder)
+    assert scheduler.get_stats()["in_flight"] == 0
+
+
+def test_cancelled_async_wait_releases_ticket():
+    scheduler = RequestScheduler({"glm": 1}, max_in_flight=1, poll_interval=0.05)
+    holder = scheduler.submit("glm")
+
+    async def waiter():
+        async with scheduler.aslot("glm"):
+            pass
+
+    async def main():
+        task = asyncio.ensure_future(waiter())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(main())
+    assert scheduler.get_stats()["queued"] == {}
+    scheduler.release(holder)
+    assert scheduler.get_stats()["in_flight"] == 0
+
+
+def test_set_limits_starts_queued_generations():
+    scheduler = RequestScheduler(max_in_flight=1)
+    first = scheduler.submit("glm", "a")
+    second = scheduler.submit("glm", "b")
+    assert second.state == "waiting"
+
+    # Raising the limits starts the queued generation
+    scheduler.set_limits({"glm": 2}, max_in_flight=2)
+    assert second.state == "running"
+    scheduler.release(first)
+    scheduler.release(second)
+
+
+if __name__ == "__main__":
+    test_limits_are_enforced()
+    test_sessions_are_served_fairly()
+    test_wait_reports_positions_and_times_out()
+    test_withdrawn_ticket_does_not_enter_the_slot()
+    test_cancelled_async_wait_releases_ticket()
+    test_set_limits_starts_queued_generations()
+    print("✅ Request scheduler tests passed")
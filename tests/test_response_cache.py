@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent LLM response cache
+Covers key derivation, LRU eviction and TTL expiry
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.response_cache import ResponseCache
+
+
+def _make_cache(**kwargs) -> ResponseCache:
+    tmp_dir = tempfile.mkdtemp()
+    return ResponseCache(db_path=str(Path(tmp_dir) / "responses.db"), **kwargs)
+
+
+def test_key_depends_on_all_inputs():
+    base = ResponseCache.make_key("codellama:13b", "system", 0.7, "prompt")
+    assert base == ResponseCache.make_key("codellama:13b", "system", 0.7, "prompt")
+    assert base != ResponseCache.make_key("deepseek-coder:6.7b", "system", 0.7, "prompt")
+    assert base != ResponseCache.make_key("codellama:13b", "other", 0.7, "prompt")
+    assert base != ResponseCache.make_key("codellama:13b", "system", 0.2, "prompt")
+    assert base != ResponseCache.make_key("codellama:13b", "system", 0.7, "prompt!")
+
+
+def test_hit_and_miss_counters():
+    cache = _make_cache()
+    assert cache.get("missing") is None
+
+    cache.put("k", "Code Llama (FAUST Specialist)", "process = os.osc(440);")
+    assert cache.get("k") == "process = os.osc(440);"
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = _make_cache(max_entries=2)
+    cache.put("a", "m", "A")
+    time.sleep(0.01)
+    cache.put("b", "m", "B")
+    time.sleep(0.01)
+    cache.get("a")  # "a" is now more recent than "b"
+    time.sleep(0.01)
+    cache.put("c", "m", "C")
+
+    assert cache.get("a") == "A"
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+
+
+def test_ttl_expiry():
+    cache = _make_cache(ttl_seconds=0.05)
+    cache.put("k", "m", "value")
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+
+if __name__ == "__main__":
+    test_key_depends_on_all_inputs()
+    test_hit_and_miss_counters()
+    test_lru_eviction_keeps_recently_used()
+    test_ttl_expiry()
+    print("✅ Response cache tests passed")
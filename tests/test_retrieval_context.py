@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-request retrieval context
+Checks that one query embedding serves repeated searches without re-querying Chroma
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.retrieval_context import RetrievalContext
+
+
+class CountingVectorstore:
+    def __init__(self, size):
+        self.docs = [f"doc-{i}" for i in range(size)]
+        self.vector_searches = []
+
+    def similarity_search_by_vector(self, embedding, k=4):
+        self.vector_searches.append((tuple(embedding), k))
+        return self.docs[:k]
+
+    def similarity_search(self, query, k=4):
+        raise AssertionError("text search would embed the query again")
+
+
+def test_smaller_searches_reuse_larger_result():
+    vectorstore = CountingVectorstore(20)
+    retrieval = RetrievalContext("design a reverb", [0.1, 0.2, 0.3])
+
+    assert retrieval.search(vectorstore, 5) == vectorstore.docs[:5]
+    assert retrieval.search(vectorstore, 2) == vectorstore.docs[:2]
+    assert retrieval.search(vectorstore, 5) == vectorstore.docs[:5]
+    assert vectorstore.vector_searches == [((0.1, 0.2, 0.3), 5)]
+
+    assert retrieval.search(vectorstore, 8) == vectorstore.docs[:8]
+    assert len(vectorstore.vector_searches) == 2
+
+
+def test_exhausted_collection_is_not_queried_again():
+    vectorstore = CountingVectorstore(3)
+    retrieval = RetrievalContext("juce plugin", [1.0])
+
+    assert retrieval.search(vectorstore, 5) == vectorstore.docs
+    assert retrieval.search(vectorstore, 10) == vectorstore.docs
+    assert retrieval.searches == 1
+
+
+if __name__ == "__main__":
+    test_smaller_searches_reuse_larger_result()
+    test_exhausted_collection_is_not_queried_again()
+    print("✅ Retrieval context tests passed")
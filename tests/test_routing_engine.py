@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared precompiled routing engine
+Covers domain scoring, both complexity scales, task types and memoization
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.routing_engine import RoutingEngine
+
+DOMAIN_PATTERNS = {
+    "faust_synthesis": [
+        r"(create|write|generate|implement).*(faust|dsp|filter|oscillator|reverb)",
+        r"(adsr|envelope|lfo|modulation|vibrato|tremolo)",
+    ],
+    "juce_integration": [
+        r"(juce|plugin|vst|au|aax|processor).*(integration|implementation|development)",
+    ],
+}
+
+
+def test_domain_and_complexity():
+    engine = RoutingEngine(DOMAIN_PATTERNS)
+    analysis = engine.analyze("Implement a FAUST filter with an ADSR envelope")
+
+    assert analysis.domain == "faust_synthesis"
+    assert abs(analysis.domain_confidence - 0.4) < 1e-9
+    assert analysis.domain_scores == {"faust_synthesis": 2, "juce_integration": 0}
+    assert abs(analysis.complexity - 0.3) < 1e-9
+    assert analysis.task_complexity == 5
+    assert analysis.retrieval_task_type == "faust"
+    assert "filter" in analysis.keyword_hits["dsp"]
+
+
+def test_task_types_and_highest_complexity_wins():
+    engine = RoutingEngine()
+    analysis = engine.analyze("Build a simple JUCE plugin from scratch and explain it")
+
+    assert analysis.task_types == ["juce", "complex", "analysis"]
+    assert analysis.task_complexity == 10
+    assert analysis.domain == "general"
+
+
+def test_faust_syntax_is_case_sensitive_on_raw_prompt():
+    engine = RoutingEngine()
+    assert engine.analyze("process = os.osc(440);").has_faust_syntax
+    assert not engine.analyze("hello world").has_faust_syntax
+
+
+def test_analysis_is_memoized():
+    engine = RoutingEngine(cache_size=2)
+    first = engine.analyze("create a reverb")
+    assert engine.analyze("create a reverb") is first
+
+    engine.analyze("second prompt")
+    engine.analyze("third prompt")
+    assert engine.analyze("create a reverb") is not first
+
+
+if __name__ == "__main__":
+    test_domain_and_complexity()
+    test_task_types_and_highest_complexity_wins()
+    test_faust_syntax_is_case_sensitive_on_raw_prompt()
+    test_analysis_is_memoized()
+    print("✅ Routing engine tests passed")
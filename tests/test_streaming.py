@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental response stream contract
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.streaming import ResponseStream, StreamKeepAlive, StreamReset
+
+
+def fake_tokens(*chunks):
+    """Chunk generator standing in for a model stream"""
+    for chunk in chunks:
+        yield chunk
+
+
+def test_chunks_accumulate_and_hand_off_the_final_text():
+    completed = []
+    stream = ResponseStream(
+        fake_tokens("process", "", " = ", "os.osc(440);"),
+        routing={"selected_model": "Code Llama (FAUST Specialist)"},
+        on_complete=completed.append,
+    )
+    seen = []
+    for chunk in stream:
+        seen.append((chunk, stream.text))
+        assert not completed and not stream.completed
+
+    # Empty chunks are dropped; text is the running total at every step
+    assert seen == [
+        ("process", "process"),
+        (" = ", "process = "),
+        ("os.osc(440);", "process = os.osc(440);"),
+    ]
+    assert stream.completed
+    assert completed == ["process = os.osc(440);"]
+    assert stream.routing["selected_model"] == "Code Llama (FAUST Specialist)"
+
+    # A finished stream replays the full text once and doesn't call back again
+    assert list(stream) == ["process = os.osc(440);"]
+    assert stream.consume() == "process = os.osc(440);"
+    assert completed == ["process = os.osc(440);"]
+
+
+def test_abandoned_stream_does_not_complete():
+    completed = []
+    stream = ResponseStream(fake_tokens("a", "b", "c"), on_complete=completed.append)
+    for _ in stream:
+        break
+    assert stream.text == "a"
+    assert not stream.completed and completed == []
+
+
+def test_reset_replaces_the_text_so_far():
+    completed = []
+    stream = ResponseStream(
+        fake_tokens(StreamReset("nothing yet"), "first ", "draft", StreamReset("second"),
+                    "better draft", StreamReset("final"), "final ", "answer"),
+        on_complete=completed.append,
+    )
+    seen = [stream.text for _ in stream]
+    assert seen == ["first ", "first draft", "better draft", "final ", "final answer"]
+    # A reset before any text records no empty draft
+    assert stream.drafts == ["first draft", "better draft"]
+    assert stream.draft == "better draft"
+    # Only the replacing text is handed off
+    assert completed == ["final answer"]
+
+    unrefined = ResponseStream(fake_tokens("only answer"))
+    assert unrefined.consume() == "only answer"
+    assert unrefined.draft is None and unrefined.drafts == []
+
+
+def test_keep_alive_yields_an_empty_chunk():
+    stream = ResponseStream(fake_tokens(StreamKeepAlive(), StreamKeepAlive(), "done"))
+    seen = [(chunk, stream.text) for chunk in stream]
+    assert seen == [("", ""), ("", ""), ("done", "done")]
+
+
+def test_failing_completion_callback_keeps_the_text():
+    def fail(text):
+        raise IOError("disk full")
+
+    stream = ResponseStream(fake_tokens("saved ", "anyway"), on_complete=fail)
+    assert stream.consume() == "saved anyway"
+    assert stream.completed
+
+
+if __name__ == "__main__":
+    test_chunks_accumulate_and_hand_off_the_final_text()
+    test_abandoned_stream_does_not_complete()
+    test_reset_replaces_the_text_so_far()
+    test_keep_alive_yields_an_empty_chunk()
+    test_failing_completion_callback_keeps_the_text()
+    print("✅ Streaming tests passed")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for request telemetry: stage spans, the rotating JSONL metrics log
+and the Prometheus text endpoint
+"""
+
+import json
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.telemetry import RequestTrace, TelemetryRecorder
+
+
+def test_trace_breaks_down_stages():
+    trace = RequestTrace()
+    with trace.span("retrieval"):
+        with trace.span("chroma_query", k=4):
+            time.sleep(0.01)
+        with trace.span("chroma_query", k=4):
+            pass
+    with trace.span("model_call", model="GLM-Z1", prompt_tokens=120) as span:
+        time.sleep(0.01)
+        span.first_token()
+        time.sleep(0.01)
+        span.set(output_tokens=50)
+
+    summary = trace.to_dict()
+    assert summary["stages"]["chroma_query"]["count"] == 2
+    assert summary["stages"]["retrieval"]["total_ms"] >= summary["stages"]["chroma_query"]["total_ms"]
+    assert summary["total_ms"] >= summary["stages"]["model_call"]["total_ms"]
+
+    model_call = summary["spans"][-1]
+    assert model_call["model"] == "GLM-Z1"
+    assert model_call["prompt_tokens"] == 120
+    assert 0 < model_call["ttft_ms"] < model_call["duration_ms"]
+    assert model_call["tokens_per_s"] > 0
+    # Spans are ordered by start time
+    offsets = [span["offset_ms"] for span in summary["spans"]]
+    assert offsets == sorted(offsets)
+
+
+def test_span_recorded_when_stage_fails():
+    trace = RequestTrace()
+    try:
+        with trace.span("hrm_decomposition"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert trace.to_dict()["stages"]["hrm_decomposition"]["count"] == 1
+
+
+def test_recorder_writes_rotating_jsonl():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "logs" / "metrics.jsonl"
+        recorder = TelemetryRecorder(str(path), max_bytes=600, backup_count=2)
+        trace = RequestTrace()
+        with trace.span("routing"):
+            pass
+        for _ in range(10):
+            recorder.record(trace.to_dict(), {"selected_model": "GLM-Z1", "mode": "auto"})
+
+        entry = json.loads(path.read_text().splitlines()[-1])
+        assert entry["model"] == "GLM-Z1"
+        assert entry["stages"]["routing"]["count"] == 1
+        assert (Path(tmp) / "logs" / "metrics.jsonl.1").exists()
+        assert not (Path(tmp) / "logs" / "metrics.jsonl.3").exists()
+
+
+def test_prometheus_quantiles_and_endpoint():
+    recorder = TelemetryRecorder(path=None)
+    for duration in range(1, 101):
+        recorder.record({"total_ms": float(duration), "spans": [
+            {"stage": "model_call", "model": "GLM-Z1", "duration_ms": float(duration),
+             "ttft_ms": 5.0, "tokens_per_s": 40.0},
+        ]}, {"selected_model": "GLM-Z1"})
+
+    text = recorder.render_prometheus()
+    assert '# TYPE glm_request_duration_ms summary' in text
+    assert 'glm_stage_duration_ms{stage="model_call",model="GLM-Z1",quantile="0.5"} 51.000' in text
+    assert 'glm_stage_duration_ms{stage="model_call",model="GLM-Z1",quantile="0.99"} 99.000' in text
+    assert 'glm_stage_duration_ms_count{stage="model_call",model="GLM-Z1"} 100' in text
+    assert 'glm_tokens_per_second{stage="model_call",model="GLM-Z1",quantile="0.95"} 40.000' in text
+
+    port = recorder.start_prometheus_server(0)
+    try:
+        # Local only unless a host is given
+        assert recorder._server.server_address[0] == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.read().decode() == recorder.render_prometheus()
+    finally:
+        recorder.stop_prometheus_server()
+
+
+if __name__ == "__main__":
+    test_trace_breaks_down_stages()
+    test_span_recorded_when_stage_fails()
+    test_recorder_writes_rotating_jsonl()
+    test_prometheus_quantiles_and_endpoint()
+    print("✅ Telemetry tests passed")